@@ -0,0 +1,60 @@
+#! /usr/bin/env python
+"""
+Time loading the sample game from gd.gamecache against parsing its XML,
+and compare the size of a cached game with its source files.
+
+    python benchmarks/bench_gamecache.py [--repeat 50]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from gd import gamecache  # noqa: E402
+from gd import utils  # noqa: E402
+
+SAMPLE_DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           os.pardir, "sample_data")
+PATHS = [os.path.join(SAMPLE_DATA, name)
+         for name in ("game.xml", "inning/inning_all.xml", "players.xml")]
+
+
+def run(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    args_parser = argparse.ArgumentParser()
+    args_parser.add_argument("--repeat", type=int, default=50)
+    args = args_parser.parse_args()
+
+    root = tempfile.mkdtemp()
+    try:
+        gamecache.parse_paths(PATHS, root)
+        cases = (("parse XML", lambda: gamecache.parse_paths(PATHS, None)),
+                 ("load cached", lambda: gamecache.parse_paths(PATHS, root)))
+        timings = {case: run(fn, args.repeat) for case, fn in cases}
+
+        contents = [utils.read_gameday(path) for path in PATHS]
+        cached = os.path.getsize(gamecache.cache_path(
+            root, gamecache.game_key(contents)))
+    finally:
+        shutil.rmtree(root)
+
+    for case, _ in cases:
+        print("%-12s %8.2fms" % (case, timings[case] * 1000))
+    print("speedup      %8.1fx" % (timings["parse XML"] /
+                                   timings["load cached"]))
+    print("XML %d bytes, cached %d bytes" %
+          (sum(map(len, contents)), cached))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#! /usr/bin/env python
+"""
+Compare the ORM and bulk insert paths of `gd-util import` over many copies
+of the sample game, each loaded into a fresh SQLite database, then the bulk
+path with games parsed by an increasing number of processes.
+
+    python benchmarks/bench_import.py [--games 100] [--batch-sizes 1 50]
+                                      [--jobs 1 2 4]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+SAMPLE_DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           os.pardir, "sample_data")
+GAME_PK = b'game_pk="347148"'
+
+
+def make_root(games):
+    """Copy the sample game `games` times, each with its own game_pk."""
+    root = tempfile.mkdtemp()
+    for name in ("game.xml", "players.xml", "inning/inning_all.xml"):
+        with open(os.path.join(SAMPLE_DATA, name), "rb") as fh:
+            content = fh.read()
+        for num in range(games):
+            path = os.path.join(root, "gid_%d" % num, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as fh:
+                if name == "game.xml":
+                    fh.write(content.replace(
+                        GAME_PK, b'game_pk="%d"' % (num + 1)))
+                else:
+                    fh.write(content)
+    return root
+
+
+def run(util, database, root, bulk, batch_size, jobs=1):
+    database.session.remove()
+    database.Base.metadata.drop_all(bind=database.get_engine())
+    database.init()
+
+    args = argparse.Namespace(root=root, container=None, archive=None,
+                              parse_cache=None, bulk=bulk,
+                              batch_size=batch_size, jobs=jobs)
+    start = time.perf_counter()
+    util.do_import(args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--batch-sizes", type=int, nargs="+",
+                        default=[1, 50])
+    parser.add_argument("--jobs", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    root = make_root(args.games)
+    os.environ["GD_DATABASE_URI"] = "sqlite:///%s" % os.path.join(
+        workdir, "bench.db")
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        from gd import database
+        from gd.scripts import util
+        util.logger.setLevel("WARNING")
+
+        for bulk in (False, True):
+            for batch_size in args.batch_sizes:
+                elapsed = run(util, database, root, bulk, batch_size)
+                print("%-4s batch=%-4d %5d games in %6.2fs  %6.1f games/s" %
+                      ("bulk" if bulk else "orm", batch_size, args.games,
+                       elapsed, args.games / elapsed))
+
+        batch_size = max(args.batch_sizes)
+        for jobs in args.jobs:
+            elapsed = run(util, database, root, True, batch_size, jobs)
+            print("bulk batch=%-4d jobs=%-2d %5d games in %6.2fs  "
+                  "%6.1f games/s" % (batch_size, jobs, args.games, elapsed,
+                                     args.games / elapsed))
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(root)
+        shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main()
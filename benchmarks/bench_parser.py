@@ -0,0 +1,51 @@
+#! /usr/bin/env python
+"""
+Time parsing the sample game with each available XML backend.
+
+    python benchmarks/bench_parser.py [--repeat 50]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from gd import etree  # noqa: E402
+from gd import parser  # noqa: E402
+
+SAMPLE_DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           os.pardir, "sample_data")
+PATHS = [os.path.join(SAMPLE_DATA, name)
+         for name in ("game.xml", "inning/inning_all.xml", "players.xml")]
+
+
+def run(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    args_parser = argparse.ArgumentParser()
+    args_parser.add_argument("--repeat", type=int, default=50)
+    args = args_parser.parse_args()
+
+    cases = (("get_plays", lambda: parser.get_plays(PATHS[1])),
+             ("parse_paths", lambda: parser.parse_paths(PATHS)))
+    timings = {}
+    for name in sorted(etree.BACKENDS):
+        etree.use(name)
+        for case, fn in cases:
+            timings[name, case] = elapsed = run(fn, args.repeat)
+            print("%-6s %-12s %8.2fms" % (name, case, elapsed * 1000))
+
+    if "lxml" in etree.BACKENDS:
+        for case, _ in cases:
+            print("lxml speedup %-12s %5.2fx" %
+                  (case, timings["stdlib", case] / timings["lxml", case]))
+
+
+if __name__ == "__main__":
+    main()
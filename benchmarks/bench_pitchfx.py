@@ -0,0 +1,55 @@
+#! /usr/bin/env python
+"""
+Time gd.pitchfx.derive over a season's worth of pitches, made by
+repeating the sample game's pitches with some noise added.
+
+    python benchmarks/bench_pitchfx.py [--pitches 700000]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from gd import parser  # noqa: E402
+from gd import pitchfx  # noqa: E402
+
+SAMPLE_DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           os.pardir, "sample_data")
+
+
+def make_pitches(count):
+    path = os.path.join(SAMPLE_DATA, "inning", "inning_all.xml")
+    sample = [pitch for pitch in parser.get_plays(path)[1]
+              if pitch.x0 is not None]
+    rng = numpy.random.default_rng(0)
+    index = rng.integers(len(sample), size=count)
+    pitches = {}
+    for name in pitchfx._FIT + ("sz_top", "sz_bot"):
+        column = numpy.array([getattr(pitch, name) for pitch in sample])
+        pitches[name] = column[index] * rng.normal(1, 0.01, count)
+    return pitches
+
+
+def main():
+    args_parser = argparse.ArgumentParser()
+    args_parser.add_argument("--pitches", type=int, default=700000)
+    args_parser.add_argument("--repeat", type=int, default=5)
+    args = args_parser.parse_args()
+
+    pitches = make_pitches(args.pitches)
+    timings = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        pitchfx.derive(pitches)
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    print("derive %d pitches in %.3fs  %.0f pitches/s" %
+          (args.pitches, best, args.pitches / best))
+
+
+if __name__ == "__main__":
+    main()
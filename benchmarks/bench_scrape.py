@@ -0,0 +1,104 @@
+#! /usr/bin/env python
+"""
+Compare gd.scrape throughput with an increasing number of workers against a
+local HTTP stand-in for gd2.mlb.com.
+
+`download` fetches a known list of file URLs. `crawl` also discovers them,
+listing every day and game directory before (or, with workers, while)
+downloading. `resync` repeats a crawl into a directory that already holds
+every file, as recorded in a manifest. `listing` times discovery alone,
+with a cold and then a warm directory-listing cache.
+
+    python benchmarks/bench_scrape.py [--latency 0.02] [--workers 1 4 16]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+import gameday_server  # noqa
+from gd import cache  # noqa
+from gd import manifest  # noqa
+from gd import scrape  # noqa
+
+
+def discover(days, workers, fetch_manifest=None):
+    if workers > 1 or fetch_manifest is not None:
+        return scrape.crawl_files(days, workers, fetch_manifest)
+    return scrape.get_files(scrape.get_games(days))
+
+
+def run(name, urls, workers, size, resync=False):
+    cwd = os.getcwd()
+    target = tempfile.mkdtemp()
+    os.chdir(target)
+    try:
+        fetch_manifest = None
+        if resync:
+            fetch_manifest = manifest.Manifest()
+            scrape.download(urls(None), workers=16, manifest=fetch_manifest)
+        start = time.perf_counter()
+        count = scrape.download(urls(fetch_manifest), workers=workers,
+                                manifest=fetch_manifest)
+        elapsed = time.perf_counter() - start
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(target)
+    print("%-8s workers=%-3d %5d files in %6.2fs" %
+          (name, workers, count, elapsed), end="")
+    if count:
+        rate = (count / elapsed, size / elapsed / 1e6)
+        print("  %7.1f files/s  %6.2f MB/s" % rate, end="")
+    print()
+
+
+def discovery(server, days, workers):
+    target = tempfile.mkdtemp()
+    try:
+        listings = cache.ListingCache(os.path.join(target, "listings.db"))
+        for name in ("cold", "warm"):
+            before = server.handler.requests
+            start = time.perf_counter()
+            count = len(list(scrape.crawl_files(days, workers,
+                                                cache=listings)))
+            elapsed = time.perf_counter() - start
+            print("listing  workers=%-3d %5d files in %6.2fs  %s cache, "
+                  "%d requests" % (workers, count, elapsed, name,
+                                   server.handler.requests - before))
+        listings.close()
+    finally:
+        shutil.rmtree(target)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=[1, 4, 16])
+    args = parser.parse_args()
+
+    tree = gameday_server.default_tree()
+    server, base = gameday_server.serve(tree, args.latency)
+    files = gameday_server.file_urls(tree, base)
+    days = gameday_server.day_urls(tree, base)
+    size = gameday_server.total_size(tree)
+
+    for workers in args.workers:
+        run("download", lambda m: files, workers, size)
+    for workers in args.workers:
+        run("crawl", lambda m: discover(days, workers, m), workers, size)
+    for workers in args.workers:
+        run("resync", lambda m: discover(days, workers, m), workers, size,
+            resync=True)
+    for workers in args.workers:
+        discovery(server, days, workers)
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
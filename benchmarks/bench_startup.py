@@ -0,0 +1,83 @@
+#! /usr/bin/env python
+"""
+Time how long gd-util takes to start, in fresh interpreters, for each
+subcommand's --help, along with a bare interpreter for comparison. Also
+list the heavy dependencies each one ends up importing.
+
+`scrape -d` is also run for real, over an empty range of dates so it
+doesn't touch the network, to catch imports made once a subcommand runs
+rather than when its arguments are parsed.
+
+    python benchmarks/bench_startup.py [--repeat 10]
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+
+HEAVY = ("sqlalchemy", "numpy", "pyarrow", "requests", "libcloud")
+
+# Run gd-util's main with `argv`, then print which of HEAVY got imported.
+SCRIPT = """
+import sys
+sys.argv = ["gd-util"] + sys.argv[1:]
+from gd.scripts import util
+try:
+    util.main()
+except SystemExit:
+    pass
+print(" ".join(name for name in %r if name in sys.modules))
+""" % (HEAVY,)
+
+COMMANDS = ((), ("scrape", "--help"), ("ingest", "--help"),
+            ("import", "--help"), ("export", "--help"),
+            ("scrape", "-d", "-b", "2013-05-02", "-e", "2013-05-01",
+             "--no-manifest", "--no-listing-cache"))
+
+
+def run(argv, repeat, cwd=None):
+    """Return the best wall time of `repeat` runs of `argv` in `cwd`, and
+    its output."""
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    # Startup mustn't depend on a database being configured.
+    env.pop("GD_DATABASE_URI", None)
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = subprocess.run(argv, env=env, cwd=cwd,
+                                stdout=subprocess.PIPE,
+                                stderr=subprocess.DEVNULL,
+                                universal_newlines=True).stdout
+        best = min(best, time.perf_counter() - start)
+    return best, output
+
+
+def main():
+    args_parser = argparse.ArgumentParser()
+    args_parser.add_argument("--repeat", type=int, default=10)
+    args = args_parser.parse_args()
+
+    bare, _ = run([sys.executable, "-c", "pass"], args.repeat)
+    print("%-16s %7.1fms" % ("python", bare * 1000))
+    # Commands which run write gd-util's log into the working directory.
+    workdir = tempfile.mkdtemp()
+    try:
+        for command in COMMANDS:
+            elapsed, output = run([sys.executable, "-c", SCRIPT] +
+                                  list(command), args.repeat, workdir)
+            imported = output.splitlines()[-1] if output.strip() else ""
+            name = " ".join(part for part in command[:2]
+                            if part != "--help") or "gd-util"
+            print("%-16s %7.1fms  %s" % (name, elapsed * 1000,
+                                         imported or "-"))
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main()
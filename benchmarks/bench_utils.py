@@ -0,0 +1,70 @@
+#! /usr/bin/env python
+"""
+Time the date and time parsers in gd.utils on the values found in the
+sample game, against strptime and their uncached versions.
+
+    python benchmarks/bench_utils.py [--repeat 20]
+"""
+from datetime import datetime
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from gd import parser  # noqa: E402
+from gd import utils  # noqa: E402
+
+SAMPLE_DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           os.pardir, "sample_data")
+
+
+def sample_values():
+    """Collect the strings each parser is called with for the sample game,
+    in the order and with the repetition the parser sees them."""
+    stamps, times = [], []
+    tree = parser.read(os.path.join(SAMPLE_DATA, "inning", "inning_all.xml"))
+    for atbat in tree.iter("atbat"):
+        for pitch in atbat.iter("pitch"):
+            stamps += [pitch.get("tfs_zulu"), atbat.get("start_tfs_zulu")]
+            times.append(pitch.get("tfs"))
+        stamps.append(atbat.get("start_tfs_zulu"))
+        times.append(atbat.get("start_tfs"))
+    return stamps, times
+
+
+def run(fn, values, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for value in values:
+            fn(value)
+    return (time.perf_counter() - start) / (repeat * len(values))
+
+
+def main():
+    args_parser = argparse.ArgumentParser()
+    args_parser.add_argument("--repeat", type=int, default=20)
+    args = args_parser.parse_args()
+
+    stamps, times = sample_values()
+    dates = ["May 1, 2013"] * len(times)
+
+    def strptime(string):
+        return datetime.strptime(string, utils.ISO_FORMAT)
+
+    cases = (("strptime", strptime, stamps),
+             ("create_datetime uncached",
+              utils.create_datetime.__wrapped__, stamps),
+             ("create_datetime", utils.create_datetime, stamps),
+             ("create_time uncached", utils.create_time.__wrapped__, times),
+             ("create_time", utils.create_time, times),
+             ("create_date uncached", utils.create_date.__wrapped__, dates),
+             ("create_date", utils.create_date, dates))
+    for name, fn, values in cases:
+        elapsed = run(fn, values, args.repeat)
+        print("%-26s %8.3fus per call" % (name, elapsed * 1e6))
+
+
+if __name__ == "__main__":
+    main()
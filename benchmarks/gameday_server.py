@@ -0,0 +1,123 @@
+"""
+A local stand-in for gd2.mlb.com used by the benchmarks.
+
+Serves a synthetic Gameday tree built from `sample_data`, with Apache-style
+directory listings and an artificial per-request latency so that round trips
+dominate, just like they do against the real server.
+"""
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+import os
+import threading
+import time
+
+SAMPLE_DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           os.pardir, "sample_data")
+ROOT = "/components/game/mlb/"
+DOCTYPE = '<!DOCTYPE HTML PUBLIC "-//W3C//DTD HTML 3.2 Final//EN">\n'
+GAME_FILES = ("game.xml", "players.xml", "inning/inning_all.xml")
+
+
+def _read(name):
+    with open(os.path.join(SAMPLE_DATA, name), "rb") as fh:
+        return fh.read()
+
+
+def build_tree(first_day, days, games_per_day):
+    """Return a dict of path -> bytes for files and path -> list of
+    child names for directories."""
+    files = {name: _read(name) for name in GAME_FILES}
+    tree = {}
+
+    def add(path):
+        parent, _, name = path.rstrip("/").rpartition("/")
+        parent += "/"
+        suffix = "/" if path.endswith("/") else ""
+        children = tree.setdefault(parent, [])
+        if name + suffix not in children:
+            children.append(name + suffix)
+
+    for offset in range(days):
+        day = first_day + timedelta(days=offset)
+        day_path = ROOT + "year_{0.year:04}/month_{0.month:02}/" \
+                          "day_{0.day:02}/".format(day)
+        parts = day_path[len(ROOT):].strip("/").split("/")
+        path = ROOT
+        for part in parts:
+            add(path + part + "/")
+            path += part + "/"
+        tree.setdefault(day_path, [])
+        for num in range(games_per_day):
+            game = "gid_{0.year:04}_{0.month:02}_{0.day:02}_" \
+                   "anamlb_oakmlb_{1}/".format(day, num + 1)
+            add(day_path + game)
+            add(day_path + game + "inning/")
+            for name, content in files.items():
+                add(day_path + game + name)
+                tree[day_path + game + name] = content
+    return tree
+
+
+def _listing(children):
+    links = "".join('<li><a href="%s"> %s</a></li>' % (name, name)
+                    for name in children)
+    return (DOCTYPE + "<html><body><ul>%s</ul></body></html>\n" %
+            links).encode("utf8")
+
+
+class _ThreadingServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+def serve(tree, latency=0.02):
+    """Serve `tree` on a random local port from a background thread.
+    Return the server and the base URL of the Gameday root."""
+
+    class Handler(BaseHTTPRequestHandler):
+        requests = 0
+
+        def do_GET(self):
+            Handler.requests += 1
+            time.sleep(latency)
+            node = tree.get(self.path)
+            if node is None:
+                self.send_error(404)
+                return
+            body = _listing(node) if isinstance(node, list) else node
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = _ThreadingServer(("127.0.0.1", 0), Handler)
+    server.handler = Handler
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, "http://127.0.0.1:%d%s" % (server.server_port, ROOT)
+
+
+def file_urls(tree, base):
+    """Return the URLs of every file (not directory) in `tree`."""
+    return [base + path[len(ROOT):] for path, node in sorted(tree.items())
+            if not isinstance(node, list)]
+
+
+def day_urls(tree, base):
+    """Return the URLs of every day directory in `tree`."""
+    return [base + path[len(ROOT):] for path in sorted(tree)
+            if path.rstrip("/").rpartition("/")[2].startswith("day_")]
+
+
+def total_size(tree):
+    """Return the number of bytes in every file of `tree`."""
+    return sum(len(node) for node in tree.values()
+               if not isinstance(node, list))
+
+
+def default_tree():
+    return build_tree(date(2013, 5, 1), days=7, games_per_day=8)
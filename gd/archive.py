@@ -0,0 +1,237 @@
+"""
+Packed archives of Gameday files, so a season is a few zip files rather
+than hundreds of thousands of small files in nested directories.
+
+An archive is a directory of zip files, one or more per season, named
+like year_2013-20140102T030405.000000-0000.zip. Each file is stored deflated,
+named by its path below the season's directory, such as
+month_05/day_01/gid_2013_05_01_nynmlb_atlmlb_1/game.xml. The zip's central
+directory is the index of where every file starts, so it's read once and
+any game's files are then read directly by game ID, without walking
+directories.
+
+Each run of `ArchiveWriter` adds new zip files rather than changing
+existing ones, since an interrupted write would lose a zip's central
+directory. It also moves on to a new zip every `max_files` files, so a run
+which is killed only loses the files of the zips it had open. Where files
+of the same name are in several zips of a season, the latest one wins.
+"""
+from datetime import datetime, timezone
+from functools import lru_cache
+import os
+import re
+import threading
+import zipfile
+import zlib
+
+from gd import gamecache
+from gd import parser
+from gd import utils
+
+logger = utils.get_logger(__name__)
+
+SUFFIX = ".zip"
+
+# Files written to each zip before it's completed and another is started.
+DEFAULT_MAX_FILES = 500
+
+# The season and path below its directory of a Gameday URL or path.
+_SEASON_PATH = re.compile(r"(?:^|/)year_(\d{4})/(.+)$")
+_GAME_MEMBER = re.compile(r"(.*/)?(gid_[^/]+)/(.+)$")
+
+
+def member_name(url):
+    """Return the season of the Gameday `url`, and the name its file is
+    stored under in that season's archive. Return None for URLs which
+    aren't below a season's directory."""
+    found = _SEASON_PATH.search(url)
+    if found is None:
+        return None
+    return int(found.group(1)), found.group(2)
+
+
+def _open_zips(root, prefix="year_"):
+    """Yield the path and open ZipFile of each zip in `root` whose name
+    starts with `prefix`, oldest first, skipping any left incomplete."""
+    if not os.path.isdir(root):
+        return
+    for name in sorted(os.listdir(root)):
+        if not (name.startswith(prefix) and name.endswith(SUFFIX)):
+            continue
+        path = os.path.join(root, name)
+        try:
+            zf = zipfile.ZipFile(path)
+        except zipfile.BadZipFile:
+            logger.error("Skipping %s, which isn't complete", path)
+            continue
+        yield path, zf
+
+
+class ArchiveWriter:
+    """Write Gameday files into the archive at `root`. The zip for each
+    season is opened when its first file is written and only complete
+    once `close` is called, so use this as a context manager, or once
+    `max_files` files have been written to it, when the next file starts a
+    new one. Writing is safe from several threads."""
+
+    def __init__(self, root, max_files=DEFAULT_MAX_FILES):
+        self.root = root
+        self.max_files = max_files
+        self._stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S.%f")
+        # The open zip of each season, and how many zips it's had.
+        self._zips = {}
+        self._counts = {}
+        # The (size, CRC-32) of every file in the archive, by season.
+        self._stored = {}
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _season(self, season):
+        """Return the stored files of `season`, reading them from its
+        existing zips the first time."""
+        if season not in self._stored:
+            stored = self._stored[season] = {}
+            for path, zf in _open_zips(self.root, "year_%d-" % season):
+                with zf:
+                    for info in zf.infolist():
+                        stored[info.filename] = (info.file_size, info.CRC)
+        return self._stored[season]
+
+    def __contains__(self, url):
+        found = member_name(url)
+        if found is None:
+            return False
+        with self._lock:
+            return found[1] in self._season(found[0])
+
+    def write(self, url, content):
+        """Store `content` as the file at `url`. Return False if the same
+        content is already stored or `url` isn't below a season."""
+        found = member_name(url)
+        if found is None:
+            logger.warning("%s isn't part of a season", url)
+            return False
+        season, name = found
+        key = (len(content), zlib.crc32(content))
+        with self._lock:
+            stored = self._season(season)
+            if stored.get(name) == key:
+                return False
+            zf = self._zips.get(season)
+            if zf is not None and len(zf.filelist) >= self.max_files:
+                zf.close()
+                zf = None
+            if zf is None:
+                zf = self._zips[season] = self._new_zip(season)
+            zf.writestr(name, content)
+            stored[name] = key
+        return True
+
+    def _new_zip(self, season):
+        count = self._counts.get(season, 0)
+        self._counts[season] = count + 1
+        path = os.path.join(self.root, "year_%d-%s-%04d%s" %
+                            (season, self._stamp, count, SUFFIX))
+        return zipfile.ZipFile(path, "x", zipfile.ZIP_DEFLATED)
+
+    def close(self):
+        """Write the central directory of each zip."""
+        with self._lock:
+            for zf in self._zips.values():
+                zf.close()
+            self._zips.clear()
+
+
+class Archive:
+    """Read the archive at `root`. `games` maps the ID of every game in it,
+    such as gid_2013_05_01_nynmlb_atlmlb_1, to the directory its files are
+    in. Files are named within the archive by that directory followed by
+    their name in it, and the directory starts with the season, such as
+    year_2013/month_05/day_01/gid_2013_05_01_nynmlb_atlmlb_1."""
+
+    def __init__(self, root):
+        self.root = root
+        self._zips = []
+        # The zip holding each file, by its name within the archive.
+        self._members = {}
+        self.games = {}
+        # The names of each game's files, relative to its directory.
+        self._game_files = {}
+        for path, zf in _open_zips(root):
+            self._zips.append(zf)
+            season = os.path.basename(path)[:len("year_0000")]
+            for member in zf.namelist():
+                self._add(season, zf, member)
+
+    def _add(self, season, zf, member):
+        self._members["%s/%s" % (season, member)] = (zf, member)
+        found = _GAME_MEMBER.match(member)
+        if found is not None:
+            parent, game_id, name = found.groups()
+            self.games[game_id] = "%s/%s%s" % (season, parent or "", game_id)
+            self._game_files.setdefault(game_id, set()).add(name)
+
+    def __contains__(self, name):
+        return name in self._members
+
+    def close(self):
+        for zf in self._zips:
+            zf.close()
+
+    def read(self, name):
+        """Return the contents of the file `name` within the archive."""
+        zf, member = self._members[name]
+        return zf.read(member)
+
+    def game_file(self, game_id, name):
+        """Return the name within the archive of the file `name` of the
+        game `game_id`, such as "inning/inning_all.xml"."""
+        return "%s/%s" % (self.games[game_id], name)
+
+    def read_game(self, game_id, name):
+        """Return the contents of the file `name` of the game `game_id`."""
+        return self.read(self.game_file(game_id, name))
+
+    def player_files(self, game_id):
+        """Return the sorted names within the archive of the per-player
+        files of the game `game_id`."""
+        return [self.game_file(game_id, name)
+                for name in sorted(self._game_files[game_id])
+                if utils.PLAYER_FILE.match(name)]
+
+    def has_game_files(self, game_id):
+        """Return True if the game `game_id` has all of the GAME_FILES."""
+        files = self._game_files[game_id]
+        return all(name in files for name in utils.GAME_FILES)
+
+    def player_file_key(self, name):
+        """Return the (player ID, SHA-1) pair of the player file `name`, as
+        `parser.player_file_key` does for files on disk."""
+        return parser.player_file_key(name, self.read(name))
+
+
+# Each process parsing games keeps the archives it has read open.
+_open = lru_cache(maxsize=4)(Archive)
+
+
+def parse_game(key, cache=None):
+    """Parse a game from an archive, as `parser.parse_paths` does from
+    files. `key` is the archive's root, the game ID and the names of the
+    player files to parse with it. With `cache`, the root of a
+    gd.gamecache, the game is loaded through that."""
+    root, game_id, player_files = key
+    archive = _open(root)
+    parsed = gamecache.parse_game(
+        [archive.read_game(game_id, name) for name in utils.GAME_FILES],
+        cache)
+    parsed["player_files"] = [
+        parser.parse_player_content(archive.read(name),
+                                    parsed["game"].game_pk)
+        for name in player_files]
+    return parsed
@@ -0,0 +1,98 @@
+"""
+An on-disk cache of parsed Gameday directory listings, kept in SQLite.
+"""
+from datetime import date, timedelta
+import calendar
+import re
+import sqlite3
+import threading
+import time
+
+DEFAULT_NAME = "gd-listings.sqlite3"
+
+# Listings which might still change are kept for this many seconds.
+DEFAULT_TTL = 300
+
+_DATED = re.compile(r"year_(\d{4})/(?:month_(\d{2})/)?(?:day_(\d{2})/)?")
+
+_SCHEMA = """CREATE TABLE IF NOT EXISTS listing (
+    url TEXT PRIMARY KEY,
+    links TEXT NOT NULL,
+    fetched REAL NOT NULL)"""
+
+
+def last_date(url):
+    """Return the last date a Gameday directory URL covers, or None if it
+    isn't a dated directory.
+
+    A day, or any game inside it, covers just that day, a month covers up to
+    its last day and a year up to December 31."""
+    found = _DATED.search(url)
+    if found is None:
+        return None
+
+    year, month, day = found.groups()
+    year = int(year)
+    if month is None:
+        return date(year, 12, 31)
+    month = int(month)
+    if day is None:
+        return date(year, month, calendar.monthrange(year, month)[1])
+    return date(year, month, int(day))
+
+
+class ListingCache:
+    """Map directory URLs to the links found in their listing.
+
+    Listings fetched once their dates had settled, meaning they ended more
+    than `settle` before, never expire. Everything else, such as today's
+    games or the root listing, is refetched once it is older than `ttl`
+    seconds, even after its date settles."""
+
+    def __init__(self, path=DEFAULT_NAME, ttl=DEFAULT_TTL,
+                 settle=timedelta(days=1)):
+        self.path = path
+        self.ttl = ttl
+        self.settle = settle
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(_SCHEMA)
+
+    def is_settled(self, url, today=None):
+        """Return True if the listing at `url` can no longer change after
+        `today`, which defaults to the current date."""
+        last = last_date(url)
+        if last is None:
+            return False
+        today = date.today() if today is None else today
+        return last + self.settle < today
+
+    def get(self, url):
+        """Return the cached links for `url`, or None if there is no
+        entry or it has expired."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT links, fetched FROM listing WHERE url = ?",
+                (url,)).fetchone()
+        if row is None:
+            return None
+
+        links, fetched = row
+        if (not self.is_settled(url, date.fromtimestamp(fetched)) and
+                time.time() - fetched > self.ttl):
+            return None
+        return links.split("\n") if links else []
+
+    def store(self, url, links):
+        """Store the `links` listed at `url`."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO listing (url, links, fetched) "
+                "VALUES (?, ?, ?)", (url, "\n".join(links), time.time()))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -18,10 +18,21 @@ def _get_engine_uri():
     raise Exception("No database engine available")
 
 
-engine = create_engine(_get_engine_uri(), convert_unicode=True)
-session = scoped_session(sessionmaker(autocommit=False,
-                                      autoflush=False,
-                                      bind=engine))
+_engine = None
+
+
+def get_engine():
+    """Return the engine, creating it the first time it's needed."""
+    global _engine
+    if _engine is None:
+        _engine = create_engine(_get_engine_uri(), convert_unicode=True)
+    return _engine
+
+
+_Session = sessionmaker(autocommit=False, autoflush=False)
+# Sessions are bound when they're first used, so importing this module
+# doesn't need a database configured.
+session = scoped_session(lambda: _Session(bind=get_engine()))
 Base = declarative_base()
 Base.query = session.query_property()
 
@@ -31,4 +42,4 @@ def init():
     # they will be registered properly on the metadata.  Otherwise
     # you will have to import them first before calling init_db()
     import gd.models  # noqa
-    Base.metadata.create_all(bind=engine)
+    Base.metadata.create_all(bind=get_engine())
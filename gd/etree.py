@@ -0,0 +1,59 @@
+"""
+The XML backend used to parse Gameday data.
+
+Both the standard library's ElementTree and lxml are supported through the
+API they share, and they parse Gameday files into the same records. lxml's
+parser is faster, but every attribute read from one of its elements is
+converted on access, and with dozens of attributes on each pitch that costs
+more than it saves (see benchmarks/bench_parser.py). So the standard
+library is used unless lxml is picked with `use` or the GD_XML_BACKEND
+environment variable.
+"""
+from xml.etree import ElementTree as _stdlib
+import os
+
+try:
+    from lxml import etree as _lxml
+except ImportError:
+    _lxml = None
+
+BACKENDS = {"stdlib": _stdlib}
+if _lxml is not None:
+    BACKENDS["lxml"] = _lxml
+
+DEFAULT = "stdlib"
+
+backend = None
+_module = None
+
+
+def use(name=None):
+    """Switch to the backend called `name`, one of the BACKENDS keys.
+    With no name, GD_XML_BACKEND is used if it's set and DEFAULT if not."""
+    global backend, _module
+    if name is None:
+        name = os.getenv("GD_XML_BACKEND", DEFAULT)
+    if name not in BACKENDS:
+        raise Exception("XML backend %s is not available" % name)
+    backend = name
+    _module = BACKENDS[name]
+
+
+def fromstring(text):
+    """Parse an XML document from a string and return its root element."""
+    return _module.fromstring(text)
+
+
+def parse(source):
+    """Parse an XML document from a path or binary file object and return
+    its root element."""
+    return _module.parse(source).getroot()
+
+
+def iterparse(source, events=("end",)):
+    """Incrementally parse an XML document from a path or binary file
+    object, yielding (event, element) pairs."""
+    return _module.iterparse(source, events=events)
+
+
+use()
@@ -0,0 +1,170 @@
+"""
+Export plays from the database into columnar files for analysis.
+
+Each table is written into one file per game date, in a Hive style
+layout such as pitch/season=2013/date=2013-05-01/part.parquet, which
+pyarrow.dataset and most dataframe libraries read as partitions.
+
+Every column gets a fixed NumPy type derived from its model, whatever
+the values in a given partition: integers are int64, or float64 when the
+column is nullable, Numeric columns are float64 with NaN for NULL, and
+dates and times are datetime64 and timedelta64. Arrow files are written
+uncompressed, so `load` memory-maps them and their numeric columns come
+back as NumPy arrays without a copy. The .npz format only needs NumPy.
+"""
+from itertools import groupby
+import os
+
+from sqlalchemy import (Boolean, Date, DateTime, Float, Integer, Numeric,
+                        Time, select, type_coerce)
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import pyarrow
+    from pyarrow import feather, parquet
+except ImportError:
+    pyarrow = None
+
+from gd import utils
+
+logger = utils.get_logger(__name__)
+
+FORMATS = {"npz": ".npz"}
+if pyarrow is not None:
+    FORMATS.update({"parquet": ".parquet", "arrow": ".arrow"})
+
+DEFAULT_FORMAT = "parquet" if pyarrow is not None else "npz"
+
+# Check the more specific types first, since Float is a Numeric.
+_KINDS = ((Boolean, "bool"), (Integer, "int"), (Numeric, "float"),
+          (DateTime, "datetime"), (Date, "date"), (Time, "time"))
+
+
+def _require_numpy():
+    if numpy is None:
+        raise Exception("Exporting requires the numpy package")
+
+
+def column_kinds(table):
+    """Return (name, kind) pairs for the columns of `table`, where kind is
+    how `to_arrays` stores them: "int", "float", "bool", "date",
+    "datetime", "time" or "str"."""
+    kinds = []
+    for column in table.columns:
+        kind = "str"
+        for sql_type, name in _KINDS:
+            if isinstance(column.type, sql_type):
+                kind = name
+                break
+        # NumPy integers have no missing value, so use NaN instead.
+        if kind == "int" and column.nullable:
+            kind = "float"
+        kinds.append((column.name, kind))
+    return kinds
+
+
+def _seconds(value):
+    if value is None:
+        return None
+    return value.hour * 3600 + value.minute * 60 + value.second
+
+
+def _column(values, kind):
+    """Convert a list of Python `values` into an array of `kind`."""
+    if kind == "int":
+        return numpy.array(values, dtype=numpy.int64)
+    if kind == "float":
+        return numpy.array([numpy.nan if v is None else v for v in values],
+                           dtype=numpy.float64)
+    if kind == "bool":
+        return numpy.array([bool(v) for v in values], dtype=bool)
+    if kind == "date":
+        return numpy.array(values, dtype="datetime64[D]")
+    if kind == "datetime":
+        return numpy.array(values, dtype="datetime64[s]")
+    if kind == "time":
+        return numpy.array([_seconds(v) for v in values],
+                           dtype="timedelta64[s]")
+    return numpy.array(["" if v is None else v for v in values], dtype=str)
+
+
+def to_arrays(rows, kinds):
+    """Turn `rows`, sequences of values in the order of the (name, kind)
+    pairs from `column_kinds`, into a dictionary of NumPy arrays."""
+    _require_numpy()
+    columns = list(zip(*rows)) or [()] * len(kinds)
+    return {name: _column(list(values), kind)
+            for (name, kind), values in zip(kinds, columns)}
+
+
+def write(arrays, path, fmt=DEFAULT_FORMAT):
+    """Write the dictionary of `arrays` to `path` in the format `fmt`."""
+    if fmt not in FORMATS:
+        raise ValueError("Unknown export format %s" % fmt)
+    if fmt == "npz":
+        with open(path, "wb") as fh:
+            numpy.savez(fh, **arrays)
+        return
+
+    table = pyarrow.table({name: pyarrow.array(values)
+                           for name, values in arrays.items()})
+    if fmt == "arrow":
+        feather.write_feather(table, path, compression="uncompressed")
+    else:
+        parquet.write_table(table, path)
+
+
+def load(path):
+    """Read a file written by `write` into a dictionary of NumPy arrays.
+    Numeric columns of .arrow files are memory-mapped rather than read."""
+    _require_numpy()
+    if path.endswith(FORMATS["npz"]):
+        with numpy.load(path) as arrays:
+            return dict(arrays)
+
+    if pyarrow is None:
+        raise Exception("Reading %s requires the pyarrow package" % path)
+    if path.endswith(".arrow"):
+        table = feather.read_table(path, memory_map=True)
+    else:
+        table = parquet.read_table(path)
+    return {name: column.to_numpy()
+            for name, column in zip(table.column_names, table.columns)}
+
+
+def partition_path(root, table, day, fmt=DEFAULT_FORMAT):
+    """Return the path to the file holding the `table` rows of the games
+    on `day`, a datetime.date, below `root`."""
+    return os.path.join(root, table.name, "season=%d" % day.year,
+                        "date=%s" % day.isoformat(), "part" + FORMATS[fmt])
+
+
+def export_table(bind, table, games, root, fmt=DEFAULT_FORMAT):
+    """Write every row of `table`, which has a game_pk column referring to
+    the `games` table, into a file per game date below `root`. Rows are
+    streamed from `bind` one date at a time. Return the number of rows
+    written."""
+    _require_numpy()
+    kinds = column_kinds(table)
+    # Read Numeric columns as floats, skipping the Decimal conversion.
+    columns = [type_coerce(column, Float) if kind == "float" else column
+               for column, (name, kind) in zip(table.columns, kinds)]
+    query = (select(columns + [games.c.date])
+             .select_from(table.join(games,
+                                     table.c.game_pk == games.c.game_pk))
+             .order_by(games.c.date))
+    result = bind.execution_options(stream_results=True).execute(query)
+
+    count = 0
+    for day, rows in groupby(result, key=lambda row: row[-1]):
+        rows = [row[:-1] for row in rows]
+        path = partition_path(root, table, day, fmt)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        write(to_arrays(rows, kinds), path, fmt)
+        count += len(rows)
+    logger.info("Exported %d %s rows", count, table.name)
+    return count
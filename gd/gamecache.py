@@ -0,0 +1,124 @@
+"""
+A cache of the games parsed by `parser.parse_game`, so that importing them
+again, such as after a schema change, skips parsing the XML.
+
+Each game is stored in a file named by a hash of the contents of its
+game.xml, inning_all.xml and players.xml, so a game is parsed again when
+any of them changes. The hash also covers the fields of the records in
+gd.records, and CACHE_VERSION, which has to be bumped whenever the parser
+or a record's converters change the values a game parses into. Either
+way, games cached before the change aren't loaded. Files hold the records
+as plain tuples, pickled and compressed with zlib, which load several
+times faster than the XML parses.
+
+Player files aren't cached, since they're small and parsed separately.
+"""
+import hashlib
+import io
+import os
+import pickle
+import zlib
+
+from gd import etree
+from gd import parser
+from gd import records
+from gd import utils
+
+DEFAULT_ROOT = "gd-parsed"
+
+SUFFIX = ".pickle.z"
+
+# The records of parse_game's output, either in lists or on their own.
+_LISTS = {"teams": records.Team, "players": records.Player,
+          "atbats": records.AtBat, "pitches": records.Pitch,
+          "actions": records.Action}
+_SINGLE = {"umpire": records.Umpire, "stadium": records.Stadium,
+           "game": records.Game}
+
+# Bump this with any change to gd.parser or gd.records which changes the
+# values parse_game returns, such as a field's converter or which plays
+# are kept, so that games cached before are parsed again.
+CACHE_VERSION = 1
+
+_FIELDS = hashlib.sha1(repr(sorted(
+    (name, record.__name__, record._fields)
+    for name, record in list(_LISTS.items()) + list(_SINGLE.items())
+)).encode()).digest()
+
+
+def game_key(contents):
+    """Return the key a game is cached by, from the `contents` of its
+    game.xml, inning_all.xml and players.xml."""
+    digest = hashlib.sha1(b"%d:%s" % (CACHE_VERSION, _FIELDS))
+    for content in contents:
+        digest.update(hashlib.sha1(content).digest())
+    return digest.hexdigest()
+
+
+def cache_path(root, key):
+    """Return the path that the game `key` is cached at below `root`."""
+    return os.path.join(root, key[:2], key + SUFFIX)
+
+
+def dumps(parsed):
+    """Return the records in `parsed`, from `parser.parse_game`, as bytes."""
+    data = {name: [tuple(row) for row in parsed[name]] for name in _LISTS}
+    data.update((name, tuple(parsed[name])) for name in _SINGLE)
+    return zlib.compress(pickle.dumps(data, pickle.HIGHEST_PROTOCOL), 1)
+
+
+def loads(data):
+    """Return the output of `parser.parse_game` stored by `dumps`."""
+    data = pickle.loads(zlib.decompress(data))
+    parsed = {name: list(map(record._make, data[name]))
+              for name, record in _LISTS.items()}
+    parsed.update((name, record._make(data[name]))
+                  for name, record in _SINGLE.items())
+    return parsed
+
+
+def get(root, key):
+    """Return the game `key` cached below `root`, or None if it isn't."""
+    try:
+        with open(cache_path(root, key), "rb") as fh:
+            return loads(fh.read())
+    except FileNotFoundError:
+        return None
+
+
+def put(root, key, parsed):
+    """Cache the game `parsed` as `key` below `root`."""
+    path = cache_path(root, key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    utils.write_file(path, [dumps(parsed)])
+
+
+def parse_game(contents, root=DEFAULT_ROOT):
+    """Return what `parser.parse_game` does for the game with the `contents`
+    of its game.xml, inning_all.xml and players.xml, loading it from the
+    cache at `root` if it's there and caching it if not. With a `root` of
+    None, the game is parsed without the cache."""
+    key = None
+    if root is not None:
+        key = game_key(contents)
+        parsed = get(root, key)
+        if parsed is not None:
+            return parsed
+
+    game, inning, players = contents
+    parsed = parser.parse_game(etree.fromstring(game), io.BytesIO(inning),
+                               etree.fromstring(players))
+    if key is not None:
+        put(root, key, parsed)
+    return parsed
+
+
+def parse_paths(paths, root=DEFAULT_ROOT):
+    """Read and parse a game's files like `parser.parse_paths`, loading the
+    game itself through the cache at `root`."""
+    parsed = parse_game([utils.read_gameday(path) for path in paths[:3]],
+                        root)
+    parsed["player_files"] = [
+        parser.parse_player_file(path, parsed["game"].game_pk)
+        for path in paths[3:]]
+    return parsed
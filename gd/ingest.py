@@ -0,0 +1,96 @@
+"""
+Load games from Gameday straight into the database, without going through
+the filesystem.
+
+Fetching, parsing and loading run as separate stages connected by bounded
+queues, so while one game is written the next is being parsed and the ones
+after it are downloading.
+"""
+from functools import partial
+from queue import Queue
+import io
+import threading
+
+from gd import etree
+from gd import parser
+from gd import scrape
+from gd import utils
+
+logger = utils.get_logger(__name__)
+
+# How many games may wait between two stages.
+QUEUE_SIZE = 16
+
+_DONE = object()
+
+
+class _Failure:
+    """Carries an exception raised in a stage through its output queue."""
+
+    def __init__(self, exc):
+        self.exc = exc
+
+
+def _stage(results, output):
+    """Put everything in the `results` iterator into `output`, skipping
+    None. Always finish with _DONE so the next stage stops."""
+    try:
+        for result in results:
+            if result is not None:
+                output.put(result)
+    except Exception as exc:
+        output.put(_Failure(exc))
+    finally:
+        output.put(_DONE)
+
+
+def _drain(queue):
+    """Yield items from `queue` until its stage is done, re-raising any
+    exception that stage failed with."""
+    while True:
+        item = queue.get()
+        if item is _DONE:
+            return
+        if isinstance(item, _Failure):
+            raise item.exc
+        yield item
+
+
+def _start(results, output):
+    """Consume `results` on a new thread, feeding them into `output`."""
+    thread = threading.Thread(target=_stage, args=(results, output),
+                              daemon=True)
+    thread.start()
+    return thread
+
+
+def parse_files(files):
+    """Parse the utils.GAME_FILES contents returned by
+    `scrape.fetch_game`."""
+    game, inning, players = (files[name] for name in utils.GAME_FILES)
+    return parser.parse_game(etree.fromstring(game), io.BytesIO(inning),
+                             etree.fromstring(players))
+
+
+def ingest(games, load, workers=1, save=False, compression=None,
+           queue_size=QUEUE_SIZE):
+    """Fetch, parse and `load` every game directory URL in `games`.
+
+    Up to `workers` games are fetched at once. Parsing happens on its own
+    thread, while `load` is called from this one with each parsed game and
+    should return True if it was loaded. With `save`, the fetched files are
+    also written to disk as `scrape.download` would. Return the count of
+    games loaded."""
+    fetch = partial(scrape.fetch_game, save=save, compression=compression)
+    fetched = Queue(queue_size)
+    parsed = Queue(queue_size)
+
+    _start(utils.map_concurrently(fetch, games, workers), fetched)
+    _start(map(parse_files, _drain(fetched)), parsed)
+
+    loaded = 0
+    for game in _drain(parsed):
+        if load(game):
+            loaded += 1
+    logger.info("Ingested %d games", loaded)
+    return loaded
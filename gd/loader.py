@@ -0,0 +1,188 @@
+"""
+Load parsed games into the database.
+
+The IDs already stored are read once per run by `load_known_ids` and
+kept up to date as games are loaded, so each game only adds what's new.
+"""
+import os
+
+from gd import etree
+from gd import parser
+from gd import utils
+from gd.models import (Action, AtBat, BatterStats, Game, Player, Pitch,
+                       PitcherStats, Stadium, Team, Umpire)
+from gd.records import BatterStats as BatterRecord
+from gd.records import PitcherStats as PitcherRecord
+
+# Spring training and exhibition games, which aren't loaded.
+SKIPPED_TYPES = ("S", "E")
+
+
+def load_known_ids(session):
+    """Return the set of IDs already stored for each dimension model and
+    Game, and the (player ID, SHA-1) pairs of the player files already
+    loaded under "player_files". This is loaded once per run and kept up
+    to date as games are loaded."""
+    known = {model: {int(pk) for pk, in session.query(model.id)}
+             for model in (Team, Player, Umpire, Stadium)}
+    known[Game] = {int(pk) for pk, in session.query(Game.game_pk)}
+    known["player_files"] = {
+        (int(pk), sha1) for model in (BatterStats, PitcherStats)
+        for pk, sha1 in session.query(model.player_id, model.sha1).distinct()}
+    return known
+
+
+def add_new(session, model, rows, known):
+    """Bulk insert the `model` records whose ID isn't in the `known` set,
+    adding their IDs to it."""
+    new = []
+    for row in rows:
+        if row.id not in known:
+            known.add(row.id)
+            new.append(row._asdict())
+    if new:
+        session.bulk_insert_mappings(model, new)
+
+
+def add_teams(session, teams, known):
+    add_new(session, Team, teams, known[Team])
+
+
+def add_players(session, players, known):
+    add_new(session, Player, players, known[Player])
+
+
+def add_umpire(session, umpire, known):
+    add_new(session, Umpire, [umpire], known[Umpire])
+
+
+def add_stadium(session, stadium, known):
+    add_new(session, Stadium, [stadium], known[Stadium])
+
+
+def add_player_files(session, player_files, known):
+    """Update players with the details in their `parser.parse_player`
+    files and bulk insert their stats, skipping files whose contents were
+    already loaded and players which aren't stored."""
+    details = []
+    stats = {BatterRecord: [], PitcherRecord: []}
+    for player_file in player_files:
+        pk = player_file["details"].id
+        key = (pk, player_file["sha1"])
+        if key in known["player_files"] or pk not in known[Player]:
+            continue
+        known["player_files"].add(key)
+        details.append(player_file["details"]._asdict())
+        for row in player_file["stats"]:
+            stats[type(row)].append(row._asdict())
+
+    if details:
+        session.bulk_update_mappings(Player, details)
+    for model, record in ((BatterStats, BatterRecord),
+                          (PitcherStats, PitcherRecord)):
+        if stats[record]:
+            session.bulk_insert_mappings(model, stats[record])
+
+
+def _is_skipped(game, known):
+    return (game.attrib.get("type") in SKIPPED_TYPES or
+            int(game.attrib["game_pk"]) in known[Game])
+
+
+def is_skipped(known, path):
+    """Return True if the game whose game.xml is at `path` won't be loaded,
+    being one of the games in `known` from `load_known_ids` or of one of
+    the SKIPPED_TYPES."""
+    return _is_skipped(parser.read(path), known)
+
+
+def new_files(games, known):
+    """Yield the paths from `utils.find_games` of the games which aren't
+    loaded yet, going by the game_pk and type in their game.xml, so that
+    they aren't parsed again and games which are never loaded aren't
+    parsed at all.
+
+    The paths to the per-player files in each game's directory are added
+    to its paths, leaving out those whose contents were already loaded."""
+    loaded = known["player_files"]
+    for paths in games:
+        if is_skipped(known, paths[0]):
+            continue
+        player_files = utils.find_player_files(os.path.dirname(paths[0]))
+        yield paths + tuple(path for path in player_files
+                            if parser.player_file_key(path) not in loaded)
+
+
+def new_archived(archive, known):
+    """Yield the keys `archive.parse_game` takes for the games in the
+    gd.archive.Archive `archive` which aren't loaded yet, as `new_files`
+    does for the games in a directory."""
+    loaded = known["player_files"]
+    for game_id in sorted(archive.games):
+        if not archive.has_game_files(game_id):
+            continue
+        game = etree.fromstring(archive.read_game(game_id, "game.xml"))
+        if _is_skipped(game, known):
+            continue
+        yield (archive.root, game_id,
+               tuple(name for name in archive.player_files(game_id)
+                     if archive.player_file_key(name) not in loaded))
+
+
+def add_rows(session, model, rows, bulk=False):
+    """Add `model` rows, as dictionaries, to `session`. With `bulk` they're
+    inserted with executemany rather than built into ORM objects."""
+    if bulk:
+        session.bulk_insert_mappings(model, rows)
+    else:
+        session.add_all([model(**row) for row in rows])
+
+
+def link_pitches(session, game_pk, pitches):
+    """Fill in the atbat_id of each of the game's `pitches`, dictionaries
+    with the num of their at-bat, once its at-bats have been flushed."""
+    ids = dict(session.query(AtBat.num, AtBat.atbat_id)
+               .filter(AtBat.game_pk == game_pk))
+    for pitch in pitches:
+        pitch["atbat_id"] = ids.get(pitch["atbat_num"])
+
+
+def add_game(session, game, known):
+    known[Game].add(game.game_pk)
+    session.add(Game(**game._asdict()))
+
+
+def load_game(session, parsed, known, bulk=False):
+    """Add a game from `parser.parse_game` and everything in it to
+    `session`. Return False if the game was skipped, which includes games
+    already loaded. `known` holds the IDs from `load_known_ids`.
+
+    With `bulk`, the game's actions, at-bats and pitches are inserted with
+    executemany rather than built into ORM objects."""
+    # Skip spring training and exhibition games since they won't have
+    # any data, and I've also seen players in these games with non-unique
+    # player IDs. Just forget that...
+    if parsed["game"].type in SKIPPED_TYPES:
+        return False
+    if parsed["game"].game_pk in known[Game]:
+        return False
+
+    add_teams(session, parsed["teams"], known)
+    add_players(session, parsed["players"], known)
+    add_umpire(session, parsed["umpire"], known)
+    add_stadium(session, parsed["stadium"], known)
+    add_game(session, parsed["game"], known)
+    # Write the game now, so the next game in the same transaction finds
+    # it, and before bulk inserts that refer to it.
+    session.flush()
+
+    rows = {kind: [row._asdict() for row in parsed[kind]]
+            for kind in ("actions", "atbats", "pitches")}
+    add_rows(session, Action, rows["actions"], bulk)
+    add_rows(session, AtBat, rows["atbats"], bulk)
+    # The at-bats need their IDs before pitches can refer to them.
+    session.flush()
+    link_pitches(session, parsed["game"].game_pk, rows["pitches"])
+    add_rows(session, Pitch, rows["pitches"], bulk)
+    add_player_files(session, parsed.get("player_files", ()), known)
+    return True
@@ -0,0 +1,75 @@
+"""
+A record of the files fetched by the scraper, kept in a SQLite database next
+to the download root so that re-runs can skip or revalidate them.
+"""
+from collections import namedtuple
+import os
+import sqlite3
+import threading
+
+DEFAULT_NAME = "gd-manifest.sqlite3"
+
+Entry = namedtuple("Entry", "url path size etag last_modified sha1")
+
+_SCHEMA = """CREATE TABLE IF NOT EXISTS fetch (
+    url TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    sha1 TEXT NOT NULL,
+    fetched TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"""
+
+
+class Manifest:
+    """Map URLs to the local file they were downloaded into.
+
+    A single connection is shared between threads, guarded by a lock.
+    Every record is committed immediately so an interrupted run can pick up
+    where it stopped."""
+
+    def __init__(self, path=DEFAULT_NAME):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(_SCHEMA)
+
+    def get(self, url):
+        """Return the Entry for `url`, or None if it was never fetched."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, path, size, etag, last_modified, sha1 "
+                "FROM fetch WHERE url = ?", (url,)).fetchone()
+        return None if row is None else Entry(*row)
+
+    def record(self, url, path, size, etag, last_modified, sha1):
+        """Store or replace the entry for `url`."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO fetch "
+                "(url, path, size, etag, last_modified, sha1) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (url, path, size, etag, last_modified, sha1))
+
+    def is_intact(self, entry):
+        """Return True if the file `entry` refers to is still on disk
+        with the size it was written with."""
+        try:
+            return os.path.getsize(entry.path) == entry.size
+        except OSError:
+            return False
+
+    def complete(self, urls):
+        """Return True if every one of `urls` has an intact local copy."""
+        for url in urls:
+            entry = self.get(url)
+            if entry is None or not self.is_intact(entry):
+                return False
+        return True
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
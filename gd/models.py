@@ -1,6 +1,6 @@
 from sqlalchemy.orm import relationship, backref
-from sqlalchemy import (Column, Date, DateTime, Time, ForeignKey, Integer,
-                        String, Numeric, Boolean)
+from sqlalchemy import (Column, Date, DateTime, Time, ForeignKey, Index,
+                        Integer, String, Numeric, Boolean, UniqueConstraint)
 
 from gd.database import Base
 
@@ -33,16 +33,18 @@ class Player(Base):
     num = Column(Integer, nullable=False)
     boxname = Column(String, nullable=False)
     rl = Column(String, nullable=False)
-    bats = Column(String, nullable=False)
+    # Not every season's players.xml has this.
+    bats = Column(String)
     position = Column(String, nullable=False)
     status = Column(String, nullable=False)
     team_id = Column(Integer, ForeignKey("team.id"), nullable=False)
 
-    # The following is available in the /batters/ dir. Could be merged here.
-    # height  = Column(String, nullable=False)
-    # weight = Column(Integer, nullable=False)
-    # throws = Column(String, nullable=False)
-    # dob = Column(String, nullable=False)
+    # These come from the player's file in a game's batters/ or pitchers/
+    # directory, so they're empty until one of those has been loaded.
+    height = Column(String)
+    weight = Column(Integer)
+    throws = Column(String)
+    dob = Column(Date)
 
     def __repr__(self):
         return "<Player id=%s, name=%s %s>" % (self.id, self.first, self.last)
@@ -78,7 +80,7 @@ class Game(Base):
 
     game_pk = Column(Integer, nullable=False, primary_key=True)
     type = Column(String, nullable=False)
-    date = Column(Date, nullable=False)
+    date = Column(Date, nullable=False, index=True)
     local_game_time = Column(Time, nullable=False)
     game_time_et = Column(String, nullable=False)
     gameday_sw = Column(String, nullable=False)
@@ -100,6 +102,10 @@ class Game(Base):
 
 class AtBat(Base):
     __tablename__ = "atbat"
+    # An at-bat's num is unique within its game. The index this creates
+    # also covers queries by game_pk alone.
+    __table_args__ = (UniqueConstraint("game_pk", "num",
+                                       name="uq_atbat_game_pk_num"),)
 
     atbat_id = Column(Integer, autoincrement=True, primary_key=True)
     num = Column(Integer, nullable=False)
@@ -108,10 +114,12 @@ class AtBat(Base):
     o = Column(Integer, nullable=False)
     start_tfs = Column(Time, nullable=False)
     start_tfs_zulu = Column(DateTime, nullable=False)
-    batter = Column(Integer, ForeignKey("player.id"), nullable=False)
+    batter = Column(Integer, ForeignKey("player.id"), nullable=False,
+                    index=True)
     stand = Column(String, nullable=False)
     b_height = Column(String, nullable=False)
-    pitcher = Column(Integer, ForeignKey("player.id"), nullable=False)
+    pitcher = Column(Integer, ForeignKey("player.id"), nullable=False,
+                     index=True)
     p_throws = Column(String, nullable=False)
     des = Column(String, nullable=False)
     des_es = Column(String, nullable=False)
@@ -134,6 +142,9 @@ class AtBat(Base):
 
 class Pitch(Base):
     __tablename__ = "pitch"
+    # As for at-bats, this also serves queries by game_pk.
+    __table_args__ = (UniqueConstraint("game_pk", "id",
+                                       name="uq_pitch_game_pk_id"),)
 
     pitch_id = Column(Integer, autoincrement=True, primary_key=True)
     des = Column(String, nullable=False)
@@ -179,9 +190,11 @@ class Pitch(Base):
     mt = Column(String)
 
     # Added
-    start_tfs_zulu = Column(DateTime, ForeignKey("atbat.start_tfs_zulu"),
-                            nullable=False)
+    start_tfs_zulu = Column(DateTime, nullable=False)
     game_pk = Column(Integer, ForeignKey("game.game_pk"), nullable=False)
+    # The at-bat's num within the game, which its atbat_id is looked up by.
+    atbat_num = Column(Integer)
+    atbat_id = Column(Integer, ForeignKey("atbat.atbat_id"), index=True)
 
     def __repr__(self):
         return "<Pitch id=%s at %s>" % (self.id, self.tfs_zulu)
@@ -191,7 +204,8 @@ class Action(Base):
     __tablename__ = "action"
 
     id = Column(Integer, autoincrement=True, primary_key=True)
-    game_pk = Column(Integer, ForeignKey("game.game_pk"), nullable=False)
+    game_pk = Column(Integer, ForeignKey("game.game_pk"), nullable=False,
+                     index=True)
     b = Column(Integer, nullable=False)
     s = Column(Integer, nullable=False)
     o = Column(Integer, nullable=False)
@@ -227,3 +241,66 @@ class Replay(Base):
 
     def __repr__(self):
         return "<Replay id=%s result=%s>" % (self.id, self.result)
+
+
+class BatterStats(Base):
+    """A batter's line for one split, such as "season" or "vs_lhp", as of
+    the game their batters/ file was loaded from."""
+    __tablename__ = "batter_stats"
+    __table_args__ = (Index("ix_batter_stats_player_id_sha1", "player_id",
+                            "sha1"),)
+
+    id = Column(Integer, autoincrement=True, primary_key=True)
+    player_id = Column(Integer, ForeignKey("player.id"), nullable=False)
+    game_pk = Column(Integer, ForeignKey("game.game_pk"), nullable=False)
+    # The SHA-1 of the file, so unchanged copies aren't loaded again.
+    sha1 = Column(String, nullable=False)
+    split = Column(String, nullable=False)
+    des = Column(String)
+    avg = Column(Numeric)
+    ab = Column(Integer)
+    h = Column(Integer)
+    bb = Column(Integer)
+    so = Column(Integer)
+    r = Column(Integer)
+    sb = Column(Integer)
+    cs = Column(Integer)
+    hr = Column(Integer)
+    rbi = Column(Integer)
+    ops = Column(Numeric)
+
+    def __repr__(self):
+        return "<BatterStats player_id=%s split=%s>" % (self.player_id,
+                                                        self.split)
+
+
+class PitcherStats(Base):
+    """A pitcher's line for one split, as of the game their pitchers/ file
+    was loaded from."""
+    __tablename__ = "pitcher_stats"
+    __table_args__ = (Index("ix_pitcher_stats_player_id_sha1", "player_id",
+                            "sha1"),)
+
+    id = Column(Integer, autoincrement=True, primary_key=True)
+    player_id = Column(Integer, ForeignKey("player.id"), nullable=False)
+    game_pk = Column(Integer, ForeignKey("game.game_pk"), nullable=False)
+    sha1 = Column(String, nullable=False)
+    split = Column(String, nullable=False)
+    des = Column(String)
+    avg = Column(Numeric)
+    ab = Column(Integer)
+    h = Column(Integer)
+    rbi = Column(Integer)
+    hr = Column(Integer)
+    bb = Column(Integer)
+    so = Column(Integer)
+    w = Column(Integer)
+    l = Column(Integer)  # noqa: E741
+    sv = Column(Integer)
+    ip = Column(Numeric)
+    whip = Column(Numeric)
+    era = Column(Numeric)
+
+    def __repr__(self):
+        return "<PitcherStats player_id=%s split=%s>" % (self.player_id,
+                                                         self.split)
@@ -1,7 +1,12 @@
 """
 Parser for MLB's Gameday XML data
 """
-from gd.utils import create_date, create_datetime, create_time
+import hashlib
+
+from gd import etree
+from gd import records
+from gd.utils import (create_date, create_time, open_gameday, player_id,
+                      read_gameday)
 
 
 def _strip_keys(obj, valid):
@@ -15,6 +20,13 @@ def _get_all_attributes(tree, element, valid):
     yield from [_strip_keys(x.attrib, valid) for x in tree.findall(element)]
 
 
+def read(path):
+    """Parse the Gameday file at `path`, which may be gzip or zstd
+    compressed, and return its root element."""
+    with open_gameday(path) as fh:
+        return etree.parse(fh)
+
+
 def get_date(tree):
     """Parse players.xml file and return the date these players are playing."""
     return create_date(tree.attrib["date"])
@@ -42,19 +54,15 @@ def get_game(tree):
     valid_keys = ("game_pk", "type", "local_game_time", "game_time_et",
                   "gameday_sw", "home_team", "away_team", "stadium",
                   "plate_umpire")
-    tree.attrib["local_game_time"] = create_time(
-        tree.attrib["local_game_time"])
-    return {k: v for k, v in tree.attrib.items() if k in valid_keys}
+    game = {k: v for k, v in tree.attrib.items() if k in valid_keys}
+    game["local_game_time"] = create_time(game["local_game_time"])
+    return game
 
 
 def get_actions(tree):
-    valid_keys = ("id", "game_pk", "b", "s", "o", "pitch", "player", "event",
-                  "event2", "des_es", "des", "tfs", "tfs_zulu")
-
+    """Parse inning_all.xml data to find the actions."""
     for action in tree.findall(".//action"):
-        action.attrib["tfs"] = create_time(action.attrib["tfs"])
-        action.attrib["tfs_zulu"] = create_datetime(action.attrib["tfs_zulu"])
-        yield {k: v for k, v in action.attrib.items() if k in valid_keys}
+        yield records.to_action(action.attrib)
 
 
 def get_teams(tree):
@@ -77,30 +85,147 @@ def get_stadium(tree):
 
 def get_atbats(tree):
     """Parse inning_all.xml data to find the atbats."""
-    valid_keys = ("num", "b", "s", "o", "start_tfs", "start_tfs_zulu",
-                  "batter", "stand", "b_height", "pitcher", "p_throws",
-                  "des", "des_es", "event", "score", "home_team_runs",
-                  "away_team_runs")
-    for atbat in _get_all_attributes(tree, ".//atbat", valid_keys):
-        atbat["start_tfs"] = create_time(atbat["start_tfs"])
-        atbat["start_tfs_zulu"] = create_datetime(
-            atbat["start_tfs_zulu"])
-        if "score" in atbat:
-            atbat["score"] = True if atbat["score"] == "T" else False
-        else:
-            atbat["score"] = False
-
-        yield atbat
+    for atbat in tree.findall(".//atbat"):
+        yield records.to_atbat(atbat.attrib)
 
 
 def get_pitches(tree):
     """Parse inning_all.xml data to find the pitches."""
     for atbat in tree.findall(".//atbat"):
         for pitch in atbat.findall(".//pitch"):
-            pitch.attrib["tfs"] = create_time(pitch.attrib["tfs"])
-            pitch.attrib["tfs_zulu"] = create_datetime(
-                pitch.attrib["tfs_zulu"])
+            yield records.to_pitch(
+                pitch.attrib, start_tfs_zulu=atbat.attrib["start_tfs_zulu"],
+                atbat_num=atbat.attrib["num"])
+
+
+def iter_plays(source, game_pk=None):
+    """Parse inning_all.xml from `source`, a path or binary file object, in
+    a single streaming pass. Yield ("atbat", atbat), ("pitch", pitch) and
+    ("action", action) records in document order, where each pitch comes
+    before the at-bat it belongs to. Every record is tied to `game_pk`.
+
+    Elements are cleared as soon as they've been read, so memory use stays
+    flat however large the file is."""
+    root = None
+    atbat = None
+    for event, element in etree.iterparse(source, ("start", "end")):
+        tag = element.tag
+        if event == "start":
+            if root is None:
+                root = element
+            elif tag == "atbat":
+                atbat = element.attrib
+        elif tag == "pitch":
             # Tie pitches back to the atbat they came from.
-            pitch.attrib["start_tfs_zulu"] = create_datetime(
-                atbat.attrib["start_tfs_zulu"])
-            yield pitch.attrib
+            yield "pitch", records.to_pitch(
+                element.attrib, game_pk=game_pk,
+                start_tfs_zulu=atbat["start_tfs_zulu"],
+                atbat_num=atbat["num"])
+        elif tag == "atbat":
+            yield "atbat", records.to_atbat(element.attrib, game_pk=game_pk)
+            element.clear()
+        elif tag == "action":
+            yield "action", records.to_action(element.attrib,
+                                              game_pk=game_pk)
+            element.clear()
+        elif tag == "inning":
+            root.clear()
+
+
+def get_plays(source, game_pk=None):
+    """Parse inning_all.xml from `source` with `iter_plays`.
+    Return lists of the atbats, pitches and actions."""
+    plays = {"atbat": [], "pitch": [], "action": []}
+    for kind, play in iter_plays(source, game_pk):
+        plays[kind].append(play)
+    return plays["atbat"], plays["pitch"], plays["action"]
+
+
+def parse_game(game_tree, inning_source, player_tree):
+    """Parse the game.xml and players.xml trees of a game, along with its
+    inning_all.xml from `inning_source`, a path or binary file object.
+    Return a dictionary of everything in the game as gd.records types, with
+    the game's plays tied back to it.
+
+    Games parsed by this are cached by gd.gamecache, so changes to what it
+    returns need gamecache.CACHE_VERSION bumped."""
+    teams = list(get_teams(game_tree))
+    plate_umpire = get_plate_umpire(player_tree)
+    stadium = get_stadium(game_tree)
+    game = get_game(game_tree)
+
+    # This home/away determination is risky depending on ordering,
+    # but every game I've looked at has worked this way.
+    game["date"] = get_date(player_tree)
+    game["home_team"] = teams[0]["id"]
+    game["away_team"] = teams[1]["id"]
+    game["stadium"] = stadium["id"]
+    game["umpire_id"] = plate_umpire["id"]
+    game = records.to_game(game)
+
+    atbats, pitches, actions = get_plays(inning_source, game.game_pk)
+    # HBPs don't seem to have anything in them, so skip 'em
+    pitches = [p for p in pitches if p.des != "Hit By Pitch"]
+
+    return {"teams": list(map(records.to_team, teams)),
+            "players": list(map(records.to_player, get_players(player_tree))),
+            "umpire": records.to_umpire(plate_umpire),
+            "stadium": records.to_stadium(stadium),
+            "game": game,
+            "atbats": atbats,
+            "pitches": pitches,
+            "actions": actions}
+
+
+def parse_player(tree, game_pk=None, sha1=None):
+    """Parse the root element `tree` of a player's file from a game's
+    batters/ or pitchers/ directory. Return a dictionary with the player's
+    details and their BatterStats or PitcherStats records, one for each
+    split such as <season> or <vs_LHP>, tagged with `game_pk` and the
+    file's `sha1`."""
+    attrib = tree.attrib
+    if attrib.get("type") == "pitcher":
+        to_stats = records.to_pitcher_stats
+    else:
+        to_stats = records.to_batter_stats
+    # Splits are the children with stats, unlike <Pitch> or <atbats>.
+    stats = [to_stats(child.attrib, player_id=attrib["id"], game_pk=game_pk,
+                      sha1=sha1, split=child.tag.lower())
+             for child in tree if "avg" in child.attrib]
+    return {"details": records.to_player_details(attrib),
+            "sha1": sha1,
+            "stats": stats}
+
+
+def player_file_key(path, content=None):
+    """Return the (player ID, SHA-1) pair identifying the contents of the
+    player's file at `path`, which `parse_player` files are loaded by.
+    `content` is the file's contents, if they've been read already."""
+    if content is None:
+        content = read_gameday(path)
+    return player_id(path), hashlib.sha1(content).hexdigest()
+
+
+def parse_player_content(content, game_pk=None):
+    """Parse the `content` of a player's file with `parse_player`."""
+    return parse_player(etree.fromstring(content), game_pk,
+                        hashlib.sha1(content).hexdigest())
+
+
+def parse_player_file(path, game_pk=None):
+    """Read and parse the player's file at `path` with `parse_player`."""
+    return parse_player_content(read_gameday(path), game_pk)
+
+
+def parse_paths(paths):
+    """Read and parse a game's files from the game.xml, inning_all.xml and
+    players.xml `paths` with `parse_game`. Any further paths are player
+    files from the game's batters/ and pitchers/ directories, which are
+    parsed into the "player_files" list."""
+    game_path, inning_path, player_path = paths[:3]
+    with open_gameday(inning_path) as inning:
+        parsed = parse_game(read(game_path), inning, read(player_path))
+    parsed["player_files"] = [
+        parse_player_file(path, parsed["game"].game_pk)
+        for path in paths[3:]]
+    return parsed
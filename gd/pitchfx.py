@@ -0,0 +1,152 @@
+"""
+Derived values from the PITCHf/x nine-parameter fit, for whole arrays of
+pitches at once.
+
+Every pitch's flight is fit as constant acceleration: its position t
+seconds after it passes y0 (50 feet from home plate) is
+
+    x0 + vx0 * t + ax * t**2 / 2
+
+and the same for y and z. x points towards the catcher's right, y from
+home plate towards the mound and z up, all in feet.
+
+The functions here take `pitches`, a mapping of column names to arrays
+such as the one `gd.export.load` returns, and return NumPy arrays with a
+value per pitch, so a season of pitches takes a few array operations
+rather than a Python loop. Pitches without a fit come out as NaN.
+"""
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Distances from the point of home plate along y, in feet.
+RELEASE_Y = 55.0
+# The front of home plate, where the fit's px and pz are measured.
+PLATE_Y = 17 / 12
+# PITCHf/x movement is measured over the last 40 feet of flight.
+MOVEMENT_Y = 40.0
+
+GRAVITY = -32.174
+# Half the width of home plate, and the radius of a ball, in feet.
+PLATE_HALF_WIDTH = 17 / 24
+BALL_RADIUS = 1.45 / 12
+
+FEET_PER_SECOND_TO_MPH = 3600 / 5280
+
+_FIT = ("x0", "y0", "z0", "vx0", "vy0", "vz0", "ax", "ay", "az")
+
+
+def _require_numpy():
+    if numpy is None:
+        raise Exception("PITCHf/x calculations require the numpy package")
+
+
+def fit(pitches):
+    """Return the nine fit parameters of `pitches` as float64 arrays, in
+    the order x0, y0, z0, vx0, vy0, vz0, ax, ay, az."""
+    _require_numpy()
+    return [numpy.asarray(pitches[name], dtype=numpy.float64)
+            for name in _FIT]
+
+
+def time_at(pitches, y):
+    """Return the time at which each pitch reaches `y` feet from home
+    plate, relative to when it passed y0. Times before y0 are negative."""
+    _, y0, _, _, vy0, _, _, ay, _ = fit(pitches)
+    # The root of y0 + vy0 * t + ay * t**2 / 2 = y where the ball is still
+    # heading towards the plate, in the form which also holds when ay is 0.
+    distance = y0 - y
+    with numpy.errstate(invalid="ignore", divide="ignore"):
+        return 2 * distance / (numpy.sqrt(vy0 ** 2 - 2 * ay * distance) -
+                               vy0)
+
+
+def position_at(pitches, t):
+    """Return the x, y and z arrays of each pitch's position at time `t`,
+    which may be an array with a time per pitch."""
+    x0, y0, z0, vx0, vy0, vz0, ax, ay, az = fit(pitches)
+    return (x0 + vx0 * t + ax * t ** 2 / 2,
+            y0 + vy0 * t + ay * t ** 2 / 2,
+            z0 + vz0 * t + az * t ** 2 / 2)
+
+
+def velocity_at(pitches, t):
+    """Return the x, y and z arrays of each pitch's velocity at time `t`,
+    in feet per second."""
+    _, _, _, vx0, vy0, vz0, ax, ay, az = fit(pitches)
+    return vx0 + ax * t, vy0 + ay * t, vz0 + az * t
+
+
+def speed(velocity):
+    """Return the speed in miles per hour of an x, y, z `velocity`."""
+    vx, vy, vz = velocity
+    return numpy.sqrt(vx ** 2 + vy ** 2 + vz ** 2) * FEET_PER_SECOND_TO_MPH
+
+
+def movement(pitches):
+    """Return the horizontal and vertical break of each pitch, in inches,
+    compared to a pitch thrown the same way without spin, over its last
+    40 feet. These match the pfx_x and pfx_z Gameday reports."""
+    _, _, _, _, _, _, ax, _, az = fit(pitches)
+    t = time_at(pitches, PLATE_Y) - time_at(pitches, MOVEMENT_Y)
+    return 6 * ax * t ** 2, 6 * (az - GRAVITY) * t ** 2
+
+
+def approach_angles(pitches, t):
+    """Return the vertical and horizontal angles, in degrees, at which
+    each pitch is travelling at time `t`. Negative vertical angles are
+    descending, and negative horizontal ones head to the catcher's left.
+    """
+    vx, vy, vz = velocity_at(pitches, t)
+    return (numpy.degrees(numpy.arctan(vz / -vy)),
+            numpy.degrees(numpy.arctan(vx / -vy)))
+
+
+def zone_location(pitches, px, pz):
+    """Return each pitch's height at the plate `pz` as a fraction of its
+    batter's strike zone, from 0 at sz_bot to 1 at sz_top, and whether any
+    part of the ball crossed the zone at `px`, `pz`."""
+    _require_numpy()
+    top = numpy.asarray(pitches["sz_top"], dtype=numpy.float64)
+    bottom = numpy.asarray(pitches["sz_bot"], dtype=numpy.float64)
+    with numpy.errstate(invalid="ignore", divide="ignore"):
+        height = (pz - bottom) / (top - bottom)
+        in_zone = ((numpy.abs(px) <= PLATE_HALF_WIDTH + BALL_RADIUS) &
+                   (pz >= bottom - BALL_RADIUS) & (pz <= top + BALL_RADIUS))
+    return height, in_zone
+
+
+def derive(pitches, release_y=RELEASE_Y):
+    """Return a dictionary of everything derived from the fit of each of
+    `pitches`, where they're released `release_y` feet from the plate:
+
+    release_x, release_z: where the ball is released
+    plate_x, plate_z: where it crosses the front of the plate
+    flight_time: seconds from release to the plate
+    release_speed, plate_speed: speed in miles per hour
+    pfx_x, pfx_z: movement in inches, as in `movement`
+    vertical_angle, horizontal_angle: approach angles at the plate
+    zone_height, in_zone: location against the zone, as in
+        `zone_location`
+    """
+    release = time_at(pitches, release_y)
+    plate = time_at(pitches, PLATE_Y)
+    release_x, _, release_z = position_at(pitches, release)
+    plate_x, _, plate_z = position_at(pitches, plate)
+    pfx_x, pfx_z = movement(pitches)
+    vertical, horizontal = approach_angles(pitches, plate)
+    zone_height, in_zone = zone_location(pitches, plate_x, plate_z)
+    return {"release_x": release_x,
+            "release_z": release_z,
+            "plate_x": plate_x,
+            "plate_z": plate_z,
+            "flight_time": plate - release,
+            "release_speed": speed(velocity_at(pitches, release)),
+            "plate_speed": speed(velocity_at(pitches, plate)),
+            "pfx_x": pfx_x,
+            "pfx_z": pfx_z,
+            "vertical_angle": vertical,
+            "horizontal_angle": horizontal,
+            "zone_height": zone_height,
+            "in_zone": in_zone}
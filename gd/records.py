@@ -0,0 +1,165 @@
+"""
+Typed records for the entities parsed out of Gameday data.
+
+Each entity is a namedtuple with the same fields as its model in gd.models,
+and has a converter built once from a table of field types. A converter
+takes an element's attribute dictionary and returns a record with every
+value already an int, float, bool, date or time, so records can be bound
+to the database as they are or used without the ORM at all. Changing
+a converter needs gd.gamecache.CACHE_VERSION bumped, as parsed games are
+cached.
+"""
+from collections import namedtuple
+from datetime import date
+
+from gd.utils import create_datetime, create_time
+
+
+def _int(value):
+    return int(value) if value else None
+
+
+def _float(value):
+    return float(value) if value else None
+
+
+def _flag(value):
+    return value == "T"
+
+
+def _stat(to_type):
+    """Return a converter for a stat which is "-" or "-.--" when it's
+    undefined, such as an ERA without any innings pitched."""
+    def convert(value):
+        try:
+            return to_type(value)
+        except (TypeError, ValueError):
+            return None
+    return convert
+
+
+def _dob(value):
+    """Convert a date of birth like 05/24/1973."""
+    if not value:
+        return None
+    return date(int(value[6:]), int(value[:2]), int(value[3:5]))
+
+
+def converter(record, types, extra=()):
+    """Return a function converting an attribute dictionary into a
+    `record`. `types` maps field names to the function converting their
+    string value, and missing attributes are passed to it as None. Other
+    fields are kept as they are. The fields in `extra` don't come from the
+    attributes but are keyword arguments of the function, such as the game
+    a record belongs to.
+
+    The fields are looked up once here, so converting a record is a single
+    pass over them."""
+    fields = [(name, types.get(name), name in extra)
+              for name in record._fields]
+    extra = frozenset(extra)
+    make = record._make
+
+    def convert(attrib, **kwargs):
+        if not kwargs.keys() <= extra:
+            raise TypeError("unexpected fields %s" %
+                            ", ".join(sorted(kwargs.keys() - extra)))
+        get = attrib.get
+        given = kwargs.get
+        return make([(given if is_extra else get)(name) if to_type is None
+                     else to_type((given if is_extra else get)(name))
+                     for name, to_type, is_extra in fields])
+    return convert
+
+
+Team = namedtuple("Team", "code id name name_full name_brief division_id "
+                          "league_id league")
+to_team = converter(Team, {"id": _int, "division_id": _int,
+                           "league_id": _int})
+
+Player = namedtuple("Player", "id first last num boxname rl bats position "
+                              "status team_id height weight throws dob")
+to_player = converter(Player, {"id": _int, "num": _int, "team_id": _int,
+                               "weight": _int, "dob": _dob})
+
+# The details in a player's own file which players.xml doesn't have.
+PlayerDetails = namedtuple("PlayerDetails", "id height weight throws dob")
+to_player_details = converter(PlayerDetails, {"id": _int, "weight": _int,
+                                              "dob": _dob})
+
+Umpire = namedtuple("Umpire", "id name")
+to_umpire = converter(Umpire, {"id": _int})
+
+Stadium = namedtuple("Stadium", "id name location")
+to_stadium = converter(Stadium, {"id": _int})
+
+# The game's date and local_game_time are converted by the parser, since
+# they come from elements of their own.
+Game = namedtuple("Game", "game_pk type date local_game_time game_time_et "
+                          "gameday_sw home_team away_team stadium umpire_id")
+to_game = converter(Game, {"game_pk": _int, "home_team": _int,
+                           "away_team": _int, "stadium": _int,
+                           "umpire_id": _int})
+
+AtBat = namedtuple("AtBat", "num b s o start_tfs start_tfs_zulu batter "
+                            "stand b_height pitcher p_throws des des_es "
+                            "event score home_team_runs away_team_runs "
+                            "game_pk")
+to_atbat = converter(AtBat, {"num": _int, "b": _int, "s": _int, "o": _int,
+                             "start_tfs": create_time,
+                             "start_tfs_zulu": create_datetime,
+                             "batter": _int, "pitcher": _int,
+                             "score": _flag, "home_team_runs": _int,
+                             "away_team_runs": _int, "game_pk": _int},
+                     extra=("game_pk",))
+
+_PITCH_FLOATS = ("x", "y", "start_speed", "end_speed", "sz_top", "sz_bot",
+                 "pfx_x", "pfx_z", "px", "pz", "x0", "y0", "z0", "vx0",
+                 "vy0", "vz0", "ax", "ay", "az", "break_y", "break_angle",
+                 "break_length", "type_confidence", "spin_dir", "spin_rate")
+
+Pitch = namedtuple("Pitch", ("des", "des_es", "id", "type", "tfs",
+                             "tfs_zulu", "on_1b", "on_2b", "on_3b", "sv_id",
+                             "pitch_type", "zone", "nasty", "cc", "mt",
+                             "start_tfs_zulu", "game_pk", "atbat_num",
+                             "atbat_id") + _PITCH_FLOATS)
+_pitch_types = {name: _float for name in _PITCH_FLOATS}
+_pitch_types.update({"id": _int, "tfs": create_time,
+                     "tfs_zulu": create_datetime,
+                     "on_1b": _int, "on_2b": _int, "on_3b": _int,
+                     "zone": _int, "nasty": _int,
+                     "start_tfs_zulu": create_datetime, "game_pk": _int,
+                     "atbat_num": _int})
+# The atbat_id is only known once the at-bat is stored, so it's left None.
+to_pitch = converter(Pitch, _pitch_types,
+                     extra=("start_tfs_zulu", "game_pk", "atbat_num",
+                            "atbat_id"))
+
+Action = namedtuple("Action", "b s o pitch player event event2 des des_es "
+                              "tfs tfs_zulu game_pk")
+to_action = converter(Action, {"b": _int, "s": _int, "o": _int,
+                               "pitch": _int, "player": _int,
+                               "tfs": create_time,
+                               "tfs_zulu": create_datetime,
+                               "game_pk": _int}, extra=("game_pk",))
+
+_STATS_EXTRA = ("player_id", "game_pk", "sha1", "split")
+
+_BATTER_COUNTS = ("ab", "h", "bb", "so", "r", "sb", "cs", "hr", "rbi")
+BatterStats = namedtuple("BatterStats", _STATS_EXTRA + ("des", "avg") +
+                         _BATTER_COUNTS + ("ops",))
+_batter_types = {name: _stat(int) for name in _BATTER_COUNTS}
+_batter_types.update({"avg": _stat(float), "ops": _stat(float),
+                      "player_id": _int, "game_pk": _int})
+to_batter_stats = converter(BatterStats, _batter_types, extra=_STATS_EXTRA)
+
+_PITCHER_COUNTS = ("ab", "h", "rbi", "hr", "bb", "so", "w", "l", "sv")
+_PITCHER_RATES = ("ip", "whip", "era")
+PitcherStats = namedtuple("PitcherStats", _STATS_EXTRA + ("des", "avg") +
+                          _PITCHER_COUNTS + _PITCHER_RATES)
+_pitcher_types = {name: _stat(int) for name in _PITCHER_COUNTS}
+_pitcher_types.update({name: _stat(float)
+                       for name in ("avg",) + _PITCHER_RATES})
+_pitcher_types.update({"player_id": _int, "game_pk": _int})
+to_pitcher_stats = converter(PitcherStats, _pitcher_types,
+                             extra=_STATS_EXTRA)
@@ -0,0 +1,200 @@
+"""
+Read games out of object storage, as uploaded by `gd.scrape.upload`,
+through a local disk cache.
+
+Objects are downloaded into the cache under their own names, so a game's
+files sit together in a directory just as they do below a local root, and
+the parser reads them from there. The cache is bounded in size, evicting
+the least recently used files first.
+"""
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+import os
+import re
+import threading
+
+from gd import storage
+from gd import utils
+
+logger = utils.get_logger(__name__)
+
+DEFAULT_CACHE = "gd-objects"
+DEFAULT_CACHE_SIZE = 1024 ** 3
+DEFAULT_PREFETCH = 4
+
+# Objects are downloaded in pieces of this many bytes.
+CHUNK_SIZE = 64 * 1024
+
+_GAME_OBJECT = re.compile(r"((?:.*/)?gid_[^/]+/)(.+)$")
+
+
+class ObjectCache:
+    """A directory holding copies of objects from a container, up to
+    `max_size` bytes of them. Files are evicted least recently used first,
+    skipping any which are pinned because a game is still reading them.
+
+    The order files were used in is kept across runs by their mtime."""
+
+    def __init__(self, path=DEFAULT_CACHE, max_size=DEFAULT_CACHE_SIZE):
+        self.path = path
+        self.max_size = max_size
+        self.size = 0
+        # Object names and sizes, least recently used first.
+        self._files = OrderedDict()
+        self._pinned = {}
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+        self._scan()
+
+    def _scan(self):
+        found = []
+        for directory, dirs, files in os.walk(self.path):
+            for filename in files:
+                # Skip partial downloads.
+                if filename.startswith("."):
+                    continue
+                path = os.path.join(directory, filename)
+                stat = os.stat(path)
+                name = os.path.relpath(path, self.path).replace(os.sep, "/")
+                found.append((stat.st_mtime, name, stat.st_size))
+        for mtime, name, size in sorted(found):
+            self._files[name] = size
+            self.size += size
+
+    def local_path(self, name):
+        """Return the path that the object `name` is cached at."""
+        return os.path.join(self.path, *name.split("/"))
+
+    def fetch(self, driver, obj):
+        """Return the path to a copy of the object `obj`, downloading it
+        with `driver` unless a copy of the same size is cached. The file is
+        pinned until it's passed to `release`."""
+        path = self.local_path(obj.name)
+        with self._lock:
+            self._pinned[obj.name] = self._pinned.get(obj.name, 0) + 1
+            cached = self._files.get(obj.name) == obj.size
+            if cached:
+                self._files.move_to_end(obj.name)
+        if cached:
+            try:
+                os.utime(path)
+                return path
+            except FileNotFoundError:
+                pass
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        utils.write_file(path, driver.download_object_as_stream(
+            obj, chunk_size=CHUNK_SIZE))
+        logger.debug("fetched %s", obj.name)
+        with self._lock:
+            self.size += obj.size - self._files.pop(obj.name, 0)
+            self._files[obj.name] = obj.size
+            self._evict()
+        return path
+
+    def release(self, names):
+        """Unpin the objects `names`, letting them be evicted."""
+        with self._lock:
+            for name in names:
+                self._pinned[name] -= 1
+                if not self._pinned[name]:
+                    del self._pinned[name]
+            self._evict()
+
+    def _evict(self):
+        for name in list(self._files):
+            if self.size <= self.max_size:
+                break
+            if name in self._pinned:
+                continue
+            self.size -= self._files.pop(name)
+            try:
+                os.remove(self.local_path(name))
+            except FileNotFoundError:
+                pass
+
+
+def _find_file(files, name):
+    """Return the object for the game file `name` from `files`, the
+    game's objects by name, allowing for it being compressed."""
+    for suffix in ("",) + tuple(utils.COMPRESSION.values()):
+        if name + suffix in files:
+            return files[name + suffix]
+    return None
+
+
+def group_games(objects):
+    """Group `objects`, a dictionary of objects by name, into games. Return
+    a list of the objects of each game with all of its files: game.xml,
+    inning_all.xml and players.xml in that order, followed by its player
+    files."""
+    directories = {}
+    for name, obj in objects.items():
+        match = _GAME_OBJECT.match(name)
+        if match is not None:
+            directory, rest = match.groups()
+            directories.setdefault(directory, {})[rest] = obj
+
+    games = []
+    for directory in sorted(directories):
+        files = directories[directory]
+        game = [_find_file(files, name) for name in utils.GAME_FILES]
+        if None in game:
+            continue
+        game += [files[rest] for rest in sorted(files)
+                 if utils.PLAYER_FILE.match(rest)]
+        games.append(game)
+    return games
+
+
+def find_games(container_name, prefix=None, cache=None,
+               prefetch=DEFAULT_PREFETCH, keep=1,
+               config=storage.DEFAULT_CONFIG, skip=None):
+    """Yield the paths to the game.xml, inning_all.xml and players.xml files
+    of every game stored in `container_name` below `prefix`, in that order,
+    like `utils.find_games` does for a local root. The files are read
+    through `cache`, and each game's player files are fetched with it.
+
+    Each game's game.xml is fetched first and passed to `skip`, if it's
+    given, and games it returns True for are left out without fetching
+    the rest of their files, such as games already loaded.
+
+    The container is listed once, then up to `prefetch` games ahead are
+    downloaded in the background while earlier ones are used. The files of
+    the last `keep` games yielded are never evicted, so callers which work
+    on several games at once should raise it."""
+    cache = ObjectCache() if cache is None else cache
+    with storage.pooled_driver(config) as driver:
+        container = driver.get_container(container_name)
+        games = group_games(storage.list_objects(driver, container, prefix))
+    logger.info("Found %d games in %s", len(games), container_name)
+
+    def fetch(objects):
+        with storage.pooled_driver(config) as driver:
+            game = cache.fetch(driver, objects[0])
+            if skip is not None and skip(game):
+                logger.debug("skipping %s", objects[0].name)
+                return None
+            return [game] + [cache.fetch(driver, obj) for obj in objects[1:]]
+
+    fetching = deque()
+    yielded = deque()
+
+    def ready(limit):
+        # Yield the games fetched while more than `limit` are in flight.
+        while len(fetching) > limit:
+            objects, future = fetching.popleft()
+            paths = future.result()
+            if paths is None:
+                cache.release([objects[0].name])
+                continue
+            yielded.append([obj.name for obj in objects])
+            if len(yielded) > keep:
+                cache.release(yielded.popleft())
+            yield tuple(paths[:len(utils.GAME_FILES)])
+
+    with ThreadPoolExecutor(max_workers=max(prefetch, 1)) as pool:
+        for objects in games:
+            fetching.append((objects, pool.submit(fetch, objects)))
+            yield from ready(prefetch)
+        yield from ready(0)
@@ -1,103 +1,340 @@
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import date
+from functools import partial
 from urllib.parse import urljoin, urlsplit
-from xml.etree import ElementTree
+import base64
+import binascii
 import os
+import posixpath
+import re
+import threading
 
 import requests
 
-from gd import storage
+from gd import etree
 from gd import utils
 
 logger = utils.get_logger(__name__)
 
 
-# ElementTree chokes on the doctype in these files so just skip over it.
+# The XML parsers choke on the doctype in these files so just skip over it.
 # We're using an XML parser to parse HTML. Whatever, the rest of it works.
 WITHOUT_DOCTYPE = slice(56, -1)
 
+# Downloads are streamed to disk in pieces of this many bytes.
+CHUNK_SIZE = 64 * 1024
 
-def upload(urls):
-    session = requests.Session()
+# Uploads ask for files as they're stored, so that their Content-Length is
+# the size of the object they become.
+IDENTITY = {"Accept-Encoding": "identity"}
+MD5_ETAG = re.compile(r"[0-9a-fA-F]{32}")
+DAY_PREFIX = re.compile(r".*?/day_\d+/")
 
-    driver = storage.get_driver()
-    container = None
-    uploads = 0
-    for url in urls:
-        parts = urlsplit(url)
-        filename = os.path.split(parts.path)[1]
-        # Skip directory pages.
-        if not filename:
-            continue
+# Player files, in utils.PLAYER_DIRS, are found in their listings by
+# starting with a digit of the player's ID.
+PLAYER_FILES = tuple("0123456789")
 
-        if container is None:
-            container = storage.get_container(driver,
-                                              "%s://%s" % (parts.scheme,
-                                                           parts.netloc))
 
-        object_name = parts.path
+_local = threading.local()
 
-        response = session.get(url)
-        try:
-            response.raise_for_status()
-        except requests.HTTPError as exc:
-            logger.error("%s upload failed: %s", url, exc)
-            continue
 
-        storage.upload_object(driver, container, object_name, response.content)
-        uploads += 1
-    logger.info("Uploaded %d objects", uploads)
+def _get_session():
+    """Return a requests.Session private to the calling thread.
 
+    Sessions keep their connections alive between requests, but they
+    aren't safe to share between threads, so each worker gets its own."""
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = _local.session = requests.Session()
+    return session
 
-def download(urls):
-    """Download `urls` into `root`. Return the count of files downloaded.
-    Each URL is stored as its full URL (minus the scheme)."""
-    session = requests.Session()
-    downloads = 0
-    for url in urls:
+
+def _source_md5(headers):
+    """Return the hex MD5 of a file from its response `headers`, taken from
+    Content-MD5 or an ETag which is a plain MD5, or None if neither is."""
+    content_md5 = headers.get("Content-MD5")
+    if content_md5:
+        try:
+            return binascii.hexlify(base64.b64decode(content_md5)).decode()
+        except (binascii.Error, ValueError):
+            pass
+    etag = headers.get("ETag", "").strip('"')
+    if MD5_ETAG.fullmatch(etag):
+        return etag.lower()
+    return None
+
+
+def _is_current(obj, headers):
+    """Return True if the stored object `obj` holds the same file as the
+    response with `headers`: it's the same size, and has the same MD5 if
+    the headers give one."""
+    length = headers.get("Content-Length")
+    if length is None or obj.size != int(length):
+        return False
+    md5 = _source_md5(headers)
+    return md5 is None or (obj.hash or "").strip('"').lower() == md5
+
+
+def _listing_prefix(object_name):
+    """Return the prefix to list the objects beside `object_name` by. Game
+    files are listed a day at a time, which takes a page or so."""
+    match = DAY_PREFIX.match(object_name)
+    if match is not None:
+        return match.group(0)
+    return os.path.dirname(object_name) + "/"
+
+
+def _upload_file(driver, url, container, object_name, existing):
+    """Stream `url` into `object_name` in `container`, unless `existing`,
+    the object already stored there if any, is the same file.
+    Return True if the object was uploaded."""
+    from gd import storage
+
+    session = _get_session()
+    if existing is not None:
+        response = session.head(url, headers=IDENTITY)
+        if response.ok and _is_current(existing, response.headers):
+            logger.debug("%s already uploaded", url)
+            return False
+
+    response = session.get(url, headers=IDENTITY, stream=True)
+    try:
+        response.raise_for_status()
+        storage.upload_object(driver, container, object_name,
+                              response.iter_content(CHUNK_SIZE))
+    except requests.HTTPError as exc:
+        logger.error("%s upload failed: %s", url, exc)
+        return False
+    finally:
+        response.close()
+    return True
+
+
+def upload(urls, workers=1):
+    """Upload `urls` to object storage, up to `workers` at once. Each file
+    goes into a container named after its host, and is streamed from its
+    response into the object named by its path.
+
+    The objects already stored are listed in batches, a day of games at a
+    time, and files whose object is the same size, and has the same MD5
+    when the server gives one, are skipped. Return the count of objects
+    uploaded.
+
+    Drivers come from the pool in gd.storage, so a worker uses one driver
+    at a time, and drivers and containers are reused by later calls."""
+    # Imported here so that downloading doesn't pay for libcloud.
+    from gd import storage
+
+    listings = {}
+    lock = threading.Lock()
+
+    def get_listing(driver, container, prefix):
+        # Each prefix is listed once, by whichever worker gets there first.
+        with lock:
+            entry = listings.setdefault((container.name, prefix),
+                                        [threading.Lock(), None])
+        with entry[0]:
+            if entry[1] is None:
+                entry[1] = storage.list_objects(driver, container, prefix)
+        return entry[1]
+
+    def upload_file(url):
         parts = urlsplit(url)
-        directory, filename = os.path.split(parts.path)
         # Skip directory pages.
-        if not filename:
-            continue
-
-        target = parts.netloc + directory
-        # Ignore if the target directory already existed.
-        os.makedirs(target, exist_ok=True)
-
+        if not os.path.basename(parts.path):
+            return False
+
+        object_name = parts.path.lstrip("/")
+        with storage.pooled_driver() as driver:
+            container = storage.get_container(driver, parts.netloc)
+            listing = get_listing(driver, container,
+                                  _listing_prefix(object_name))
+            return _upload_file(driver, url, container, object_name,
+                                listing.get(object_name))
+
+    uploads = sum(utils.map_concurrently(upload_file, urls, workers))
+    logger.info("Uploaded %d objects", uploads)
+    return uploads
+
+
+def _request_headers(manifest, url, revalidate):
+    """Return the headers to fetch `url` with, or None if the copy recorded
+    in `manifest` is intact and doesn't need to be revalidated."""
+    entry = None if manifest is None else manifest.get(url)
+    if entry is None or not manifest.is_intact(entry):
+        return {}
+    if not revalidate:
+        return None
+
+    headers = {}
+    if entry.etag:
+        headers["If-None-Match"] = entry.etag
+    if entry.last_modified:
+        headers["If-Modified-Since"] = entry.last_modified
+    return headers
+
+
+def _local_path(url, compression=None):
+    """Return the path below the current directory that `url` is stored
+    at, creating its directory. That's the full URL (minus the scheme), plus
+    a suffix if the file is compressed with `compression`."""
+    parts = urlsplit(url)
+    directory, filename = os.path.split(parts.path)
+    target = parts.netloc + directory
+    # Ignore if the target directory already existed.
+    os.makedirs(target, exist_ok=True)
+
+    path = os.path.join(target, filename)
+    if compression is not None:
+        path += utils.COMPRESSION[compression]
+    return path
+
+
+def _download_file(url, manifest=None, revalidate=False, compression=None):
+    """Download `url` below the current directory.
+    Return True if a file was written."""
+    # Skip directory pages.
+    if not os.path.basename(urlsplit(url).path):
+        return False
+
+    headers = _request_headers(manifest, url, revalidate)
+    if headers is None:
+        logger.debug("%s already downloaded", url)
+        return False
+
+    response = _get_session().get(url, headers=headers, stream=True)
+    try:
+        response.raise_for_status()
+        if response.status_code == 304:
+            logger.debug("%s not modified", url)
+            return False
+
+        path = _local_path(url, compression)
+        sha1 = utils.write_file(path, response.iter_content(CHUNK_SIZE),
+                                compression)
+        logger.debug("downloaded %s", url)
+    except requests.HTTPError as exc:
+        logger.error("download error: %s raised %s", url, str(exc))
+        return False
+    finally:
+        response.close()
+
+    if manifest is not None:
+        manifest.record(url, path, os.path.getsize(path),
+                        response.headers.get("ETag"),
+                        response.headers.get("Last-Modified"), sha1)
+    return True
+
+
+def _archive_file(url, archive, revalidate=False):
+    """Download `url` into the gd.archive.ArchiveWriter `archive`, unless
+    it's already there. With `revalidate` it's fetched again, and stored if
+    it changed. Return True if the file was stored."""
+    # Skip directory pages.
+    if not os.path.basename(urlsplit(url).path):
+        return False
+    if not revalidate and url in archive:
+        logger.debug("%s already archived", url)
+        return False
+
+    response = _get_session().get(url)
+    try:
+        response.raise_for_status()
+    except requests.HTTPError as exc:
+        logger.error("download error: %s raised %s", url, str(exc))
+        return False
+    return archive.write(url, response.content)
+
+
+def download(urls, workers=1, manifest=None, revalidate=False,
+             compression=None, archive=None):
+    """Download `urls` into `root`, fetching up to `workers` at once.
+    Return the count of files downloaded.
+    Each URL is stored as its full URL (minus the scheme), plus a suffix
+    if the file is compressed with `compression` ("gzip" or "zstd").
+
+    URLs recorded in `manifest` with an intact local copy are skipped,
+    or with `revalidate`, fetched with a conditional GET.
+
+    With `archive`, a gd.archive.ArchiveWriter, files are written into it
+    rather than below the current directory, and those it already holds
+    are skipped unless `revalidate` is given."""
+    if archive is not None:
+        fetch = partial(_archive_file, archive=archive,
+                        revalidate=revalidate)
+    else:
+        fetch = partial(_download_file, manifest=manifest,
+                        revalidate=revalidate, compression=compression)
+    downloads = sum(utils.map_concurrently(fetch, urls, workers))
+    logger.info("Downloaded %d files" % downloads)
+    return downloads
+
+
+def fetch_game(game, save=False, compression=None):
+    """Fetch the utils.GAME_FILES of the `game` directory URL into memory.
+    Return a dictionary of each name to its content, or None if any of them
+    couldn't be fetched. With `save`, the files are also written below the
+    current directory as `download` would, compressed with `compression`."""
+    session = _get_session()
+    files = {}
+    for name in utils.GAME_FILES:
+        url = urljoin(game, name)
         response = session.get(url)
         try:
             response.raise_for_status()
         except requests.HTTPError as exc:
-            logger.error("download error: %s raised %s", url, str(exc))
-            continue
-
-        with open(os.path.join(target, filename), "w") as fh:
-            fh.write(response.content.decode("utf8"))
-            logger.debug("downloaded %s", url)
-            downloads += 1
-
-    logger.info("Downloaded %d files" % downloads)
-
-
-def web_scraper(roots, match=None, session=None):
-    """Yield URLs in a directory which start with `match`.
-    If `match` is None, all links are yielded."""
+            logger.error("fetch error: %s raised %s", url, str(exc))
+            return None
+
+        files[name] = response.content
+        if save:
+            utils.write_file(_local_path(url, compression),
+                             [response.content], compression)
+    return files
+
+
+def _get_links(root, session=None):
+    """Return the links in the directory listing at `root`, or None if it
+    couldn't be fetched."""
+    if session is not None:
+        response = session.get(root)
+    else:
+        response = requests.get(root)
+    try:
+        response.raise_for_status()
+    except requests.HTTPError as exc:
+        # Day directories are computed from dates, so days without games
+        # don't exist. That's an empty listing rather than an error.
+        if response.status_code == 404:
+            logger.debug("%s does not exist", root)
+            return []
+        logger.error("scraping %s raised %s", root, str(exc))
+        return None
+
+    # Parse the directory listing, but ignore the DOCTYPE.
+    source = etree.fromstring(response.content[WITHOUT_DOCTYPE])
+    return [a.attrib["href"] for a in source.findall(".//a")]
+
+
+def web_scraper(roots, match=None, session=None, cache=None):
+    """Yield URLs in a directory which start with `match`, which may be
+    a string or a tuple of strings. If `match` is None, all links are
+    yielded.
+
+    Listings found in `cache` aren't requested again, and fresh ones are
+    stored there."""
     for root in roots:
-        if session is not None:
-            response = session.get(root)
-        else:
-            response = requests.get(root)
-        try:
-            response.raise_for_status()
-        except requests.HTTPError as exc:
-            logger.error("scraping %s raised %s", root, str(exc))
-            continue
-
-        # Parse the directory listing, but ignore the DOCTYPE.
-        source = ElementTree.fromstring(response.content[WITHOUT_DOCTYPE])
-        a_tags = source.findall(".//a")
-        for a in a_tags:
-            url = a.attrib["href"]
-            if match is None or url[slice(0, len(match))] == match:
+        links = None if cache is None else cache.get(root)
+        if links is None:
+            links = _get_links(root, session)
+            if links is None:
+                continue
+            if cache is not None:
+                cache.store(root, links)
+
+        for url in links:
+            if match is None or url.startswith(match):
                 yield urljoin(root, url)
 
 
@@ -130,27 +367,127 @@ def get_games(days, source=web_scraper, session=None):
     yield from source(days, "gid", session)
 
 
-def get_files(games, source=web_scraper, session=None):
-    """Yield URLs to the relevant files for every game."""
+def get_files(games, source=web_scraper, session=None, players=False):
+    """Yield URLs to the relevant files for every game, including the
+    per-player files if `players` is True."""
     for game in games:
-        yield from source([game], "players.xml", session)
-        yield from source([game], "game.xml", session)
-        yield from source([urljoin(game, "inning/")],
-                          "inning_all.xml", session)
-
-
-def get_files_in_range(begin, end):
-    session = requests.Session()
-
-    all_years = get_years(session=session)
-    inc_years = utils.get_inclusive_urls(all_years, begin, end)
-
-    all_months = get_months(inc_years, session=session)
-    inc_months = utils.get_inclusive_urls(all_months, begin, end)
-
-    all_days = get_days(inc_months, session=session)
-    inc_days = utils.get_inclusive_urls(all_days, begin, end)
-
-    games = get_games(inc_days, session=session)
-
-    yield from get_files(games, session=session)
+        for name in utils.GAME_FILES:
+            directory, filename = posixpath.split(name)
+            yield from source([urljoin(game, posixpath.join(directory, ""))],
+                              filename, session)
+        if players:
+            for url, match in _player_listings(game):
+                yield from source([url], match, session)
+
+
+def _game_listings(game):
+    """Return the (url, match) listings which find the utils.GAME_FILES of
+    the `game` directory URL. Files in the same directory are found by one
+    listing."""
+    matches = {}
+    for name in utils.GAME_FILES:
+        directory, filename = posixpath.split(name)
+        matches.setdefault(directory, []).append(filename)
+    return [(urljoin(game, posixpath.join(directory, "")), tuple(filenames))
+            for directory, filenames in matches.items()]
+
+
+def _player_listings(game):
+    """Return the (url, match) listings which find the player files of the
+    `game` directory URL."""
+    return [(urljoin(game, name + "/"), PLAYER_FILES)
+            for name in utils.PLAYER_DIRS]
+
+
+def _list_directory(url, match, cache=None):
+    """Return `match` and the matching URLs listed in the `url` directory."""
+    return match, list(web_scraper([url], match, _get_session(), cache))
+
+
+def _plan_game(game, manifest=None, players=False):
+    """Return the file URLs already known for the `game` directory URL and
+    the (url, match) listings which still need to be crawled."""
+    known = [urljoin(game, name) for name in utils.GAME_FILES]
+    # Which player files exist is only known from listing them, but the
+    # listing cache and manifest keep that cheap for days already fetched.
+    listings = _player_listings(game) if players else []
+
+    if manifest is not None and manifest.complete(known):
+        return known, listings
+    return [], listings + _game_listings(game)
+
+
+def crawl_files(days, workers=1, manifest=None, cache=None, players=False):
+    """Yield URLs to the relevant files for every game in `days`, including
+    the per-player files if `players` is True.
+
+    Directory listings for up to `workers` days and games are fetched at
+    once. Games are listed ahead of any remaining days and their files are
+    yielded as soon as they're found, so a consumer can start downloading
+    while the rest of the range is still being discovered.
+
+    Games whose files all have intact copies recorded in `manifest` aren't
+    listed again; their known file URLs are yielded straight away.
+    Listings are read from and stored in `cache` if one is given."""
+    frontier = deque((day, "gid") for day in days)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        running = set()
+        while frontier or running:
+            while frontier and len(running) < workers:
+                url, match = frontier.popleft()
+                running.add(pool.submit(_list_directory, url, match, cache))
+
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                match, urls = future.result()
+                if match != "gid":
+                    yield from urls
+                    continue
+                listings = []
+                for game in urls:
+                    known, game_listings = _plan_game(game, manifest, players)
+                    yield from known
+                    listings += game_listings
+                # Put the day's listings at the front, in order; extendleft
+                # adds them one at a time, so they go in reversed.
+                frontier.extendleft(reversed(listings))
+
+
+def get_days_in_range(begin, end, source=web_scraper, session=None):
+    """Yield URLs to every day directory in the range of the `begin` and
+    `end` Boundary objects.
+
+    The URLs are computed from the dates rather than found by listing each
+    year and month, so only the days themselves are ever requested. With
+    no beginning, the range starts at the first year listed at the root."""
+    first, last = utils.get_date_range(begin, end)
+    if first is None:
+        years = sorted(get_years(source=source, session=session))
+        if not years:
+            return
+        first = date(int(years[0].rstrip("/")[-4:]), 1, 1)
+
+    yield from utils.get_day_urls(first, last)
+
+
+def get_games_in_range(begin, end, workers=1, cache=None):
+    """Yield URLs to every game directory in the range of the `begin` and
+    `end` Boundary objects, listing up to `workers` days at once."""
+    source = partial(web_scraper, cache=cache)
+    days = get_days_in_range(begin, end, source, _get_session())
+    list_day = partial(_list_directory, match="gid", cache=cache)
+    for match, games in utils.map_concurrently(list_day, days, workers):
+        yield from games
+
+
+def get_files_in_range(begin, end, workers=1, manifest=None, cache=None,
+                       players=False):
+    """Yield URLs to the relevant files for every game in the range of the
+    `begin` and `end` Boundary objects, including the per-player files if
+    `players` is True.
+    Day and game directories are crawled by up to `workers` threads
+    through `crawl_files`, and every listing goes through `cache`."""
+    source = partial(web_scraper, cache=cache)
+    days = get_days_in_range(begin, end, source, _get_session())
+
+    yield from crawl_files(days, workers, manifest, cache, players)
@@ -1,164 +1,246 @@
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from os.path import join
-from xml.etree import ElementTree
+from functools import partial
 import argparse
-import os
+import signal
+import sys
 
-from gd import database
-from gd import parser
-from gd import scrape
+from gd import cache
+from gd import manifest
 from gd import utils
-from gd.models import (Action, AtBat, Game, Player, Pitch, Stadium,
-                       Team, Umpire)
 
-logger = utils.enable_logging()
+# Everything else is imported by the subcommands which use it, so that
+# starting gd-util doesn't pay for SQLAlchemy, NumPy or requests unless
+# the subcommand needs them.
+logger = utils.get_logger(__name__)
 
 
 def do_scrape(args):
     """Run the scraper over the range [begin, end]
 
-    If no beginning is given, scraping starts from the root.
+    If no beginning is given, scraping starts from the first year listed
+    at the root.
     If no ending is given, scraping ends at the yesterday's date.
+    Downloads are recorded in a manifest so that files already on disk
+    are skipped, or revalidated, on later runs, and directory listings are
+    cached so that settled dates aren't listed again. With `args.archive`,
+    files are downloaded into that archive instead, which files already
+    in it are skipped by.
     Note: end=yesterday because the schedule is pre-loaded, so scraping
     for today would mean having to account for a game existing but no files
     available."""
+    from gd import scrape
+
     if not any([args.download, args.upload]):
         print("Must choose to upload or download.")
         return -1
-    action = scrape.download if args.download else scrape.upload
+    kwargs = {}
+    fetch_manifest = None
+    writer = None
+    if args.download and args.archive:
+        from gd import archive
+        action = scrape.download
+        writer = archive.ArchiveWriter(args.archive)
+        kwargs = {"archive": writer, "revalidate": args.revalidate}
+    elif args.download:
+        action = scrape.download
+        if args.manifest:
+            fetch_manifest = manifest.Manifest(args.manifest)
+        kwargs = {"manifest": fetch_manifest, "revalidate": args.revalidate,
+                  "compression": args.compression}
+    else:
+        action = scrape.upload
 
     start_scrape = datetime.now()
     begin = utils.get_boundary(args.begin)
     end = utils.get_boundary(args.end)
 
-    start, stop = utils.get_request_range(begin, end)
-    files = scrape.get_files_in_range(start, stop)
-
-    action(files)
+    listings = None
+    if args.listing_cache:
+        listings = cache.ListingCache(args.listing_cache)
+
+    # The stores are closed however the run ends, which an archive needs
+    # to keep the files in the zips it has open.
+    try:
+        files = scrape.get_files_in_range(begin, end, args.workers,
+                                          fetch_manifest, listings,
+                                          args.players)
+        action(files, workers=args.workers, **kwargs)
+    finally:
+        for store in (fetch_manifest, listings, writer):
+            if store is not None:
+                store.close()
     end_scrape = datetime.now()
     logger.debug("%s completed in %s", str(action),
                  str(end_scrape - start_scrape))
 
 
-def add_teams(session, teams):
-    query = session.query(Team.id)
-    for team in teams:
-        if query.filter(Team.id.is_(int(team["id"]))).scalar() is None:
-            session.add(Team(**team))
+def do_initdb(args):
+    from gd import database
 
+    database.init()
 
-def add_players(session, players):
-    query = session.query(Player.id)
-    for player in players:
-        if query.filter(Player.id.is_(int(player["id"]))).scalar() is None:
-            session.add(Player(**player))
 
+def _find_new_games(args, known):
+    """Return the function parsing a game for `do_import`, and what it
+    takes for each game not yet loaded from the source in `args`."""
+    from gd import gamecache, loader, parser
 
-def add_umpire(session, umpire):
-    query = session.query(Umpire.id)
-    if query.filter(Umpire.id.is_(int(umpire["id"]))).scalar() is None:
-        session.add(Umpire(**umpire))
+    if args.archive:
+        from gd import archive
+        return (partial(archive.parse_game, cache=args.parse_cache),
+                loader.new_archived(archive.Archive(args.archive), known))
 
+    if args.container:
+        from gd import remote
+        cache = remote.ObjectCache(args.cache, args.cache_size * 1024 ** 2)
+        # Up to two games per job are parsed while more are found, and
+        # only game.xml is fetched for games which won't be loaded.
+        found = remote.find_games(args.container, args.prefix, cache,
+                                  args.prefetch, keep=2 * args.jobs + 1,
+                                  skip=partial(loader.is_skipped, known))
+    else:
+        found = utils.find_games(args.root)
 
-def add_stadium(session, stadium):
-    query = session.query(Stadium.id)
-    if query.filter(Stadium.id.is_(int(stadium["id"]))).scalar() is None:
-        session.add(Stadium(**stadium))
+    parse = parser.parse_paths
+    if args.parse_cache:
+        parse = partial(gamecache.parse_paths, root=args.parse_cache)
+    return parse, loader.new_files(found, known)
 
 
-def add_game(session, game):
-    query = session.query(Game.game_pk)
-    if query.filter(Game.game_pk.is_(int(game["game_pk"]))).scalar() is None:
-        session.add(Game(**game))
+def do_import(args):
+    """Import every game found below `args.root`, committing after each
+    `args.batch_size` games.
+
+    Games are parsed by `args.jobs` processes, while this one does all of
+    the database writes. Games already in the database are skipped
+    before they're parsed, so a rerun only loads new games. Player files
+    found next to a game are loaded with it, unless the same contents
+    were loaded before.
+
+    With `args.container`, games are read from that object storage
+    container instead, through a local cache, and with `args.archive` from
+    the archive written by scrape. With `args.parse_cache`, parsed games
+    are cached there, and games cached before aren't parsed again."""
+    from gd import database, loader
+
+    known = loader.load_known_ids(database.session)
+    parse, games = _find_new_games(args, known)
+    games = utils.map_concurrently(parse, games, args.jobs,
+                                   ProcessPoolExecutor)
+    loaded = 0
+    for parsed in games:
+        if loader.load_game(database.session, parsed, known, args.bulk):
+            loaded += 1
+            if loaded % args.batch_size == 0:
+                database.session.commit()
+
+    database.session.commit()
+    logger.info("Imported %d games", loaded)
+
+
+def do_export(args):
+    """Export the pitches, at-bats and actions in the database into files
+    partitioned by season and game date below `args.root`."""
+    from gd import database, export
+    from gd.models import Action, AtBat, Game, Pitch
+
+    fmt = args.format or export.DEFAULT_FORMAT
+    if fmt not in export.FORMATS:
+        print("Format must be one of %s." % ", ".join(sorted(export.FORMATS)))
+        return -1
+    for model in (Pitch, AtBat, Action):
+        export.export_table(database.get_engine(), model.__table__,
+                            Game.__table__, args.root, fmt)
 
 
-def do_initdb(args):
-    database.init()
+def do_ingest(args):
+    """Fetch, parse and load every game in the range [begin, end] without
+    going through the filesystem. The range is as for `do_scrape`."""
+    from gd import database, ingest, loader, scrape
 
+    begin = utils.get_boundary(args.begin)
+    end = utils.get_boundary(args.end)
 
-def do_import(args):
-    for root, dirs, files in os.walk(args.root):
-        game_path = join(root, "game.xml")
-        inning_path = join(root, "inning/inning_all.xml")
-        player_path = join(root, "players.xml")
-
-        exist = [os.path.exists(x) for x in [game_path, inning_path,
-                                             player_path]]
-        if not all(exist):
-            continue
-
-        with open(game_path, "r") as game_file:
-            game_tree = ElementTree.fromstring(game_file.read())
-        with open(inning_path, "r") as inning_file:
-            inning_tree = ElementTree.fromstring(inning_file.read())
-        with open(player_path, "r") as player_file:
-            player_tree = ElementTree.fromstring(player_file.read())
-
-        date = parser.get_date(player_tree)
-        teams = list(parser.get_teams(game_tree))
-        players = parser.get_players(player_tree)
-        plate_umpire = parser.get_plate_umpire(player_tree)
-        stadium = parser.get_stadium(game_tree)
-        game = parser.get_game(game_tree)
-        atbats = list(parser.get_atbats(inning_tree))
-        pitches = list(parser.get_pitches(inning_tree))
-        actions = list(parser.get_actions(inning_tree))
-
-        # Skip spring training and exhibition games since they won't have
-        # any data, and I've also seen players in these games with non-unique
-        # player IDs. Just forget that...
-        if game["type"] in ("S", "E"):
-            continue
-
-        add_teams(database.session, teams)
-        add_players(database.session, players)
-        add_umpire(database.session, plate_umpire)
-        add_stadium(database.session, stadium)
-
-        # This home/away determination is risky depending on ordering,
-        # but every game I've looked at has worked this way.
-        game["date"] = date
-        game["home_team"] = teams[0]["id"]
-        game["away_team"] = teams[1]["id"]
-        game["stadium"] = stadium["id"]
-        game["umpire_id"] = plate_umpire["id"]
-        add_game(database.session, game)
-
-        for action in actions:
-            action["game_pk"] = game["game_pk"]
-        database.session.add_all([Action(**action) for action in actions])
-
-        for atbat in atbats:
-            atbat["game_pk"] = game["game_pk"]
-        database.session.add_all([AtBat(**atbat) for atbat in atbats])
-
-        for pitch in pitches:
-            pitch["game_pk"] = game["game_pk"]
-        # HBPs don't seem to have anything in them, so skip 'em
-        pitches = [p for p in pitches if p["des"] != "Hit By Pitch"]
-        database.session.add_all([Pitch(**pitch) for pitch in pitches])
+    listings = None
+    if args.listing_cache:
+        listings = cache.ListingCache(args.listing_cache)
+
+    known = loader.load_known_ids(database.session)
 
+    def load(parsed):
+        if not loader.load_game(database.session, parsed, known):
+            return False
         database.session.commit()
+        return True
+
+    games = scrape.get_games_in_range(begin, end, args.workers, listings)
+    ingest.ingest(games, load, args.workers, args.save, args.compression)
+
+    if listings is not None:
+        listings.close()
 
 
 def get_args():
     parser = argparse.ArgumentParser()
-    subparsers = parser.add_subparsers()
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.required = True
 
     init_parser = subparsers.add_parser("initdb")
     init_parser.set_defaults(func=do_initdb)
 
     import_parser = subparsers.add_parser("import")
     import_parser.set_defaults(func=do_import)
-    import_parser.add_argument("--root",
-                               help="Directory to search for Gameday files")
+    source = import_parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--root",
+                        help="Directory to search for Gameday files")
+    source.add_argument("--container",
+                        help="Object storage container to read Gameday "
+                             "files from, as uploaded by scrape.")
+    source.add_argument("--archive",
+                        help="Archive directory to read Gameday files "
+                             "from, as downloaded by scrape.")
+    import_parser.add_argument("--prefix",
+                               help="Only read objects in the container "
+                                    "whose names start with this, such as "
+                                    "components/game/mlb/year_2013/.")
+    import_parser.add_argument("--cache", default="gd-objects",
+                               help="Directory to cache objects in.")
+    import_parser.add_argument("--cache-size", dest="cache_size", type=int,
+                               default=1024,
+                               help="Megabytes of objects to keep cached.")
+    import_parser.add_argument("--prefetch", type=int, default=4,
+                               help="Number of games to download ahead.")
+    import_parser.add_argument("--parse-cache", dest="parse_cache",
+                               help="Directory to cache parsed games in, "
+                                    "so importing them again skips the "
+                                    "XML.")
+    import_parser.add_argument("--bulk", dest="bulk", action="store_true",
+                               default=False,
+                               help="Insert records with executemany "
+                                    "instead of the ORM.")
+    import_parser.add_argument("-j", "--jobs", dest="jobs", type=int,
+                               default=1,
+                               help="Number of processes parsing games.")
+    import_parser.add_argument("--batch-size", dest="batch_size", type=int,
+                               default=1,
+                               help="Number of games to commit at once.")
+
+    export_parser = subparsers.add_parser("export")
+    export_parser.set_defaults(func=do_export)
+    export_parser.add_argument("--root", default="export",
+                               help="Directory to write the files below.")
+    export_parser.add_argument("-f", "--format", dest="format",
+                               help="File format to write: npz, or parquet "
+                                    "and arrow with pyarrow installed. "
+                                    "Defaults to parquet if it's available.")
 
     scraper_parser = subparsers.add_parser("scrape")
     scraper_parser.set_defaults(func=do_scrape)
     scraper_parser.add_argument("-b", "--begin", dest="begin", type=str,
-                                help="Beginning date in %Y-%m-%d format")
+                                help="Beginning date in %%Y-%%m-%%d format")
     scraper_parser.add_argument("-e", "--end", dest="end", type=str,
-                                help="Ending date in %Y-%m-%d format")
+                                help="Ending date in %%Y-%%m-%%d format")
     group = scraper_parser.add_mutually_exclusive_group()
     group.add_argument("-d", "--download", dest="download",
                        action="store_true", default=False,
@@ -166,10 +248,72 @@ def get_args():
     group.add_argument("-u", "--upload", dest="upload",
                        action="store_true", default=False,
                        help="Upload scraped files.")
+    scraper_parser.add_argument("-w", "--workers", dest="workers", type=int,
+                                default=1,
+                                help="Number of directories and files to "
+                                     "fetch at once.")
+    scraper_parser.add_argument("-m", "--manifest", dest="manifest",
+                                default=manifest.DEFAULT_NAME,
+                                help="Record of downloaded files, used to "
+                                     "skip them on later runs.")
+    scraper_parser.add_argument("--no-manifest", dest="manifest",
+                                action="store_const", const=None,
+                                help="Download every file again.")
+    scraper_parser.add_argument("--revalidate", dest="revalidate",
+                                action="store_true", default=False,
+                                help="Re-request recorded files with a "
+                                     "conditional GET.")
+    scraper_parser.add_argument("-a", "--archive", dest="archive",
+                                help="Download into this archive "
+                                     "directory, a few zip files per "
+                                     "season, instead of a file each.")
+    scraper_parser.add_argument("-c", "--compress", dest="compression",
+                                choices=sorted(utils.COMPRESSION),
+                                help="Compress downloaded files.")
+    scraper_parser.add_argument("-p", "--players", dest="players",
+                                action="store_true", default=False,
+                                help="Also scrape each game's batters/ and "
+                                     "pitchers/ files.")
+    scraper_parser.add_argument("-l", "--listing-cache", dest="listing_cache",
+                                default=cache.DEFAULT_NAME,
+                                help="Cache of directory listings.")
+    scraper_parser.add_argument("--no-listing-cache", dest="listing_cache",
+                                action="store_const", const=None,
+                                help="Fetch every directory listing again.")
+
+    ingest_parser = subparsers.add_parser("ingest")
+    ingest_parser.set_defaults(func=do_ingest)
+    ingest_parser.add_argument("-b", "--begin", dest="begin", type=str,
+                               help="Beginning date in %%Y-%%m-%%d format")
+    ingest_parser.add_argument("-e", "--end", dest="end", type=str,
+                               help="Ending date in %%Y-%%m-%%d format")
+    ingest_parser.add_argument("-w", "--workers", dest="workers", type=int,
+                               default=1,
+                               help="Number of games to fetch at once.")
+    ingest_parser.add_argument("-s", "--save", dest="save",
+                               action="store_true", default=False,
+                               help="Also save the fetched files to disk.")
+    ingest_parser.add_argument("-c", "--compress", dest="compression",
+                               choices=sorted(utils.COMPRESSION),
+                               help="Compress saved files.")
+    ingest_parser.add_argument("-l", "--listing-cache", dest="listing_cache",
+                               default=cache.DEFAULT_NAME,
+                               help="Cache of directory listings.")
+    ingest_parser.add_argument("--no-listing-cache", dest="listing_cache",
+                               action="store_const", const=None,
+                               help="Fetch every directory listing again.")
 
     return parser.parse_args()
 
 
+def _exit(signum, frame):
+    sys.exit(128 + signum)
+
+
 def main():
     args = get_args()
-    args.func(args)
+    utils.enable_logging()
+    # Exit normally on SIGTERM, such as from a cron timeout, so that files
+    # and archives being written are closed.
+    signal.signal(signal.SIGTERM, _exit)
+    return args.func(args)
@@ -1,36 +1,112 @@
+from contextlib import contextmanager
+from functools import lru_cache
 import configparser
-import io
+import threading
 
 from libcloud.storage.providers import get_driver as get_storage_driver
-from libcloud.storage.types import ContainerDoesNotExistError
+from libcloud.storage.types import (ContainerAlreadyExistsError,
+                                    ContainerDoesNotExistError)
 
+DEFAULT_CONFIG = "/usr/local/etc/gd/storage.conf"
 
-def get_driver(config="/usr/local/etc/gd/storage.conf"):
+# Drivers hold a connection which isn't safe to share between threads, so
+# they're lent out one thread at a time from a pool for each configuration.
+# The containers they look up are shared, and each is looked up by one
+# thread at a time, so they aren't created several times over.
+_drivers = {}
+_containers = {}
+_container_locks = {}
+_lock = threading.Lock()
+
+
+@lru_cache()
+def _read_config(config):
+    """Return the provider, username, API key and region in `config`."""
     parser = configparser.ConfigParser()
-    if parser.read(config):
-        provider = parser.get("storage", "provider")
-        username = parser.get("storage", "username")
-        api_key = parser.get("storage", "api_key")
-        region = parser.get("storage", "region")
-    else:
+    if not parser.read(config):
         raise Exception("Unable to read storage configuration")
+    return tuple(parser.get("storage", option)
+                 for option in ("provider", "username", "api_key", "region"))
 
+
+def get_driver(config=DEFAULT_CONFIG):
+    """Return a new driver for the storage in `config`. The configuration
+    is only read once."""
+    provider, username, api_key, region = _read_config(config)
     Driver = get_storage_driver(provider)
     return Driver(username, api_key, region=region)
 
 
+@contextmanager
+def pooled_driver(config=DEFAULT_CONFIG):
+    """Lend the calling thread a driver for the storage in `config` until
+    the block exits. Drivers are kept in a pool for the life of the process
+    rather than made for each use, so they stay authenticated and keep
+    their connections alive."""
+    with _lock:
+        idle = _drivers.setdefault(config, [])
+        driver = idle.pop() if idle else None
+    if driver is None:
+        driver = get_driver(config)
+    try:
+        yield driver
+    finally:
+        with _lock:
+            idle.append(driver)
+
+
 def get_container(driver, container_name):
-    """Get or create a container."""
+    """Get or create a container. Containers are looked up once per
+    process for each provider and account, whichever thread asks."""
+    key = (type(driver), getattr(driver, "key", None), container_name)
+    with _lock:
+        container_lock = _container_locks.setdefault(key, threading.Lock())
+    with container_lock:
+        if key not in _containers:
+            _containers[key] = _get_or_create(driver, container_name)
+        return _containers[key]
+
+
+def _get_or_create(driver, container_name):
     try:
         return driver.get_container(container_name)
     except ContainerDoesNotExistError:
+        pass
+    try:
         return driver.create_container(container_name)
+    except ContainerAlreadyExistsError:
+        # Another process created it in the meantime.
+        return driver.get_container(container_name)
+
+
+def reset():
+    """Forget the configuration, the pooled drivers and the containers
+    looked up, such as after the configuration changes."""
+    _read_config.cache_clear()
+    with _lock:
+        _drivers.clear()
+        _containers.clear()
+        _container_locks.clear()
+
+
+def list_objects(driver, container, prefix=None):
+    """Return a dictionary of the objects in `container` by name, listing
+    only those whose names start with `prefix` if given. Providers return
+    up to a page of objects per request, rather than needing a request
+    per object."""
+    return {obj.name: obj
+            for obj in driver.list_container_objects(container, prefix=prefix)}
 
 
 def upload_object(driver, container, object_name, data):
-    """Upload an object through libcloud.storage's upload_object_via_stream."""
+    """Upload an object through libcloud.storage's upload_object_via_stream.
+
+    `data` is either the content itself or an iterable of byte strings,
+    which is uploaded as it's consumed."""
 
-    if not getattr(data, "__next__", False):
-        data = io.StringIO(data)
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    if isinstance(data, bytes):
+        data = (data,)
 
-    return driver.upload_object_via_stream(data, container, object_name)
+    return driver.upload_object_via_stream(iter(data), container, object_name)
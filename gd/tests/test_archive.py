@@ -0,0 +1,155 @@
+from unittest.mock import patch
+import argparse
+import os
+import shutil
+import tempfile
+import unittest
+
+from gd import archive
+from gd import parser
+from gd.scripts import util
+
+SAMPLE_DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           os.pardir, os.pardir, "sample_data")
+
+DAY = "http://gd.mlb.com/components/game/mlb/year_2013/month_05/day_01/"
+
+
+class Test_member_name(unittest.TestCase):
+    """Test gd.archive.member_name"""
+
+    def test_member_name(self):
+        self.assertEqual(archive.member_name(DAY + "gid_1/game.xml"),
+                         (2013, "month_05/day_01/gid_1/game.xml"))
+
+    def test_no_season(self):
+        self.assertIsNone(archive.member_name("http://gd.mlb.com/test.xml"))
+
+
+class ArchiveTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+
+    def _open(self):
+        opened = archive.Archive(self.root)
+        self.addCleanup(opened.close)
+        return opened
+
+
+class Test_ArchiveWriter(ArchiveTestCase):
+    """Test gd.archive.ArchiveWriter"""
+
+    def test_write(self):
+        with archive.ArchiveWriter(self.root) as writer:
+            self.assertTrue(writer.write(DAY + "gid_1/game.xml", b"<game/>"))
+            self.assertIn(DAY + "gid_1/game.xml", writer)
+            self.assertNotIn(DAY + "gid_2/game.xml", writer)
+            # The same content isn't stored twice.
+            self.assertFalse(writer.write(DAY + "gid_1/game.xml", b"<game/>"))
+            self.assertFalse(writer.write("http://gd.mlb.com/x.xml", b""))
+
+        self.assertEqual(len(os.listdir(self.root)), 1)
+        self.assertEqual(self._open().read_game("gid_1", "game.xml"),
+                         b"<game/>")
+
+    def test_later_runs(self):
+        with archive.ArchiveWriter(self.root) as writer:
+            writer.write(DAY + "gid_1/game.xml", b"<game/>")
+            writer.write(DAY + "gid_1/players.xml", b"<game/>")
+        with archive.ArchiveWriter(self.root) as writer:
+            # Files are known from the zips written before.
+            self.assertIn(DAY + "gid_1/game.xml", writer)
+            self.assertFalse(writer.write(DAY + "gid_1/game.xml", b"<game/>"))
+            self.assertTrue(writer.write(DAY + "gid_1/game.xml",
+                                         b"<game type='R'/>"))
+
+        self.assertEqual(len(os.listdir(self.root)), 2)
+        opened = self._open()
+        self.assertEqual(opened.read_game("gid_1", "game.xml"),
+                         b"<game type='R'/>")
+        self.assertEqual(opened.read_game("gid_1", "players.xml"),
+                         b"<game/>")
+
+    def test_roll_over(self):
+        with archive.ArchiveWriter(self.root, max_files=2) as writer:
+            for num in range(5):
+                writer.write(DAY + "gid_%d/game.xml" % num, b"<game/>")
+
+        self.assertEqual(len(os.listdir(self.root)), 3)
+        self.assertEqual(sorted(self._open().games),
+                         ["gid_%d" % num for num in range(5)])
+
+    def test_interrupted_scrape(self):
+        def download(urls, workers=1, archive=None, revalidate=False):
+            archive.write(DAY + "gid_1/game.xml", b"<game/>")
+            raise KeyboardInterrupt
+
+        args = argparse.Namespace(
+            download=True, upload=False, archive=self.root, revalidate=False,
+            begin=None, end=None, listing_cache=None, workers=1,
+            players=False)
+        close = patch.object(archive.ArchiveWriter, "close", autospec=True,
+                             side_effect=archive.ArchiveWriter.close)
+        with patch("gd.scrape.get_files_in_range", return_value=[]), \
+                patch("gd.scrape.download", download), close as mock_close:
+            self.assertRaises(KeyboardInterrupt, util.do_scrape, args)
+
+        # What was downloaded before the run stopped is kept.
+        self.assertEqual(mock_close.call_count, 1)
+        self.assertEqual(list(self._open().games), ["gid_1"])
+
+    def test_incomplete(self):
+        with archive.ArchiveWriter(self.root) as writer:
+            writer.write(DAY + "gid_1/game.xml", b"<game/>")
+        with open(os.path.join(self.root, "year_2013-9.zip"), "wb") as fh:
+            fh.write(b"PK\x03\x04")
+
+        with archive.ArchiveWriter(self.root) as writer:
+            self.assertIn(DAY + "gid_1/game.xml", writer)
+        self.assertEqual(list(self._open().games), ["gid_1"])
+
+
+class Test_Archive(ArchiveTestCase):
+    """Test gd.archive.Archive and parse_game"""
+
+    def setUp(self):
+        super().setUp()
+        with archive.ArchiveWriter(self.root) as writer:
+            for name in ("game.xml", "players.xml", "inning/inning_all.xml",
+                         "batters/112526.xml", "pitchers/112526.xml"):
+                with open(os.path.join(SAMPLE_DATA, name), "rb") as fh:
+                    writer.write(DAY + "gid_1/" + name, fh.read())
+            writer.write(DAY + "gid_2/game.xml", b"<game/>")
+
+    def test_games(self):
+        opened = self._open()
+
+        self.assertEqual(sorted(opened.games), ["gid_1", "gid_2"])
+        self.assertTrue(opened.has_game_files("gid_1"))
+        self.assertFalse(opened.has_game_files("gid_2"))
+        prefix = "year_2013/month_05/day_01/gid_1/"
+        self.assertEqual(opened.player_files("gid_1"),
+                         [prefix + "batters/112526.xml",
+                          prefix + "pitchers/112526.xml"])
+        self.assertIn(prefix + "game.xml", opened)
+
+        path = os.path.join(SAMPLE_DATA, "batters", "112526.xml")
+        self.assertEqual(
+            opened.player_file_key(prefix + "batters/112526.xml"),
+            parser.player_file_key(path))
+
+    def test_parse_game(self):
+        opened = self._open()
+        key = (self.root, "gid_1", tuple(opened.player_files("gid_1")))
+        self.addCleanup(archive._open.cache_clear)
+
+        parsed = archive.parse_game(key)
+
+        paths = [os.path.join(SAMPLE_DATA, name)
+                 for name in ("game.xml", "inning/inning_all.xml",
+                              "players.xml", "batters/112526.xml",
+                              "pitchers/112526.xml")]
+        expected = parser.parse_paths(paths)
+        self.assertEqual(parsed, expected)
@@ -0,0 +1,102 @@
+from datetime import date, timedelta
+from unittest.mock import patch
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from gd import cache
+
+
+class Test_last_date(unittest.TestCase):
+    """Test gd.cache.last_date"""
+
+    def test_undated(self):
+        self.assertIsNone(cache.last_date("http://example.com/mlb/"))
+
+    def test_year(self):
+        actual = cache.last_date("http://example.com/year_2013/")
+        self.assertEqual(actual, date(2013, 12, 31))
+
+    def test_month(self):
+        actual = cache.last_date("http://example.com/year_2012/month_02/")
+        self.assertEqual(actual, date(2012, 2, 29))
+
+    def test_day(self):
+        actual = cache.last_date(
+            "http://example.com/year_2013/month_05/day_01/")
+        self.assertEqual(actual, date(2013, 5, 1))
+
+    def test_game(self):
+        actual = cache.last_date(
+            "http://example.com/year_2013/month_05/day_01/"
+            "gid_2013_05_01_anamlb_oakmlb_1/inning/")
+        self.assertEqual(actual, date(2013, 5, 1))
+
+
+class Test_ListingCache(unittest.TestCase):
+    """Test gd.cache.ListingCache"""
+
+    old = "http://example.com/year_2013/month_05/day_01/"
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.cache = cache.ListingCache(os.path.join(self.root, "c.db"),
+                                        ttl=60)
+        self.addCleanup(self.cache.close)
+
+    def _today(self):
+        today = date.today()
+        return "http://example.com/" + today.strftime(
+            "year_%Y/month_%m/day_%d/")
+
+    def test_missing(self):
+        self.assertIsNone(self.cache.get(self.old))
+
+    def test_store(self):
+        self.cache.store(self.old, ["gid_1/", "gid_2/"])
+        self.assertEqual(self.cache.get(self.old), ["gid_1/", "gid_2/"])
+
+    def test_store_empty(self):
+        self.cache.store(self.old, [])
+        self.assertEqual(self.cache.get(self.old), [])
+
+    def test_is_settled(self):
+        today = date(2013, 5, 3)
+        self.assertTrue(self.cache.is_settled(self.old, today))
+        self.assertFalse(self.cache.is_settled(self.old,
+                                               today - timedelta(days=1)))
+        self.assertFalse(self.cache.is_settled("http://example.com/", today))
+
+    @patch("gd.cache.time")
+    def test_settled_never_expires(self, mock_time):
+        fetched = time.mktime((2013, 5, 3, 12, 0, 0, 0, 0, -1))
+        mock_time.time.return_value = fetched
+        self.cache.store(self.old, ["gid_1/"])
+        mock_time.time.return_value = fetched + 10 ** 9
+        self.assertEqual(self.cache.get(self.old), ["gid_1/"])
+
+    @patch("gd.cache.time")
+    def test_fetched_before_settled_expires(self, mock_time):
+        # A listing fetched while its date was current keeps expiring once
+        # the date settles, so files added later are still found.
+        url = self._today()
+        fetched = time.time()
+        mock_time.time.return_value = fetched
+        self.cache.store(url, ["gid_1/"])
+
+        mock_time.time.return_value = fetched + 3 * 24 * 60 * 60
+        self.assertIsNone(self.cache.get(url))
+
+    @patch("gd.cache.time")
+    def test_current_expires(self, mock_time):
+        url = self._today()
+        mock_time.time.return_value = 1000
+        self.cache.store(url, ["gid_1/"])
+
+        mock_time.time.return_value = 1059
+        self.assertEqual(self.cache.get(url), ["gid_1/"])
+        mock_time.time.return_value = 1061
+        self.assertIsNone(self.cache.get(url))
@@ -0,0 +1,53 @@
+from unittest.mock import patch
+import os
+import unittest
+
+from gd import etree
+from gd import parser
+
+SAMPLE_DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           os.pardir, os.pardir, "sample_data")
+
+
+class Test_use(unittest.TestCase):
+    """Test the gd.etree.use function."""
+
+    def tearDown(self):
+        etree.use()
+
+    def test_default(self):
+        with patch.dict("os.environ", clear=True):
+            etree.use()
+        self.assertEqual(etree.backend, etree.DEFAULT)
+
+    def test_environment(self):
+        with patch.dict("os.environ", {"GD_XML_BACKEND": "stdlib"}):
+            etree.use()
+        self.assertEqual(etree.backend, "stdlib")
+
+    def test_stdlib(self):
+        etree.use("stdlib")
+        self.assertEqual(etree.backend, "stdlib")
+        self.assertEqual(etree.fromstring(b"<a b='1'/>").attrib, {"b": "1"})
+
+    def test_unknown(self):
+        with self.assertRaises(Exception):
+            etree.use("nope")
+
+
+@unittest.skipUnless("lxml" in etree.BACKENDS, "lxml is not installed")
+class Test_backends(unittest.TestCase):
+    """Test that every backend parses Gameday data the same way."""
+
+    def tearDown(self):
+        etree.use()
+
+    def test_parse_paths(self):
+        paths = [os.path.join(SAMPLE_DATA, name)
+                 for name in ("game.xml", "inning/inning_all.xml",
+                              "players.xml")]
+        results = {}
+        for name in etree.BACKENDS:
+            etree.use(name)
+            results[name] = parser.parse_paths(paths)
+        self.assertEqual(results["lxml"], results["stdlib"])
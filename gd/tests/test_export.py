@@ -0,0 +1,110 @@
+from datetime import date, datetime, time
+import os
+import shutil
+import tempfile
+import unittest
+
+from sqlalchemy import (Boolean, Column, Date, DateTime, ForeignKey,
+                        Integer, MetaData, Numeric, String, Table, Time,
+                        create_engine)
+
+from gd import export
+
+metadata = MetaData()
+games = Table("game", metadata,
+              Column("game_pk", Integer, primary_key=True),
+              Column("date", Date, nullable=False))
+plays = Table("play", metadata,
+              Column("id", Integer, primary_key=True),
+              Column("game_pk", Integer, ForeignKey("game.game_pk"),
+                     nullable=False),
+              Column("des", String, nullable=False),
+              Column("zone", Integer),
+              Column("px", Numeric),
+              Column("score", Boolean),
+              Column("tfs", Time),
+              Column("tfs_zulu", DateTime))
+
+ROWS = [(1, 10, "Ball", 7, 0.5, True, time(19, 38, 3),
+         datetime(2013, 5, 1, 19, 38, 3)),
+        (2, 10, "Strike", None, None, None, None, None)]
+
+
+@unittest.skipIf(export.numpy is None, "numpy is not installed")
+class Test_to_arrays(unittest.TestCase):
+    """Test gd.export.column_kinds and to_arrays"""
+
+    def test_kinds(self):
+        self.assertEqual(export.column_kinds(plays),
+                         [("id", "int"), ("game_pk", "int"), ("des", "str"),
+                          ("zone", "float"), ("px", "float"),
+                          ("score", "bool"), ("tfs", "time"),
+                          ("tfs_zulu", "datetime")])
+
+    def test_to_arrays(self):
+        arrays = export.to_arrays(ROWS, export.column_kinds(plays))
+        numpy = export.numpy
+        self.assertEqual(arrays["id"].dtype, numpy.int64)
+        self.assertEqual(arrays["zone"][0], 7)
+        self.assertTrue(numpy.isnan(arrays["zone"][1]))
+        self.assertTrue(numpy.isnan(arrays["px"][1]))
+        self.assertEqual(list(arrays["score"]), [True, False])
+        self.assertEqual(list(arrays["des"]), ["Ball", "Strike"])
+        self.assertEqual(arrays["tfs"][0], numpy.timedelta64(70683, "s"))
+        self.assertTrue(numpy.isnat(arrays["tfs_zulu"][1]))
+
+    def test_empty(self):
+        arrays = export.to_arrays([], export.column_kinds(plays))
+        self.assertEqual(len(arrays["px"]), 0)
+        self.assertEqual(arrays["px"].dtype, export.numpy.float64)
+
+
+@unittest.skipIf(export.numpy is None, "numpy is not installed")
+class Test_export_table(unittest.TestCase):
+    """Test gd.export.write, load and export_table"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.engine = create_engine("sqlite://")
+        metadata.create_all(self.engine)
+        self.engine.execute(games.insert(), [
+            {"game_pk": 10, "date": date(2013, 5, 1)},
+            {"game_pk": 11, "date": date(2014, 4, 2)}])
+        rows = [dict(zip(plays.columns.keys(), row)) for row in ROWS]
+        rows.append(dict(rows[1], id=3, game_pk=11, des="Foul", px=1.25))
+        self.engine.execute(plays.insert(), rows)
+
+    def test_round_trip(self):
+        arrays = export.to_arrays(ROWS, export.column_kinds(plays))
+        for fmt in sorted(export.FORMATS):
+            with self.subTest(fmt=fmt):
+                path = os.path.join(self.root, "part" + export.FORMATS[fmt])
+                export.write(arrays, path, fmt)
+                actual = export.load(path)
+                self.assertEqual(sorted(actual), sorted(arrays))
+                self.assertEqual(list(actual["id"]), [1, 2])
+                self.assertEqual(list(actual["des"]), ["Ball", "Strike"])
+                self.assertEqual(actual["px"][0], 0.5)
+
+    def test_unknown_format(self):
+        self.assertRaises(ValueError, export.write, {}, "x", "csv")
+
+    def test_export_table(self):
+        for fmt in sorted(export.FORMATS):
+            with self.subTest(fmt=fmt):
+                count = export.export_table(self.engine, plays, games,
+                                            self.root, fmt)
+                self.assertEqual(count, 3)
+
+                first = export.partition_path(self.root, plays,
+                                              date(2013, 5, 1), fmt)
+                self.assertEqual(os.path.relpath(first, self.root),
+                                 os.path.join("play", "season=2013",
+                                              "date=2013-05-01",
+                                              "part" + export.FORMATS[fmt]))
+                self.assertEqual(list(export.load(first)["id"]), [1, 2])
+
+                second = export.partition_path(self.root, plays,
+                                               date(2014, 4, 2), fmt)
+                self.assertEqual(list(export.load(second)["px"]), [1.25])
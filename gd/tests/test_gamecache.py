@@ -0,0 +1,58 @@
+from unittest.mock import patch
+import os
+import shutil
+import tempfile
+import unittest
+
+from gd import gamecache
+from gd import parser
+from gd import utils
+
+SAMPLE_DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           os.pardir, os.pardir, "sample_data")
+PATHS = [os.path.join(SAMPLE_DATA, name)
+         for name in ("game.xml", "inning/inning_all.xml", "players.xml")]
+
+
+class Test_gamecache(unittest.TestCase):
+    """Test gd.gamecache"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.contents = [utils.read_gameday(path) for path in PATHS]
+
+    def test_round_trip(self):
+        parsed = gamecache.parse_game(self.contents, None)
+        actual = gamecache.loads(gamecache.dumps(parsed))
+
+        self.assertEqual(actual, parsed)
+        self.assertEqual(type(actual["game"]), type(parsed["game"]))
+        self.assertEqual(type(actual["pitches"][0]),
+                         type(parsed["pitches"][0]))
+
+    def test_game_key(self):
+        key = gamecache.game_key(self.contents)
+
+        self.assertEqual(gamecache.game_key(self.contents), key)
+        changed = self.contents[:2] + [self.contents[2] + b" "]
+        self.assertNotEqual(gamecache.game_key(changed), key)
+        with patch("gd.gamecache.CACHE_VERSION", gamecache.CACHE_VERSION + 1):
+            self.assertNotEqual(gamecache.game_key(self.contents), key)
+
+    def test_cached(self):
+        with patch("gd.parser.parse_game", wraps=parser.parse_game) as mock:
+            first = gamecache.parse_game(self.contents, self.root)
+            second = gamecache.parse_game(self.contents, self.root)
+
+        self.assertEqual(mock.call_count, 1)
+        self.assertEqual(first, second)
+        key = gamecache.game_key(self.contents)
+        self.assertTrue(os.path.exists(gamecache.cache_path(self.root, key)))
+
+    def test_parse_paths(self):
+        paths = PATHS + [os.path.join(SAMPLE_DATA, "batters", "112526.xml")]
+
+        expected = parser.parse_paths(paths)
+        self.assertEqual(gamecache.parse_paths(paths, self.root), expected)
+        self.assertEqual(gamecache.parse_paths(paths, self.root), expected)
@@ -0,0 +1,78 @@
+from unittest.mock import patch
+import os
+import unittest
+
+from gd import ingest
+
+SAMPLE_DATA = os.path.join(os.path.dirname(__file__), os.pardir, os.pardir,
+                           "sample_data")
+
+
+def _sample_files():
+    files = {}
+    for name in ("game.xml", "players.xml", "inning/inning_all.xml"):
+        with open(os.path.join(SAMPLE_DATA, name), "rb") as fh:
+            files[name] = fh.read()
+    return files
+
+
+class Test_parse_files(unittest.TestCase):
+    """Test gd.ingest.parse_files"""
+
+    def test_parse(self):
+        parsed = ingest.parse_files(_sample_files())
+        self.assertEqual(parsed["game"].game_pk, 347148)
+        self.assertEqual(len(parsed["atbats"]), 80)
+
+
+class Test_ingest(unittest.TestCase):
+    """Test gd.ingest.ingest"""
+
+    def setUp(self):
+        self.files = _sample_files()
+
+    def _fetch(self, game, save=False, compression=None):
+        return None if game == "missing" else self.files
+
+    def test_ingest(self):
+        games = ["game%d" % i for i in range(10)] + ["missing"]
+        loaded = []
+
+        def load(parsed):
+            loaded.append(parsed["game"].game_pk)
+            return len(loaded) % 2 == 0
+
+        for workers in (1, 4):
+            with self.subTest(workers=workers):
+                del loaded[:]
+                with patch("gd.scrape.fetch_game", self._fetch):
+                    actual = ingest.ingest(games, load, workers,
+                                           queue_size=2)
+                self.assertEqual(len(loaded), 10)
+                self.assertEqual(actual, 5)
+
+    def test_save(self):
+        calls = []
+
+        def fetch(game, save=False, compression=None):
+            calls.append((game, save, compression))
+            return self.files
+
+        with patch("gd.scrape.fetch_game", fetch):
+            ingest.ingest(["game"], lambda parsed: True, save=True,
+                          compression="gzip")
+        self.assertEqual(calls, [("game", True, "gzip")])
+
+    def test_parse_error(self):
+        self.files["game.xml"] = b"<game"
+        with patch("gd.scrape.fetch_game", self._fetch):
+            self.assertRaises(Exception, ingest.ingest, ["game"],
+                              lambda parsed: True)
+
+    def test_fetch_error(self):
+        def fetch(game, save=False, compression=None):
+            raise ValueError(game)
+
+        with patch("gd.scrape.fetch_game", fetch):
+            self.assertRaises(ValueError, ingest.ingest, ["game"],
+                              lambda parsed: True)
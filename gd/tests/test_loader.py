@@ -0,0 +1,260 @@
+from unittest.mock import patch
+import argparse
+import os
+import shutil
+import tempfile
+import unittest
+
+try:
+    from libcloud.storage.drivers.local import LocalStorageDriver
+except ImportError:
+    # The local driver needs the fasteners package.
+    LocalStorageDriver = None
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from gd import database
+from gd import loader
+from gd import parser
+from gd import storage
+from gd import utils
+from gd.scripts import util
+from gd.models import (Action, AtBat, BatterStats, Game, Pitch, PitcherStats,
+                       Player, Stadium, Team, Umpire)
+
+SAMPLE_DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           os.pardir, os.pardir, "sample_data")
+
+MODELS = (Team, Player, Umpire, Stadium, Game, Action, AtBat, Pitch,
+          BatterStats, PitcherStats)
+
+
+def _parse_sample():
+    paths, = utils.find_games(SAMPLE_DATA)
+    return parser.parse_paths(paths + tuple(utils.find_player_files(
+        os.path.dirname(paths[0]))))
+
+
+def _with_game_pk(parsed, game_pk):
+    """Return a copy of the game `parsed` as though it were the game
+    `game_pk`, with the same teams and players but no player files."""
+    copy = dict(parsed, game=parsed["game"]._replace(game_pk=game_pk),
+                player_files=[])
+    for kind in ("atbats", "pitches", "actions"):
+        copy[kind] = [row._replace(game_pk=game_pk) for row in parsed[kind]]
+    return copy
+
+
+def _count(session, model):
+    return session.query(model).count()
+
+
+def _rows(session, model):
+    """Return every row of `model`'s table, in primary key order."""
+    table = model.__table__
+    return session.execute(
+        table.select().order_by(*table.primary_key.columns)).fetchall()
+
+
+class LoaderTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.parsed = _parse_sample()
+
+    def _session(self):
+        engine = create_engine("sqlite://")
+        database.Base.metadata.create_all(engine)
+        session = sessionmaker(bind=engine)()
+        self.addCleanup(session.close)
+        return session
+
+    def _load(self, session, bulk=False):
+        known = loader.load_known_ids(session)
+        self.assertTrue(loader.load_game(session, self.parsed, known, bulk))
+        session.commit()
+        return known
+
+
+class Test_load_game(LoaderTestCase):
+    """Test gd.loader.load_game"""
+
+    def test_bulk_matches_orm(self):
+        orm = self._session()
+        bulk = self._session()
+        self._load(orm)
+        self._load(bulk, bulk=True)
+
+        for model in MODELS:
+            with self.subTest(model=model.__name__):
+                rows = _rows(orm, model)
+                self.assertTrue(rows)
+                self.assertEqual(_rows(bulk, model), rows)
+
+    def test_link_pitches(self):
+        for bulk in (False, True):
+            with self.subTest(bulk=bulk):
+                session = self._session()
+                self._load(session, bulk)
+
+                pitches = session.query(Pitch).order_by(Pitch.pitch_id).all()
+                self.assertEqual(len(pitches), len(self.parsed["pitches"]))
+                for pitch in pitches:
+                    atbat = session.query(AtBat).get(pitch.atbat_id)
+                    self.assertIsNotNone(atbat)
+                    self.assertEqual((atbat.game_pk, atbat.num),
+                                     (pitch.game_pk, pitch.atbat_num))
+
+                for atbat in session.query(AtBat):
+                    expected = [pitch for pitch in pitches
+                                if pitch.atbat_num == atbat.num]
+                    actual = sorted(atbat.pitches, key=lambda p: p.pitch_id)
+                    self.assertEqual(actual, expected)
+
+
+class Test_known_ids(LoaderTestCase):
+    """Test gd.loader.load_known_ids and add_new"""
+
+    def test_empty(self):
+        known = loader.load_known_ids(self._session())
+        self.assertEqual(known[Player], set())
+        self.assertEqual(known["player_files"], set())
+
+    def test_duplicates(self):
+        session = self._session()
+        known = loader.load_known_ids(session)
+        players = self.parsed["players"]
+
+        loader.add_new(session, Player, players + players[:5], known[Player])
+        session.commit()
+
+        self.assertEqual(_count(session, Player), len(players))
+        self.assertEqual(known[Player], {row.id for row in players})
+
+    def test_second_game(self):
+        session = self._session()
+        known = self._load(session)
+        counts = {model: _count(session, model) for model in (Team, Player)}
+
+        second = _with_game_pk(self.parsed, 1)
+        self.assertTrue(loader.load_game(session, second, known))
+        session.commit()
+
+        for model, count in counts.items():
+            self.assertEqual(_count(session, model), count)
+        self.assertEqual(_count(session, Game), 2)
+        self.assertEqual(known[Game], {1, self.parsed["game"].game_pk})
+
+    def test_known_updated(self):
+        session = self._session()
+        known = self._load(session)
+
+        self.assertEqual(known, loader.load_known_ids(session))
+        self.assertIn(self.parsed["umpire"].id, known[Umpire])
+        self.assertIn(self.parsed["stadium"].id, known[Stadium])
+
+
+class Test_new_files(unittest.TestCase):
+    """Test gd.loader.new_files and is_skipped"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.known = {Game: set(), "player_files": set()}
+
+    def _copy(self, name, game_type):
+        game_dir = os.path.join(self.root, name)
+        shutil.copytree(SAMPLE_DATA, game_dir)
+        path = os.path.join(game_dir, "game.xml")
+        with open(path, "rb") as fh:
+            content = fh.read()
+        with open(path, "wb") as fh:
+            fh.write(content.replace(b'type="R"', b'type="%s"' % game_type))
+        return path
+
+    def test_skipped_types(self):
+        for game_type in (b"R", b"S", b"E"):
+            self._copy(game_type.decode(), game_type)
+
+        found = list(loader.new_files(utils.find_games(self.root),
+                                      self.known))
+
+        self.assertEqual([os.path.basename(os.path.dirname(paths[0]))
+                          for paths in found], ["R"])
+
+    def test_is_skipped(self):
+        path = self._copy("R", b"R")
+        self.assertFalse(loader.is_skipped(self.known, path))
+        self.known[Game].add(347148)
+        self.assertTrue(loader.is_skipped(self.known, path))
+
+
+class Test_do_import(unittest.TestCase):
+    """Test gd.scripts.util.do_import against a SQLite database"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        uri = "sqlite:///%s" % os.path.join(self.root, "gd.db")
+        for patcher in (patch.dict(os.environ, GD_DATABASE_URI=uri),
+                        patch.object(database, "_engine", None)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(database.session.remove)
+        database.init()
+
+    def _import(self, bulk=False, **kwargs):
+        args = dict(root=SAMPLE_DATA, container=None, archive=None,
+                    parse_cache=None, bulk=bulk, jobs=1, batch_size=1)
+        args.update(kwargs)
+        util.do_import(argparse.Namespace(**args))
+        database.session.remove()
+        session = database.session()
+        return {model: session.query(model).count() for model in MODELS}
+
+    def test_idempotent(self):
+        for bulk in (False, True):
+            with self.subTest(bulk=bulk):
+                first = self._import(bulk)
+                self.assertEqual(first[Game], 1)
+                self.assertEqual(first[Pitch], 323)
+                self.assertEqual(self._import(bulk), first)
+
+    def test_new_files(self):
+        self._import()
+        known = loader.load_known_ids(database.session)
+
+        self.assertEqual(
+            list(loader.new_files(utils.find_games(SAMPLE_DATA), known)), [])
+
+    @unittest.skipIf(LocalStorageDriver is None,
+                     "libcloud's local storage driver is unavailable")
+    def test_container(self):
+        storage.reset()
+        self.addCleanup(storage.reset)
+        os.mkdir(os.path.join(self.root, "storage"))
+        driver = LocalStorageDriver(os.path.join(self.root, "storage"))
+        container = driver.create_container("gd.mlb.com")
+        prefix = "gid_1/"
+        paths, = utils.find_games(SAMPLE_DATA)
+        for path in paths + tuple(utils.find_player_files(SAMPLE_DATA)):
+            name = os.path.relpath(path, SAMPLE_DATA).replace(os.sep, "/")
+            driver.upload_object(path, container, prefix + name)
+        patcher = patch("gd.storage.get_driver", return_value=driver)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        counts = []
+        for run in range(2):
+            cache = os.path.join(self.root, "cache%d" % run)
+            counts.append(self._import(
+                root=None, container="gd.mlb.com", prefix=None, cache=cache,
+                cache_size=1, prefetch=1))
+            files = [os.path.relpath(os.path.join(directory, name), cache)
+                     for directory, dirs, names in os.walk(cache)
+                     for name in names]
+            if run:
+                # Only game.xml is fetched for the game already loaded.
+                self.assertEqual(files, [os.path.join("gid_1", "game.xml")])
+        self.assertEqual(counts[0][Game], 1)
+        self.assertEqual(counts[1], counts[0])
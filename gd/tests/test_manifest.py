@@ -0,0 +1,69 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from gd import manifest
+
+
+class Test_Manifest(unittest.TestCase):
+    """Test gd.manifest.Manifest"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.manifest = manifest.Manifest(os.path.join(self.root, "m.db"))
+        self.addCleanup(self.manifest.close)
+
+    def _write(self, name, content=b"content"):
+        path = os.path.join(self.root, name)
+        with open(path, "wb") as fh:
+            fh.write(content)
+        return path
+
+    def test_missing(self):
+        self.assertIsNone(self.manifest.get("http://example.com/a.xml"))
+
+    def test_record(self):
+        url = "http://example.com/a.xml"
+        self.manifest.record(url, "a.xml", 7, "etag", "yesterday", "sha")
+        expected = manifest.Entry(url, "a.xml", 7, "etag", "yesterday",
+                                  "sha")
+        self.assertEqual(self.manifest.get(url), expected)
+
+    def test_record_replaces(self):
+        url = "http://example.com/a.xml"
+        self.manifest.record(url, "a.xml", 7, "etag", None, "sha")
+        self.manifest.record(url, "a.xml", 8, "etag2", None, "sha2")
+        self.assertEqual(self.manifest.get(url).size, 8)
+
+    def test_persists(self):
+        url = "http://example.com/a.xml"
+        self.manifest.record(url, "a.xml", 7, None, None, "sha")
+        other = manifest.Manifest(self.manifest.path)
+        self.addCleanup(other.close)
+        self.assertEqual(other.get(url).sha1, "sha")
+
+    def test_is_intact(self):
+        path = self._write("a.xml")
+        entry = manifest.Entry("url", path, 7, None, None, "sha")
+        self.assertTrue(self.manifest.is_intact(entry))
+
+    def test_is_intact_truncated(self):
+        path = self._write("a.xml", b"cont")
+        entry = manifest.Entry("url", path, 7, None, None, "sha")
+        self.assertFalse(self.manifest.is_intact(entry))
+
+    def test_is_intact_missing(self):
+        entry = manifest.Entry("url", "nope.xml", 7, None, None, "sha")
+        self.assertFalse(self.manifest.is_intact(entry))
+
+    def test_complete(self):
+        urls = ["http://example.com/a.xml", "http://example.com/b.xml"]
+        path = self._write("a.xml")
+        self.manifest.record(urls[0], path, 7, None, None, "sha")
+        self.assertFalse(self.manifest.complete(urls))
+
+        path = self._write("b.xml")
+        self.manifest.record(urls[1], path, 7, None, None, "sha")
+        self.assertTrue(self.manifest.complete(urls))
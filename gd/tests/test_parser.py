@@ -1,19 +1,49 @@
 from datetime import datetime, date, time
+from unittest.mock import patch
+import gzip
+import io
+import os
+import shutil
+import tempfile
 import unittest
 
 from pretend import stub
 
+from gd import etree
 from gd import parser
 
+SAMPLE_DATA = os.path.join(os.path.dirname(__file__), os.pardir, os.pardir,
+                           "sample_data")
+
+
+class Test_read(unittest.TestCase):
+    """Test the gd.parser.read function."""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+
+    def test_plain(self):
+        path = os.path.join(self.root, "game.xml")
+        with open(path, "wb") as fh:
+            fh.write(b'<!--c--><game type="R"/>')
+        self.assertEqual(parser.read(path).attrib, {"type": "R"})
+
+    def test_gzip(self):
+        path = os.path.join(self.root, "game.xml.gz")
+        with gzip.open(path, "wb") as fh:
+            fh.write(b'<!--c--><game type="R"/>')
+        self.assertEqual(parser.read(path).attrib, {"type": "R"})
+
 
 class Test_get_game(unittest.TestCase):
     """Test the gd.parser.get_game function."""
 
     def test_get_game(self):
-        expected = {"local_game_time": "12:00"}
-        tree = stub(attrib=expected)
+        tree = stub(attrib={"local_game_time": "12:00", "other": "x"})
         actual = parser.get_game(tree)
-        self.assertEqual(actual, expected)
+        self.assertEqual(actual, {"local_game_time": time(12, 0)})
+        self.assertEqual(tree.attrib["local_game_time"], "12:00")
 
 
 class Test_get_date(unittest.TestCase):
@@ -101,10 +131,10 @@ class Test_get_actions(unittest.TestCase):
         tree = stub(findall=lambda arg: [value])
         actual = parser.get_actions(tree)
 
-        expected = {"tfs": time(12, 34),
-                    "tfs_zulu": datetime(2014, 7, 19, 23, 12, 35),
-                    "id": "987654"}
-        self.assertEqual(list(actual), [expected])
+        action, = actual
+        self.assertEqual(action.tfs, time(12, 34))
+        self.assertEqual(action.tfs_zulu, datetime(2014, 7, 19, 23, 12, 35))
+        self.assertIsNone(action.game_pk)
 
 
 class Test_get_atbats(unittest.TestCase):
@@ -125,17 +155,19 @@ class Test_get_atbats(unittest.TestCase):
         tree = stub(findall=lambda arg: [atbat])
 
         actual = parser.get_atbats(tree)
-        expected = {"start_tfs": time(12, 34),
-                    "start_tfs_zulu": datetime(2014, 7, 19, 23, 12, 35),
-                    "score": True}
-        self.assertEqual(list(actual), [expected])
+        atbat, = actual
+        self.assertEqual(atbat.start_tfs, time(12, 34))
+        self.assertEqual(atbat.start_tfs_zulu,
+                         datetime(2014, 7, 19, 23, 12, 35))
+        self.assertIs(atbat.score, True)
 
 
 class Test_get_pitches(unittest.TestCase):
     """Test the gd.parser.get_pitches function."""
 
     def test_get_pitches(self):
-        atbat_attribs = {"start_tfs_zulu": "2014-07-19T23:12:35Z"}
+        atbat_attribs = {"start_tfs_zulu": "2014-07-19T23:12:35Z",
+                         "num": "4"}
         pitch_attribs = {"tfs": "123456",
                          "tfs_zulu": "2014-07-19T23:15:35Z"}
         pitch_value = stub(attrib=pitch_attribs)
@@ -145,7 +177,158 @@ class Test_get_pitches(unittest.TestCase):
         tree = stub(findall=lambda arg: [atbat])
 
         actual = parser.get_pitches(tree)
-        expected = {"tfs": time(12, 34),
-                    "tfs_zulu": datetime(2014, 7, 19, 23, 15, 35),
-                    "start_tfs_zulu": datetime(2014, 7, 19, 23, 12, 35)}
-        self.assertEqual(list(actual), [expected])
+        pitch, = actual
+        self.assertEqual(pitch.tfs, time(12, 34))
+        self.assertEqual(pitch.tfs_zulu, datetime(2014, 7, 19, 23, 15, 35))
+        self.assertEqual(pitch.start_tfs_zulu,
+                         datetime(2014, 7, 19, 23, 12, 35))
+        self.assertEqual(pitch.atbat_num, 4)
+        self.assertIsNone(pitch.atbat_id)
+
+
+class Test_iter_plays(unittest.TestCase):
+    """Test the gd.parser.iter_plays and get_plays functions."""
+
+    path = os.path.join(SAMPLE_DATA, "inning", "inning_all.xml")
+
+    def test_matches_tree_parsers(self):
+        tree = parser.read(self.path)
+        expected = (list(parser.get_atbats(tree)),
+                    list(parser.get_pitches(tree)),
+                    list(parser.get_actions(tree)))
+        self.assertEqual(parser.get_plays(self.path), expected)
+
+    def test_file_object(self):
+        with open(self.path, "rb") as fh:
+            atbats, pitches, actions = parser.get_plays(fh)
+        self.assertEqual((len(atbats), len(pitches), len(actions)),
+                         (80, 326, 20))
+
+    def test_order(self):
+        source = io.BytesIO(
+            b'<game><inning num="1"><top>'
+            b'<atbat num="1" start_tfs="" start_tfs_zulu="">'
+            b'<pitch id="3" tfs="" tfs_zulu="" des="Ball"/></atbat>'
+            b'<action tfs="" tfs_zulu="" event="Delay"/>'
+            b'</top></inning></game>')
+        kinds = [kind for kind, play in parser.iter_plays(source)]
+        self.assertEqual(kinds, ["pitch", "atbat", "action"])
+
+    def test_elements_cleared(self):
+        seen = []
+        real_iterparse = etree.iterparse
+
+        def iterparse(source, events):
+            for event, element in real_iterparse(source, events):
+                seen.append(element)
+                yield event, element
+
+        with patch("gd.parser.etree.iterparse", iterparse):
+            list(parser.iter_plays(self.path))
+
+        root = seen[0]
+        self.assertEqual(root.tag, "game")
+        self.assertEqual(len(root), 0)
+        for element in seen:
+            if element.tag in ("atbat", "action"):
+                self.assertEqual(len(element), 0)
+                self.assertEqual(element.attrib, {})
+
+
+class Test_parse_game(unittest.TestCase):
+    """Test the gd.parser.parse_game function."""
+
+    def setUp(self):
+        paths = [os.path.join(SAMPLE_DATA, name)
+                 for name in ("game.xml", "inning/inning_all.xml",
+                              "players.xml")]
+        self.parsed = parser.parse_paths(paths)
+
+    def test_game(self):
+        game = self.parsed["game"]
+        self.assertEqual(game.game_pk, 347148)
+        self.assertEqual(game.date, date(2013, 5, 1))
+        self.assertEqual(game.local_game_time, time(12, 35))
+        self.assertEqual(game.home_team, 133)
+        self.assertEqual(game.away_team, 108)
+        self.assertEqual(game.stadium, 10)
+        self.assertEqual(game.umpire_id, self.parsed["umpire"].id)
+
+    def test_counts(self):
+        self.assertEqual(len(self.parsed["teams"]), 2)
+        self.assertEqual(len(self.parsed["players"]), 63)
+        self.assertEqual(len(self.parsed["atbats"]), 80)
+        self.assertEqual(len(self.parsed["pitches"]), 323)
+        self.assertEqual(len(self.parsed["actions"]), 20)
+
+    def test_tied_to_game(self):
+        for kind in ("atbats", "pitches", "actions"):
+            with self.subTest(kind=kind):
+                pks = {r.game_pk for r in self.parsed[kind]}
+                self.assertEqual(pks, {347148})
+
+    def test_no_hit_by_pitch(self):
+        des = {p.des for p in self.parsed["pitches"]}
+        self.assertNotIn("Hit By Pitch", des)
+
+    def test_atbat_num(self):
+        nums = {a.num for a in self.parsed["atbats"]}
+        for pitch in self.parsed["pitches"]:
+            self.assertIn(pitch.atbat_num, nums)
+        self.assertEqual(self.parsed["pitches"][0].atbat_num, 1)
+
+    def test_typed(self):
+        pitch = self.parsed["pitches"][0]
+        self.assertEqual(pitch.id, 3)
+        self.assertEqual(pitch.start_speed, 85.5)
+        self.assertEqual(pitch.zone, 7)
+        self.assertEqual(pitch.type_confidence, 0.634)
+        self.assertIsNone(pitch.on_1b)
+        self.assertEqual(self.parsed["players"][0].team_id, 108)
+
+
+class Test_parse_player(unittest.TestCase):
+    """Test the gd.parser.parse_player and parse_player_file functions."""
+
+    def test_batter(self):
+        path = os.path.join(SAMPLE_DATA, "batters", "112526.xml")
+        parsed = parser.parse_player_file(path, "347148")
+
+        details = parsed["details"]
+        self.assertEqual(details.id, 112526)
+        self.assertEqual(details.height, "5-11")
+        self.assertEqual(details.weight, 265)
+        self.assertEqual(details.throws, "R")
+        self.assertEqual(details.dob, date(1973, 5, 24))
+        self.assertEqual(parser.player_file_key(path),
+                         (112526, parsed["sha1"]))
+
+        splits = [row.split for row in parsed["stats"]]
+        self.assertEqual(splits[:3], ["season", "career", "month"])
+        self.assertNotIn("pitch", splits)
+        career = parsed["stats"][1]
+        self.assertEqual((career.player_id, career.game_pk, career.sha1),
+                         (112526, 347148, parsed["sha1"]))
+        self.assertEqual((career.ab, career.h, career.avg), (90, 10, 0.111))
+
+    def test_pitcher(self):
+        source = (b'<Player id="1" type="pitcher" dob="01/02/1980">'
+                  b'<season avg=".250" ab="4" w="1" ip="6.1" whip="-.--"/>'
+                  b'<Pitch out="--"/></Player>')
+        parsed = parser.parse_player(etree.fromstring(source), 5, "abc")
+        season, = parsed["stats"]
+        self.assertEqual(season.split, "season")
+        self.assertEqual((season.ab, season.w, season.ip, season.whip),
+                         (4, 1, 6.1, None))
+        self.assertEqual(parsed["details"].dob, date(1980, 1, 2))
+
+    def test_parse_paths(self):
+        paths = [os.path.join(SAMPLE_DATA, name)
+                 for name in ("game.xml", "inning/inning_all.xml",
+                              "players.xml", "batters/112526.xml",
+                              "pitchers/112526.xml")]
+        parsed = parser.parse_paths(paths)
+        self.assertEqual(len(parsed["player_files"]), 2)
+        self.assertEqual({f["stats"][0].game_pk
+                          for f in parsed["player_files"]}, {347148})
+        self.assertEqual(parser.parse_paths(paths[:3])["player_files"], [])
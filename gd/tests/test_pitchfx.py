@@ -0,0 +1,89 @@
+import os
+import unittest
+
+from gd import parser
+from gd import pitchfx
+
+numpy = pitchfx.numpy
+
+SAMPLE_DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           os.pardir, os.pardir, "sample_data")
+
+
+def _sample_pitches():
+    """Return the sample game's pitches as a dictionary of arrays."""
+    path = os.path.join(SAMPLE_DATA, "inning", "inning_all.xml")
+    pitches = [pitch for pitch in parser.get_plays(path)[1]
+               if pitch.x0 is not None]
+    names = pitchfx._FIT + ("px", "pz", "pfx_x", "pfx_z", "start_speed",
+                            "end_speed", "sz_top", "sz_bot")
+    return {name: numpy.array([getattr(pitch, name) for pitch in pitches],
+                              dtype=float)
+            for name in names}
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class Test_straight_pitch(unittest.TestCase):
+    """Test gd.pitchfx on a pitch without any acceleration."""
+
+    def setUp(self):
+        self.pitches = dict(x0=[0.0], y0=[50.0], z0=[6.0], vx0=[0.0],
+                            vy0=[-100.0], vz0=[-5.0], ax=[0.0], ay=[0.0],
+                            az=[0.0], sz_top=[3.5], sz_bot=[1.5])
+
+    def test_time_at(self):
+        self.assertAlmostEqual(pitchfx.time_at(self.pitches, 40.0)[0], 0.1)
+        self.assertAlmostEqual(pitchfx.time_at(self.pitches, 55.0)[0],
+                               -0.05)
+
+    def test_derive(self):
+        derived = pitchfx.derive(self.pitches)
+        self.assertAlmostEqual(derived["flight_time"][0],
+                               (55.0 - pitchfx.PLATE_Y) / 100)
+        self.assertAlmostEqual(derived["release_z"][0], 6.25)
+        self.assertAlmostEqual(derived["release_speed"][0],
+                               numpy.hypot(100, 5) * 3600 / 5280)
+        self.assertAlmostEqual(derived["vertical_angle"][0],
+                               -numpy.degrees(numpy.arctan(0.05)))
+        self.assertAlmostEqual(derived["horizontal_angle"][0], 0.0)
+        self.assertAlmostEqual(derived["pfx_x"][0], 0.0)
+        self.assertTrue(derived["in_zone"][0])
+
+    def test_missing_fit(self):
+        pitches = {name: [numpy.nan] for name in self.pitches}
+        derived = pitchfx.derive(pitches)
+        self.assertTrue(numpy.isnan(derived["plate_x"][0]))
+        self.assertFalse(derived["in_zone"][0])
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class Test_sample_game(unittest.TestCase):
+    """Check the derived values against those Gameday reports."""
+
+    def setUp(self):
+        self.pitches = _sample_pitches()
+        self.derived = pitchfx.derive(self.pitches)
+
+    def assertClose(self, actual, expected, tolerance):
+        self.assertLess(numpy.abs(actual - expected).max(), tolerance)
+
+    def test_plate_crossing(self):
+        self.assertClose(self.derived["plate_x"], self.pitches["px"], 0.01)
+        self.assertClose(self.derived["plate_z"], self.pitches["pz"], 0.01)
+
+    def test_movement(self):
+        self.assertClose(self.derived["pfx_x"], self.pitches["pfx_x"], 0.1)
+        self.assertClose(self.derived["pfx_z"], self.pitches["pfx_z"], 0.1)
+
+    def test_speed(self):
+        start = numpy.zeros(len(self.pitches["x0"]))
+        self.assertClose(pitchfx.speed(pitchfx.velocity_at(self.pitches,
+                                                           start)),
+                         self.pitches["start_speed"], 0.1)
+        self.assertClose(self.derived["plate_speed"],
+                         self.pitches["end_speed"], 0.1)
+
+    def test_zone(self):
+        high = self.derived["plate_z"] > self.pitches["sz_top"] + 0.5
+        self.assertFalse(self.derived["in_zone"][high].any())
+        self.assertTrue((self.derived["zone_height"][high] > 1).all())
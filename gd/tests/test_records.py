@@ -0,0 +1,61 @@
+from datetime import datetime, time
+from collections import namedtuple
+import unittest
+
+from gd import records
+
+
+class Test_converter(unittest.TestCase):
+    """Test the gd.records.converter function."""
+
+    def setUp(self):
+        self.Row = namedtuple("Row", "id name speed flag game")
+        self.convert = records.converter(self.Row, {
+            "id": records._int, "speed": records._float,
+            "flag": records._flag, "game": records._int}, extra=("game",))
+
+    def test_convert(self):
+        actual = self.convert({"id": "12", "name": "Ryne", "speed": "85.5",
+                               "flag": "T", "other": "ignored"})
+        self.assertEqual(actual, self.Row(12, "Ryne", 85.5, True, None))
+
+    def test_missing_and_empty(self):
+        actual = self.convert({"id": "", "name": ""})
+        self.assertEqual(actual, self.Row(None, "", None, False, None))
+
+    def test_extra(self):
+        actual = self.convert({"name": "Ryne", "game": "1"}, game="23")
+        self.assertEqual(actual.game, 23)
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, self.convert, {"id": "x"})
+
+    def test_unexpected_extra(self):
+        self.assertRaises(TypeError, self.convert, {}, name="Ryne")
+
+
+class Test_to_pitch(unittest.TestCase):
+    """Test the gd.records.to_pitch converter."""
+
+    def test_to_pitch(self):
+        pitch = records.to_pitch({"id": "3", "tfs": "193803",
+                                  "tfs_zulu": "2013-05-01T19:38:03Z",
+                                  "px": "-0.547", "on_1b": "",
+                                  "pitch_type": "FC"},
+                                 start_tfs_zulu="2013-05-01T19:36:31Z",
+                                 game_pk="347148")
+        self.assertEqual(pitch.id, 3)
+        self.assertEqual(pitch.tfs, time(19, 38))
+        self.assertEqual(pitch.tfs_zulu, datetime(2013, 5, 1, 19, 38, 3))
+        self.assertEqual(pitch.start_tfs_zulu,
+                         datetime(2013, 5, 1, 19, 36, 31))
+        self.assertEqual(pitch.px, -0.547)
+        self.assertIsNone(pitch.on_1b)
+        self.assertEqual(pitch.pitch_type, "FC")
+        self.assertEqual(pitch.game_pk, 347148)
+        self.assertIsNone(pitch.spin_rate)
+
+    def test_missing_times(self):
+        pitch = records.to_pitch({})
+        self.assertEqual(pitch.tfs, time.min)
+        self.assertEqual(pitch.tfs_zulu, datetime.min)
@@ -0,0 +1,177 @@
+from unittest.mock import patch
+import os
+import shutil
+import tempfile
+import unittest
+
+from pretend import stub
+
+try:
+    from libcloud.storage.drivers.local import LocalStorageDriver
+except ImportError:
+    # The local driver needs the fasteners package.
+    LocalStorageDriver = None
+
+from gd import remote
+from gd import storage
+from gd import utils
+
+DAY = "components/game/mlb/year_2013/month_05/day_01/"
+
+
+def _object(name, size):
+    return stub(name=name, size=size)
+
+
+class Test_ObjectCache(unittest.TestCase):
+    """Test gd.remote.ObjectCache"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.downloads = []
+
+        def download_object_as_stream(obj, chunk_size=None):
+            self.downloads.append(obj.name)
+            return [b"x" * obj.size]
+
+        self.driver = stub(
+            download_object_as_stream=download_object_as_stream)
+
+    def test_fetch(self):
+        cache = remote.ObjectCache(self.root, 100)
+        path = cache.fetch(self.driver, _object("a/game.xml", 10))
+
+        self.assertEqual(path, os.path.join(self.root, "a", "game.xml"))
+        with open(path, "rb") as fh:
+            self.assertEqual(fh.read(), b"x" * 10)
+        self.assertEqual(cache.size, 10)
+
+        # The copy is reused, by this cache or one opened later.
+        cache.fetch(self.driver, _object("a/game.xml", 10))
+        remote.ObjectCache(self.root, 100).fetch(
+            self.driver, _object("a/game.xml", 10))
+        self.assertEqual(self.downloads, ["a/game.xml"])
+
+    def test_changed_size(self):
+        cache = remote.ObjectCache(self.root, 100)
+        cache.fetch(self.driver, _object("a/game.xml", 10))
+        cache.fetch(self.driver, _object("a/game.xml", 12))
+
+        self.assertEqual(self.downloads, ["a/game.xml", "a/game.xml"])
+        self.assertEqual(cache.size, 12)
+
+    def test_evict(self):
+        cache = remote.ObjectCache(self.root, 25)
+        names = ["a/1.xml", "a/2.xml", "a/3.xml"]
+        for name in names:
+            cache.fetch(self.driver, _object(name, 10))
+        # Everything is pinned until it's released.
+        self.assertEqual(cache.size, 30)
+
+        cache.release(names[:2])
+        self.assertEqual(cache.size, 20)
+        self.assertFalse(os.path.exists(cache.local_path(names[0])))
+        self.assertTrue(os.path.exists(cache.local_path(names[1])))
+
+        # Using a file makes it the most recently used.
+        cache.release(names[2:])
+        cache.fetch(self.driver, _object(names[1], 10))
+        cache.release(names[1:2])
+        cache.fetch(self.driver, _object("a/4.xml", 10))
+        self.assertTrue(os.path.exists(cache.local_path(names[1])))
+        self.assertFalse(os.path.exists(cache.local_path(names[2])))
+        self.assertEqual(cache.size, 20)
+
+
+class Test_group_games(unittest.TestCase):
+    """Test gd.remote.group_games"""
+
+    def test_games(self):
+        names = ["game.xml", "inning/inning_all.xml", "players.xml",
+                 "batters/1.xml", "pitchers/2.xml", "boxscore.xml"]
+        objects = {DAY + "gid_1/" + name: _object(DAY + "gid_1/" + name, 1)
+                   for name in names}
+        # Incomplete games are left out, and compressed files are found.
+        for name in names[:2]:
+            objects[DAY + "gid_2/" + name] = _object(name, 1)
+        for name in ("game.xml.gz", "inning/inning_all.xml.zst",
+                     "players.xml"):
+            objects[DAY + "gid_3/" + name] = _object(DAY + "gid_3/" + name, 1)
+
+        games = remote.group_games(objects)
+
+        self.assertEqual([[obj.name for obj in game] for game in games],
+                         [[DAY + "gid_1/" + name
+                           for name in names[:3] + names[3:5]],
+                          [DAY + "gid_3/game.xml.gz",
+                           DAY + "gid_3/inning/inning_all.xml.zst",
+                           DAY + "gid_3/players.xml"]])
+
+
+@unittest.skipIf(LocalStorageDriver is None,
+                 "libcloud's local storage driver is unavailable")
+class Test_find_games(unittest.TestCase):
+    """Test gd.remote.find_games against libcloud's local storage driver"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        storage.reset()
+        self.addCleanup(storage.reset)
+
+        os.mkdir(os.path.join(self.root, "storage"))
+        self.driver = LocalStorageDriver(os.path.join(self.root, "storage"))
+        container = self.driver.create_container("gd.mlb.com")
+        for num in range(5):
+            for name in utils.GAME_FILES + ("batters/1.xml",):
+                self.driver.upload_object_via_stream(
+                    iter([("%d %s" % (num, name)).encode()]), container,
+                    "%sgid_%d/%s" % (DAY, num, name))
+
+        patcher = patch("gd.storage.get_driver", return_value=self.driver)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cache = remote.ObjectCache(os.path.join(self.root, "cache"))
+
+    def test_find_games(self):
+        games = list(remote.find_games("gd.mlb.com", DAY, self.cache,
+                                       prefetch=2))
+
+        self.assertEqual(len(games), 5)
+        for num, paths in enumerate(games):
+            for path, name in zip(paths, utils.GAME_FILES):
+                with utils.open_gameday(path) as fh:
+                    self.assertEqual(fh.read(),
+                                     ("%d %s" % (num, name)).encode())
+            # Player files are fetched alongside for loading with the game.
+            game_dir = os.path.dirname(paths[0])
+            self.assertEqual(utils.find_player_files(game_dir),
+                             [os.path.join(game_dir, "batters", "1.xml")])
+
+    def test_skip(self):
+        def skip(path):
+            with open(path, "rb") as fh:
+                return fh.read().startswith((b"0 ", b"3 "))
+
+        games = list(remote.find_games("gd.mlb.com", DAY, self.cache,
+                                       prefetch=2, skip=skip))
+
+        self.assertEqual([os.path.basename(os.path.dirname(paths[0]))
+                          for paths in games], ["gid_1", "gid_2", "gid_4"])
+        # Only game.xml is fetched for skipped games.
+        for num in (0, 3):
+            game_dir = "%sgid_%d/" % (DAY, num)
+            self.assertTrue(os.path.exists(
+                self.cache.local_path(game_dir + "game.xml")))
+            for name in utils.GAME_FILES[1:] + ("batters/1.xml",):
+                self.assertFalse(os.path.exists(
+                    self.cache.local_path(game_dir + name)))
+
+    def test_bounded(self):
+        # Each game is 4 files of about 20 bytes.
+        cache = remote.ObjectCache(os.path.join(self.root, "small"), 100)
+        for paths in remote.find_games("gd.mlb.com", DAY, cache, prefetch=1):
+            # The game being used is always complete.
+            self.assertTrue(all(os.path.exists(path) for path in paths))
+        self.assertLessEqual(cache.size, 200)
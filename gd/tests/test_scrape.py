@@ -1,12 +1,23 @@
-from unittest.mock import MagicMock, mock_open, patch
+from unittest.mock import MagicMock, patch
 from urllib.parse import urljoin
 import os
+import shutil
+import tempfile
 import unittest
 
 from pretend import stub
 from requests import HTTPError
 
+try:
+    from libcloud.storage.drivers.local import LocalStorageDriver
+except ImportError:
+    # The local driver needs the fasteners package.
+    LocalStorageDriver = None
+
+from gd import archive
 from gd import scrape
+from gd import storage
+from gd import utils
 
 
 class Test_web_scraper(unittest.TestCase):
@@ -27,14 +38,27 @@ class Test_web_scraper(unittest.TestCase):
         self.assertEqual(list(rv), [])
 
     @patch("requests.get")
-    @patch("gd.scrape.ElementTree.fromstring")
+    def test_get_not_found(self, mock_get):
+        response = MagicMock(status_code=404)
+        response.raise_for_status.side_effect = HTTPError
+        mock_get.return_value = response
+        cache = MagicMock()
+        cache.get.return_value = None
+
+        rv = scrape.web_scraper(["lol"], cache=cache)
+
+        self.assertEqual(list(rv), [])
+        cache.store.assert_called_once_with("lol", [])
+
+    @patch("requests.get")
+    @patch("gd.scrape.etree.fromstring")
     def test_bs_raises(self, mock_fromstring, mock_get):
         mock_fromstring.side_effect = Exception
         rv = scrape.web_scraper(["lol"])
         self.assertRaises(Exception, next, rv)
 
     @patch("requests.get")
-    @patch("gd.scrape.ElementTree.fromstring")
+    @patch("gd.scrape.etree.fromstring")
     def test_no_links(self, mock_fromstring, mock_get):
         source = MagicMock()
         source.findall.return_value = []
@@ -43,7 +67,7 @@ class Test_web_scraper(unittest.TestCase):
         self.assertEqual(list(rv), [])
 
     @patch("requests.get")
-    @patch("gd.scrape.ElementTree.fromstring")
+    @patch("gd.scrape.etree.fromstring")
     def test_matches(self, mock_fromstring, mock_get):
         root = "http://www.example.com"
         link1, link2 = MagicMock(), MagicMock()
@@ -67,7 +91,7 @@ class Test_web_scraper(unittest.TestCase):
         actual = list(scrape.web_scraper([]))
         self.assertEqual(actual, expected)
 
-    @patch("gd.scrape.ElementTree.fromstring")
+    @patch("gd.scrape.etree.fromstring")
     def test_requests_session(self, mock_fromstring):
         response = stub(raise_for_status=lambda: None, content="content")
         session = stub(get=lambda arg: response)
@@ -83,6 +107,41 @@ class Test_web_scraper(unittest.TestCase):
         rv = scrape.web_scraper([root], session=session)
         self.assertEqual(list(rv), expected)
 
+    @patch("gd.scrape._get_links")
+    def test_cache_hit(self, mock_get_links):
+        root = "http://www.example.com/"
+        cache = MagicMock()
+        cache.get.return_value = ["foo123", "bar456"]
+
+        rv = scrape.web_scraper([root], "foo", cache=cache)
+
+        self.assertEqual(list(rv), [urljoin(root, "foo123")])
+        self.assertFalse(mock_get_links.called)
+        self.assertFalse(cache.store.called)
+
+    @patch("gd.scrape._get_links")
+    def test_cache_miss(self, mock_get_links):
+        root = "http://www.example.com/"
+        cache = MagicMock()
+        cache.get.return_value = None
+        mock_get_links.return_value = ["foo123", "bar456"]
+
+        rv = scrape.web_scraper([root], "foo", cache=cache)
+
+        self.assertEqual(list(rv), [urljoin(root, "foo123")])
+        cache.store.assert_called_once_with(root, ["foo123", "bar456"])
+
+    @patch("gd.scrape._get_links")
+    def test_cache_error_not_stored(self, mock_get_links):
+        cache = MagicMock()
+        cache.get.return_value = None
+        mock_get_links.return_value = None
+
+        rv = scrape.web_scraper(["http://www.example.com/"], cache=cache)
+
+        self.assertEqual(list(rv), [])
+        self.assertFalse(cache.store.called)
+
 
 class Test_filesystem_scraper(unittest.TestCase):
     """Test gd.scrape.filesystem_scraper"""
@@ -123,9 +182,9 @@ class Test_get_urls(unittest.TestCase):
                 self.assertEqual(list(actual), list(expected))
 
     def test_get_files(self):
-        expected = ["players.xml",
-                    "game.xml",
-                    "inning_all.xml"]
+        expected = ["game.xml",
+                    "inning_all.xml",
+                    "players.xml"]
 
         def fake_scraper(root, match, session):
             """Just yield back the match, make sure we end up with
@@ -135,43 +194,246 @@ class Test_get_urls(unittest.TestCase):
         actual = scrape.get_files(["root"], source=fake_scraper)
         self.assertEqual(list(actual), list(expected))
 
+    def test_get_files_players(self):
+        def fake_scraper(roots, match, session):
+            yield from roots
+
+        actual = scrape.get_files(["root/"], source=fake_scraper,
+                                  players=True)
+        self.assertEqual(list(actual)[-2:], ["root/batters/",
+                                             "root/pitchers/"])
+
+
+class Test_get_days_in_range(unittest.TestCase):
+    """Test gd.scrape.get_days_in_range"""
+
+    def test_week(self):
+        def source(*args):
+            raise AssertionError("nothing should be listed")
+
+        begin = utils.get_boundary("2013-05-01")
+        end = utils.get_boundary("2013-05-07")
+        actual = list(scrape.get_days_in_range(begin, end, source))
+
+        self.assertEqual(len(actual), 7)
+        self.assertEqual(actual[0],
+                         urljoin(utils.WEB_ROOT, "year_2013/month_05/day_01/"))
+        self.assertEqual(actual[-1],
+                         urljoin(utils.WEB_ROOT, "year_2013/month_05/day_07/"))
+
+    def test_no_beginning(self):
+        def source(roots, match, session):
+            yield from [urljoin(roots[0], "year_2012/"),
+                        urljoin(roots[0], "year_2011/")]
+
+        begin = utils.get_boundary(None)
+        end = utils.get_boundary("2011-01-02")
+        actual = list(scrape.get_days_in_range(begin, end, source))
+
+        self.assertEqual(actual, [
+            urljoin(utils.WEB_ROOT, "year_2011/month_01/day_01/"),
+            urljoin(utils.WEB_ROOT, "year_2011/month_01/day_02/")])
+
+    def test_no_years(self):
+        def source(roots, match, session):
+            yield from []
+
+        empty = utils.get_boundary(None)
+        actual = scrape.get_days_in_range(empty, empty, source)
+        self.assertEqual(list(actual), [])
+
+
+class Test_crawl_files(unittest.TestCase):
+    """Test gd.scrape.crawl_files"""
+
+    listings = {
+        "day1/": ["day1/gid_1/", "day1/gid_2/"],
+        "day2/": ["day2/gid_3/"],
+        "day3/": [],
+    }
+
+    def fake_scraper(self, roots, match, session, cache=None):
+        root = roots[0]
+        if match == "gid":
+            yield from self.listings[root]
+        elif root.endswith("inning/"):
+            yield root + "inning_all.xml"
+        else:
+            yield root + "players.xml"
+            yield root + "game.xml"
+
+    def test_crawl(self):
+        expected = []
+        for game in ("day1/gid_1/", "day1/gid_2/", "day2/gid_3/"):
+            expected += [game + "players.xml", game + "game.xml",
+                         game + "inning/inning_all.xml"]
+
+        for workers in (1, 4):
+            with self.subTest(workers=workers):
+                with patch("gd.scrape.web_scraper", self.fake_scraper):
+                    actual = scrape.crawl_files(sorted(self.listings),
+                                                workers)
+                    self.assertEqual(sorted(actual), sorted(expected))
+
+    def test_files_before_days(self):
+        """Games found on the first day are crawled before later days."""
+        days = ["day%d/" % i for i in range(1, 4)]
+        seen = []
+
+        def fake_scraper(roots, match, session, cache=None):
+            seen.append(roots[0])
+            yield from self.fake_scraper(roots, match, session)
+
+        with patch("gd.scrape.web_scraper", fake_scraper):
+            actual = list(scrape.crawl_files(days, 1))
+
+        self.assertEqual(len(actual), 9)
+        self.assertLess(seen.index("day1/gid_1/"), seen.index("day2/"))
+
+    def test_listing_order(self):
+        """A day's games and their directories are listed in order."""
+        seen = []
+
+        def fake_scraper(roots, match, session, cache=None):
+            seen.append(roots[0])
+            yield from self.fake_scraper(roots, match, session)
+
+        with patch("gd.scrape.web_scraper", fake_scraper):
+            list(scrape.crawl_files(["day1/"], 1))
+
+        self.assertEqual(seen, ["day1/",
+                                "day1/gid_1/", "day1/gid_1/inning/",
+                                "day1/gid_2/", "day1/gid_2/inning/"])
+
+    def test_skip_complete_games(self):
+        listed = []
+
+        def fake_scraper(roots, match, session, cache=None):
+            listed.append(roots[0])
+            yield from self.fake_scraper(roots, match, session)
+
+        manifest = MagicMock()
+        manifest.complete = lambda urls: urls[0].startswith("day1/gid_1/")
+
+        with patch("gd.scrape.web_scraper", fake_scraper):
+            actual = list(scrape.crawl_files(["day1/"], 1, manifest))
+
+        self.assertEqual(len(actual), 6)
+        self.assertIn("day1/gid_1/inning/inning_all.xml", actual)
+        self.assertNotIn("day1/gid_1/", listed)
+        self.assertIn("day1/gid_2/", listed)
+
+    def test_players(self):
+        def fake_scraper(roots, match, session, cache=None):
+            if match == scrape.PLAYER_FILES:
+                yield roots[0] + "1.xml"
+            else:
+                yield from self.fake_scraper(roots, match, session)
+
+        manifest = MagicMock()
+        manifest.complete = lambda urls: urls[0].startswith("day1/gid_1/")
+
+        with patch("gd.scrape.web_scraper", fake_scraper):
+            actual = list(scrape.crawl_files(["day1/"], 1, manifest,
+                                             players=True))
+
+        self.assertEqual(len(actual), 10)
+        for game in ("day1/gid_1/", "day1/gid_2/"):
+            self.assertIn(game + "batters/1.xml", actual)
+            self.assertIn(game + "pitchers/1.xml", actual)
+
+    def test_no_days(self):
+        self.assertEqual(list(scrape.crawl_files([], 4)), [])
+
+
+class DownloadTestCase(unittest.TestCase):
+    """Run each test from within a temporary download root."""
+
+    def setUp(self):
+        cwd = os.getcwd()
+        self.root = tempfile.mkdtemp()
+        os.chdir(self.root)
+        self.addCleanup(shutil.rmtree, self.root)
+        self.addCleanup(os.chdir, cwd)
+
+    def _response(self, content=b"content", status_code=200, headers=None):
+        chunks = [content[i:i + 3] for i in range(0, len(content), 3)]
+        return MagicMock(status_code=status_code, headers=headers or {},
+                         iter_content=MagicMock(return_value=chunks))
+
+    def _read(self, path):
+        with utils.open_gameday(path) as fh:
+            return fh.read()
+
 
-class Test_download(unittest.TestCase):
+class Test_download(DownloadTestCase):
     """Test gd.scrape.download"""
 
     @patch("requests.Session.get")
-    @patch("os.makedirs")
-    def test_file(self, mock_makedirs, mock_get):
+    def test_file(self, mock_get):
         urls = ["http://gd.mlb.com/test1.xml", "http://gd.mlb.com/test2.xml"]
-        targets = ["gd.mlb.com/test1.xml", "gd.mlb.com/test1.xml"]
-        content = "content"
+        targets = ["gd.mlb.com/test1.xml", "gd.mlb.com/test2.xml"]
+        mock_get.return_value = self._response()
 
-        response = MagicMock()
-        response.raise_for_status = MagicMock()
-        response.content.side_effect = content
+        self.assertEqual(scrape.download(urls), 2)
+
+        for target in targets:
+            self.assertEqual(self._read(target), b"content")
+        # Only the finished files are left behind.
+        self.assertEqual(sorted(os.listdir("gd.mlb.com")),
+                         ["test1.xml", "test2.xml"])
+
+    @patch("requests.Session.get")
+    def test_binary(self, mock_get):
+        content = "caf\u00e9\n".encode("latin-1") + bytes(range(256))
+        mock_get.return_value = self._response(content)
+
+        scrape.download(["http://gd.mlb.com/test.xml"])
+
+        self.assertEqual(self._read("gd.mlb.com/test.xml"), content)
+
+    @patch("requests.Session.get")
+    def test_streamed(self, mock_get):
+        url = "http://gd.mlb.com/test.xml"
+        response = self._response()
         mock_get.return_value = response
 
-        mo = mock_open()
-        # Need to patch `open` within the gd.scrape namespace.
-        with patch("%s.open" % scrape.__name__, mo, create=True):
-            scrape.download(urls)
+        scrape.download([url])
 
-        mo.assert_any_call(targets[0], "w")
-        mo.assert_any_call(targets[1], "w")
+        mock_get.assert_called_once_with(url, headers={}, stream=True)
+        response.iter_content.assert_called_once_with(scrape.CHUNK_SIZE)
+        response.close.assert_called_once_with()
 
     @patch("requests.Session.get")
-    @patch("os.makedirs")
-    def test_directory(self, mock_makedirs, mock_get):
-        url = "http://gd.mlb.com/inning/"
+    def test_compression(self, mock_get):
+        mock_get.return_value = self._response()
+
+        for compression, suffix in utils.COMPRESSION.items():
+            with self.subTest(compression=compression):
+                scrape.download(["http://gd.mlb.com/test.xml"],
+                                compression=compression)
+                path = "gd.mlb.com/test.xml" + suffix
+                self.assertEqual(self._read(path), b"content")
+                self.assertEqual(utils.find_gameday("gd.mlb.com/test.xml"),
+                                 path)
+                os.remove(path)
 
-        response = MagicMock()
-        response.raise_for_status = MagicMock()
+    @patch("requests.Session.get")
+    def test_interrupted(self, mock_get):
+        response = self._response()
+        response.iter_content.side_effect = ConnectionError
         mock_get.return_value = response
 
-        mo = mock_open()
-        # Need to patch `open` within the gd.scrape namespace.
-        with patch("%s.open" % scrape.__name__, mo, create=True):
-            scrape.download([url])
+        self.assertRaises(ConnectionError, scrape.download,
+                          ["http://gd.mlb.com/test.xml"])
+        self.assertEqual(os.listdir("gd.mlb.com"), [])
+
+    @patch("requests.Session.get")
+    def test_directory(self, mock_get):
+        url = "http://gd.mlb.com/inning/"
+
+        self.assertEqual(scrape.download([url]), 0)
+        self.assertFalse(mock_get.called)
 
     @patch("requests.Session.get")
     def test_HTTPError(self, mock_get):
@@ -181,4 +443,272 @@ class Test_download(unittest.TestCase):
         response.raise_for_status = MagicMock(side_effect=HTTPError)
         mock_get.return_value = response
 
-        scrape.download([url])
+        self.assertEqual(scrape.download([url]), 0)
+
+    @patch("requests.Session.get")
+    def test_workers(self, mock_get):
+        urls = ["http://gd.mlb.com/test%d.xml" % i for i in range(20)]
+        urls.append("http://gd.mlb.com/inning/")
+        mock_get.return_value = self._response()
+
+        actual = scrape.download(urls, workers=4)
+
+        self.assertEqual(actual, 20)
+        self.assertEqual(mock_get.call_count, 20)
+
+    @patch("requests.Session.get")
+    def test_archive(self, mock_get):
+        day = ("http://gd.mlb.com/components/game/mlb/"
+               "year_2013/month_05/day_01/")
+        urls = [day + "gid_1/game.xml", day + "gid_1/inning/"]
+        mock_get.return_value = MagicMock(content=b"content")
+
+        with archive.ArchiveWriter("archive") as writer:
+            self.assertEqual(scrape.download(urls, archive=writer), 1)
+            # Files already archived aren't fetched again.
+            self.assertEqual(scrape.download(urls, archive=writer), 0)
+            self.assertEqual(
+                scrape.download(urls, archive=writer, revalidate=True), 0)
+
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertEqual(os.listdir(), ["archive"])
+        opened = archive.Archive("archive")
+        self.addCleanup(opened.close)
+        self.assertEqual(opened.read_game("gid_1", "game.xml"), b"content")
+
+
+class Test_download_manifest(DownloadTestCase):
+    """Test gd.scrape.download with a manifest"""
+
+    url = "http://gd.mlb.com/game.xml"
+
+    def _manifest(self, entry=None, intact=True):
+        return MagicMock(get=MagicMock(return_value=entry),
+                         is_intact=MagicMock(return_value=intact))
+
+    def _download(self, manifest, revalidate=False, status_code=200):
+        response = self._response(status_code=status_code,
+                                  headers={"ETag": "abc"})
+        with patch("requests.Session.get") as mock_get:
+            mock_get.return_value = response
+            count = scrape.download([self.url], manifest=manifest,
+                                    revalidate=revalidate)
+        return count, mock_get
+
+    def test_new(self):
+        manifest = self._manifest()
+        count, mock_get = self._download(manifest)
+
+        self.assertEqual(count, 1)
+        mock_get.assert_called_once_with(self.url, headers={}, stream=True)
+        manifest.record.assert_called_once_with(
+            self.url, "gd.mlb.com/game.xml", 7, "abc", None,
+            "040f06fd774092478d450774f5ba30c5da78acc8")
+
+    def test_skip_intact(self):
+        manifest = self._manifest(entry=MagicMock())
+        count, mock_get = self._download(manifest)
+
+        self.assertEqual(count, 0)
+        self.assertFalse(mock_get.called)
+
+    def test_refetch_damaged(self):
+        manifest = self._manifest(entry=MagicMock(), intact=False)
+        count, mock_get = self._download(manifest)
+
+        self.assertEqual(count, 1)
+        mock_get.assert_called_once_with(self.url, headers={}, stream=True)
+
+    def test_revalidate(self):
+        entry = MagicMock(etag="abc", last_modified="yesterday")
+        manifest = self._manifest(entry=entry)
+        count, mock_get = self._download(manifest, revalidate=True,
+                                         status_code=304)
+
+        self.assertEqual(count, 0)
+        mock_get.assert_called_once_with(
+            self.url, headers={"If-None-Match": "abc",
+                               "If-Modified-Since": "yesterday"},
+            stream=True)
+        self.assertFalse(manifest.record.called)
+
+
+class Test_fetch_game(DownloadTestCase):
+    """Test gd.scrape.fetch_game"""
+
+    game = "http://gd.mlb.com/gid_1/"
+
+    def _response(self, content=b"content"):
+        return MagicMock(content=content)
+
+    @patch("requests.Session.get")
+    def test_fetch(self, mock_get):
+        mock_get.return_value = self._response()
+
+        actual = scrape.fetch_game(self.game)
+
+        self.assertEqual(actual, {name: b"content"
+                                  for name in utils.GAME_FILES})
+        for name in utils.GAME_FILES:
+            mock_get.assert_any_call(urljoin(self.game, name))
+        self.assertFalse(os.path.exists("gd.mlb.com"))
+
+    @patch("requests.Session.get")
+    def test_save(self, mock_get):
+        mock_get.return_value = self._response()
+
+        scrape.fetch_game(self.game, save=True, compression="gzip")
+
+        for name in utils.GAME_FILES:
+            path = "gd.mlb.com/gid_1/%s.gz" % name
+            self.assertEqual(self._read(path), b"content")
+
+    @patch("requests.Session.get")
+    def test_HTTPError(self, mock_get):
+        response = self._response()
+        response.raise_for_status.side_effect = HTTPError
+        mock_get.return_value = response
+
+        self.assertIsNone(scrape.fetch_game(self.game))
+
+
+class Test_get_games_in_range(unittest.TestCase):
+    """Test gd.scrape.get_games_in_range"""
+
+    def test_games(self):
+        def fake_scraper(roots, match, session, cache=None):
+            yield urljoin(roots[0], "gid_1/")
+
+        begin = utils.get_boundary("2013-05-01")
+        end = utils.get_boundary("2013-05-03")
+        with patch("gd.scrape.web_scraper", fake_scraper):
+            actual = scrape.get_games_in_range(begin, end, workers=2)
+            actual = sorted(actual)
+
+        self.assertEqual(len(actual), 3)
+        self.assertEqual(actual[0], urljoin(
+            utils.WEB_ROOT, "year_2013/month_05/day_01/gid_1/"))
+
+
+class Test_upload(unittest.TestCase):
+    """Test gd.scrape.upload"""
+
+    @patch("requests.Session.get")
+    @patch("gd.storage")
+    def test_workers(self, mock_storage, mock_get):
+        urls = ["http://gd.mlb.com/test%d.xml" % i for i in range(20)]
+        urls.append("http://gd.mlb.com/inning/")
+
+        response = MagicMock()
+        response.raise_for_status = MagicMock()
+        mock_get.return_value = response
+        mock_storage.list_objects.return_value = {}
+
+        actual = scrape.upload(urls, workers=4)
+
+        self.assertEqual(actual, 20)
+        self.assertEqual(mock_storage.upload_object.call_count, 20)
+        driver = mock_storage.pooled_driver.return_value.__enter__()
+        mock_storage.get_container.assert_called_with(driver, "gd.mlb.com")
+        # The whole directory is listed once.
+        self.assertEqual(mock_storage.list_objects.call_count, 1)
+
+    @patch("requests.Session.get")
+    @patch("gd.storage")
+    def test_HTTPError(self, mock_storage, mock_get):
+        response = MagicMock()
+        response.raise_for_status = MagicMock(side_effect=HTTPError)
+        mock_get.return_value = response
+        mock_storage.list_objects.return_value = {}
+
+        actual = scrape.upload(["http://gd.mlb.com/test.xml"])
+
+        self.assertEqual(actual, 0)
+        self.assertFalse(mock_storage.upload_object.called)
+
+
+@unittest.skipIf(LocalStorageDriver is None,
+                 "libcloud's local storage driver is unavailable")
+class Test_upload_local(unittest.TestCase):
+    """Test gd.scrape.upload against libcloud's local storage driver"""
+
+    DAY = "http://gd.mlb.com/components/game/mlb/year_2013/month_05/day_01/"
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        # Don't reuse pooled drivers and containers from other tests.
+        storage.reset()
+        self.addCleanup(storage.reset)
+        self.driver = LocalStorageDriver(self.root)
+        patcher = patch("gd.storage.get_driver",
+                        return_value=self.driver)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.content = {}
+
+    def _response(self, url, headers=None, stream=False):
+        content = self.content[url]
+        return MagicMock(ok=True, headers={"Content-Length": len(content)},
+                         iter_content=MagicMock(return_value=[content]))
+
+    def _upload(self, urls):
+        with patch("requests.Session.get", side_effect=self._response), \
+                patch("requests.Session.head",
+                      side_effect=self._response) as mock_head:
+            uploads = scrape.upload(urls, workers=2)
+        return uploads, mock_head.call_count
+
+    def _read(self, name):
+        container = self.driver.get_container("gd.mlb.com")
+        obj = self.driver.get_object(container.name, name)
+        return b"".join(self.driver.download_object_as_stream(obj))
+
+    def test_upload(self):
+        urls = [self.DAY + "gid_1/game.xml", self.DAY + "gid_1/inning/",
+                self.DAY + "gid_1/inning/inning_all.xml"]
+        self.content = {urls[0]: b"<game/>", urls[2]: b"<game><inning/>"}
+
+        self.assertEqual(self._upload(urls), (2, 0))
+
+        name = urls[2][len("http://gd.mlb.com/"):]
+        self.assertEqual(self._read(name), b"<game><inning/>")
+
+    def test_skip_unchanged(self):
+        urls = [self.DAY + "gid_1/game.xml", self.DAY + "gid_2/game.xml"]
+        self.content = {urls[0]: b"<game/>", urls[1]: b"<game/>"}
+        self.assertEqual(self._upload(urls), (2, 0))
+
+        # Only the file whose size changed is uploaded again.
+        self.content[urls[1]] = b"<game type='R'/>"
+        self.assertEqual(self._upload(urls), (1, 2))
+        name = urls[1][len("http://gd.mlb.com/"):]
+        self.assertEqual(self._read(name), b"<game type='R'/>")
+
+
+class Test_is_current(unittest.TestCase):
+    """Test gd.scrape._is_current"""
+
+    MD5 = "0cc175b9c0f1b6a831c399e269772661"
+
+    def test_size(self):
+        obj = stub(size=1, hash=None)
+        self.assertTrue(scrape._is_current(obj, {"Content-Length": "1"}))
+        self.assertFalse(scrape._is_current(obj, {"Content-Length": "2"}))
+        self.assertFalse(scrape._is_current(obj, {}))
+
+    def test_etag(self):
+        obj = stub(size=1, hash=self.MD5)
+        headers = {"Content-Length": "1", "ETag": '"%s"' % self.MD5}
+        self.assertTrue(scrape._is_current(obj, headers))
+        headers["ETag"] = '"%s"' % ("0" * 32)
+        self.assertFalse(scrape._is_current(obj, headers))
+        # ETags which aren't an MD5 can't be compared.
+        headers["ETag"] = '"1-5a2b"'
+        self.assertTrue(scrape._is_current(obj, headers))
+
+    def test_content_md5(self):
+        obj = stub(size=1, hash='"%s"' % self.MD5)
+        headers = {"Content-Length": "1",
+                   "Content-MD5": "DMF1ucDxtqgxw5niaXcmYQ=="}
+        self.assertTrue(scrape._is_current(obj, headers))
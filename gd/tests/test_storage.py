@@ -1,9 +1,12 @@
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import patch
-import io
+import threading
+import time
 import unittest
 
 from pretend import stub, raiser
-from libcloud.storage.types import ContainerDoesNotExistError
+from libcloud.storage.types import (ContainerAlreadyExistsError,
+                                    ContainerDoesNotExistError)
 
 from gd import storage
 
@@ -11,6 +14,10 @@ from gd import storage
 class Test_get_driver(unittest.TestCase):
     """Test gd.storage.get_driver"""
 
+    def setUp(self):
+        storage.reset()
+        self.addCleanup(storage.reset)
+
     @patch("configparser.ConfigParser.read")
     def test_bad_config(self, mock_read):
         mock_read.return_value = []
@@ -31,10 +38,65 @@ class Test_get_driver(unittest.TestCase):
         mock_get.assert_any_call("storage", "api_key")
         mock_get.assert_any_call("storage", "region")
 
+    @patch("gd.storage.get_storage_driver")
+    @patch("configparser.ConfigParser.get")
+    @patch("configparser.ConfigParser.read")
+    def test_config_read_once(self, mock_read, mock_get, mock_gsd):
+        mock_read.return_value = True
+
+        storage.get_driver()
+        storage.get_driver()
+
+        self.assertEqual(mock_read.call_count, 1)
+        self.assertEqual(mock_gsd.return_value.call_count, 2)
+
+
+class Test_pooled_driver(unittest.TestCase):
+    """Test gd.storage.pooled_driver"""
+
+    def setUp(self):
+        storage.reset()
+        self.addCleanup(storage.reset)
+
+    @patch("gd.storage.get_driver")
+    def test_reuse(self, mock_get_driver):
+        mock_get_driver.side_effect = lambda config: object()
+
+        with storage.pooled_driver() as first:
+            # A driver in use isn't lent out again.
+            with storage.pooled_driver() as second:
+                self.assertIsNot(first, second)
+        with storage.pooled_driver() as third:
+            self.assertIn(third, (first, second))
+
+        self.assertEqual(mock_get_driver.call_count, 2)
+
+    @patch("gd.storage.get_driver")
+    def test_threads(self, mock_get_driver):
+        mock_get_driver.side_effect = lambda config: object()
+        in_use = set()
+        lock = threading.Lock()
+
+        def use(_):
+            with storage.pooled_driver() as driver:
+                with lock:
+                    self.assertNotIn(driver, in_use)
+                    in_use.add(driver)
+                with lock:
+                    in_use.remove(driver)
+
+        with ThreadPoolExecutor(4) as executor:
+            list(executor.map(use, range(100)))
+        self.assertLessEqual(mock_get_driver.call_count, 4)
+
 
 class Test_get_container(unittest.TestCase):
     """Test gd.storage.get_container"""
 
+    def setUp(self):
+        storage.reset()
+        self.addCleanup(storage.reset)
+
     def test_existing_container(self):
         driver = stub(get_container=lambda arg: arg)
 
@@ -51,22 +113,103 @@ class Test_get_container(unittest.TestCase):
         actual = storage.get_container(driver, expected)
         self.assertEqual(actual, expected)
 
+    def test_cached(self):
+        calls = []
+        driver = stub(get_container=lambda arg: calls.append(arg) or arg)
+
+        storage.get_container(driver, "my_container")
+        storage.get_container(driver, "my_container")
+        storage.get_container(driver, "other_container")
+
+        self.assertEqual(calls, ["my_container", "other_container"])
+
+    def test_created_elsewhere(self):
+        exc = ContainerDoesNotExistError(1, 2, 3)
+        calls = []
+
+        def get_container(name):
+            calls.append(name)
+            if len(calls) == 1:
+                raise exc
+            return name
+
+        driver = stub(get_container=get_container,
+                      create_container=raiser(
+                          ContainerAlreadyExistsError(1, 2, 3)))
+
+        actual = storage.get_container(driver, "my_container")
+        self.assertEqual(actual, "my_container")
+        self.assertEqual(len(calls), 2)
+
+    def test_threads(self):
+        created = []
+        lock = threading.Lock()
+
+        def get_container(name):
+            with lock:
+                if name not in created:
+                    raise ContainerDoesNotExistError(1, 2, 3)
+            return name
+
+        def create_container(name):
+            # Leave time for other threads to miss the container too.
+            time.sleep(0.01)
+            with lock:
+                if name in created:
+                    raise ContainerAlreadyExistsError(1, 2, 3)
+                created.append(name)
+            return name
+
+        driver = stub(get_container=get_container,
+                      create_container=create_container)
+
+        with ThreadPoolExecutor(8) as executor:
+            actual = list(executor.map(
+                lambda _: storage.get_container(driver, "my_container"),
+                range(8)))
+
+        self.assertEqual(actual, ["my_container"] * 8)
+        self.assertEqual(created, ["my_container"])
+
+
+class Test_list_objects(unittest.TestCase):
+    """Test gd.storage.list_objects"""
+
+    def test_by_name(self):
+        objects = [stub(name="a/1.xml"), stub(name="a/2.xml")]
+        calls = []
+
+        def list_container_objects(container, prefix=None):
+            calls.append((container, prefix))
+            return objects
+
+        driver = stub(list_container_objects=list_container_objects)
+        actual = storage.list_objects(driver, "my_container", "a/")
+
+        self.assertEqual(actual, {"a/1.xml": objects[0],
+                                  "a/2.xml": objects[1]})
+        self.assertEqual(calls, [("my_container", "a/")])
+
 
 class Test_upload_object(unittest.TestCase):
     """Test gd.storage.upload_object"""
 
-    def _do_test(self, expected_data):
+    def _do_test(self, data):
         driver = stub(upload_object_via_stream=lambda *args: args)
 
         actual = storage.upload_object(driver, "my_container",
-                                       "my_object", expected_data)
+                                       "my_object", data)
 
-        self.assertEqual(type(actual[0]), io.StringIO)
         self.assertEqual(actual[1], "my_container")
         self.assertEqual(actual[2], "my_object")
+        return actual[0]
+
+    def test_bytes(self):
+        self.assertEqual(list(self._do_test(b"testing")), [b"testing"])
 
-    def test_non_iterable(self):
-        self._do_test("testing")
+    def test_str(self):
+        self.assertEqual(list(self._do_test("testing")), [b"testing"])
 
     def test_iterable(self):
-        self._do_test(io.StringIO("testing"))
+        data = iter([b"test", b"ing"])
+        self.assertIs(self._do_test(data), data)
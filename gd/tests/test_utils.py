@@ -1,6 +1,9 @@
-from datetime import datetime, date, time
-from unittest.mock import patch
-from urllib.parse import urljoin
+from datetime import datetime, date, time, timedelta
+import hashlib
+import io
+import os
+import shutil
+import tempfile
 import unittest
 
 from pretend import stub
@@ -55,61 +58,48 @@ class Test_get_boundary(unittest.TestCase):
         self.assertEqual(actual_parts, expected_parts)
 
 
-class Test_get_request_range(unittest.TestCase):
+class Test_get_date_range(unittest.TestCase):
+    """Test gd.utils.get_date_range"""
 
-    @patch("gd.utils.datetime_to_url")
-    def test_empty(self, mock_dtu):
-        value = "empty"
-        mock_dtu.return_value = value
-        empty = utils.Boundary(None, None)
+    def test_days(self):
+        begin = utils.get_boundary("2013-05-01")
+        end = utils.get_boundary("2013-05-07")
+        actual = utils.get_date_range(begin, end)
+        self.assertEqual(actual, (date(2013, 5, 1), date(2013, 5, 7)))
 
-        actual = utils.get_request_range(empty, empty)
+    def test_months(self):
+        begin = utils.get_boundary("2012-02")
+        end = utils.get_boundary("2012-02")
+        actual = utils.get_date_range(begin, end)
+        self.assertEqual(actual, (date(2012, 2, 1), date(2012, 2, 29)))
 
-        self.assertEqual(actual[0], utils.WEB_ROOT)
-        self.assertEqual(actual[1], urljoin(utils.WEB_ROOT, value))
+    def test_years(self):
+        begin = utils.get_boundary("2012")
+        end = utils.get_boundary("2013")
+        actual = utils.get_date_range(begin, end)
+        self.assertEqual(actual, (date(2012, 1, 1), date(2013, 12, 31)))
 
-    @patch("gd.utils.datetime_to_url")
-    def test_with_dates(self, mock_dtu):
-        value = utils.Boundary("date", "num_parts")
-        mock_dtu.return_value = value.date
-
-        expected = urljoin(utils.WEB_ROOT, value.date)
-        actual = utils.get_request_range(value, value)
-
-        self.assertEqual(actual[0], expected)
-        self.assertEqual(actual[1], expected)
+    def test_empty(self):
+        empty = utils.get_boundary(None)
+        first, last = utils.get_date_range(empty, empty)
+        self.assertIsNone(first)
+        self.assertEqual(last, date.today() - timedelta(days=1))
 
 
-class Test_get_inclusive_urls(unittest.TestCase):
+class Test_get_day_urls(unittest.TestCase):
+    """Test gd.utils.get_day_urls"""
 
-    def _test_range(self, start, stop, expected):
-        urls = ["a/a/a", "a/b/a", "a/c/a", "a/d/a", "a/e/a"]
-        actual = utils.get_inclusive_urls(urls, start, stop)
+    def test_range(self):
+        actual = utils.get_day_urls(date(2013, 4, 30), date(2013, 5, 2),
+                                    "root/")
+        expected = ["root/year_2013/month_04/day_30/",
+                    "root/year_2013/month_05/day_01/",
+                    "root/year_2013/month_05/day_02/"]
         self.assertEqual(list(actual), expected)
 
-    def test_early_range(self):
-        start = "a/a"
-        stop = "a/c"
-        expected = ["a/a/a", "a/b/a", "a/c/a"]
-        self._test_range(start, stop, expected)
-
-    def test_middle_range(self):
-        start = "a/b"
-        stop = "a/d"
-        expected = ["a/b/a", "a/c/a", "a/d/a"]
-        self._test_range(start, stop, expected)
-
-    def test_late_range(self):
-        start = "a/c"
-        stop = "a/e"
-        expected = ["a/c/a", "a/d/a", "a/e/a"]
-        self._test_range(start, stop, expected)
-
-    def test_no_matcing_range(self):
-        start = "a/f"
-        stop = "a/g"
-        expected = []
-        self._test_range(start, stop, expected)
+    def test_empty(self):
+        actual = utils.get_day_urls(date(2013, 5, 2), date(2013, 5, 1))
+        self.assertEqual(list(actual), [])
 
 
 class Test_datetime_to_url(unittest.TestCase):
@@ -145,6 +135,23 @@ class Test_create_datetime(unittest.TestCase):
         actual = utils.create_datetime("")
         self.assertEqual(actual, datetime.min)
 
+    def test_matches_strptime(self):
+        for string in ("2014-07-19T23:12:35Z", "2000-02-29T00:00:00Z"):
+            with self.subTest(string=string):
+                self.assertEqual(utils.create_datetime(string),
+                                 datetime.strptime(string, utils.ISO_FORMAT))
+
+    def test_invalid(self):
+        for string in ("2014-07-19 23:12:35", "2014-13-19T23:12:35Z",
+                       "not a time"):
+            with self.subTest(string=string):
+                with self.assertRaises(ValueError):
+                    utils.create_datetime(string)
+
+    def test_cached(self):
+        first = utils.create_datetime("1984-07-02T12:34:56Z")
+        self.assertIs(utils.create_datetime("1984-07-02T12:34:56Z"), first)
+
 
 class Test_create_time(unittest.TestCase):
     """Test gd.utils.create_time"""
@@ -164,3 +171,134 @@ class Test_create_time(unittest.TestCase):
     def test_create_time_empty(self):
         actual = utils.create_time("")
         self.assertEqual(actual, time.min)
+
+
+class Test_map_concurrently(unittest.TestCase):
+    """Test gd.utils.map_concurrently"""
+
+    def test_serial(self):
+        actual = utils.map_concurrently(lambda x: x * 2, range(5))
+        self.assertEqual(list(actual), [0, 2, 4, 6, 8])
+
+    def test_workers(self):
+        actual = utils.map_concurrently(lambda x: x * 2, range(50),
+                                        workers=4)
+        self.assertEqual(sorted(actual), [x * 2 for x in range(50)])
+
+    def test_lazy_items(self):
+        consumed = []
+
+        def items():
+            for x in range(100):
+                consumed.append(x)
+                yield x
+
+        rv = utils.map_concurrently(lambda x: x, items(), workers=2)
+        next(rv)
+        self.assertLess(len(consumed), 100)
+        rv.close()
+
+    def test_exception(self):
+        def fn(x):
+            raise ValueError(x)
+
+        rv = utils.map_concurrently(fn, range(3), workers=2)
+        self.assertRaises(ValueError, list, rv)
+
+
+class Test_compression(unittest.TestCase):
+    """Test gd.utils.compressed_writer, find_gameday and open_gameday"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+
+    def _write(self, name, compression):
+        path = os.path.join(self.root, name)
+        with open(path, "wb") as fh:
+            writer = utils.compressed_writer(fh, compression)
+            writer.write(b"<game/>")
+            writer.close()
+            self.assertFalse(fh.closed)
+        return path
+
+    def test_round_trip(self):
+        for compression in [None] + sorted(utils.COMPRESSION):
+            with self.subTest(compression=compression):
+                name = "game.xml" + utils.COMPRESSION.get(compression, "")
+                path = self._write(name, compression)
+                with utils.open_gameday(path) as fh:
+                    self.assertEqual(fh.read(), b"<game/>")
+
+    def test_unknown(self):
+        self.assertRaises(ValueError, utils.compressed_writer, io.BytesIO(),
+                          "lzma")
+
+    def test_find_games(self):
+        game = os.path.join(self.root, "gid_1")
+        os.makedirs(os.path.join(game, "inning"))
+        os.makedirs(os.path.join(self.root, "gid_2"))
+        self._write("gid_1/game.xml", None)
+        self._write("gid_1/players.xml.gz", "gzip")
+        self._write("gid_2/game.xml", None)
+        self.assertEqual(list(utils.find_games(self.root)), [])
+
+        self._write("gid_1/inning/inning_all.xml.gz", "gzip")
+        expected = (os.path.join(game, "game.xml"),
+                    os.path.join(game, "inning", "inning_all.xml.gz"),
+                    os.path.join(game, "players.xml.gz"))
+        self.assertEqual(list(utils.find_games(self.root)), [expected])
+
+    def test_find_player_files(self):
+        for name in ("batters", "pitchers"):
+            os.makedirs(os.path.join(self.root, name))
+        self._write("batters/2.xml.gz", "gzip")
+        self._write("batters/1.xml", None)
+        self._write("batters/notes.txt", None)
+        self._write("pitchers/3.xml", None)
+
+        actual = utils.find_player_files(self.root)
+        self.assertEqual(actual, [os.path.join(self.root, name) for name in
+                                  ("batters/1.xml", "batters/2.xml.gz",
+                                   "pitchers/3.xml")])
+        self.assertEqual([utils.player_id(path) for path in actual],
+                         [1, 2, 3])
+        self.assertEqual(utils.read_gameday(actual[1]), b"<game/>")
+        self.assertEqual(utils.find_player_files(
+            os.path.join(self.root, "batters")), [])
+
+    def test_find_gameday(self):
+        path = os.path.join(self.root, "game.xml")
+        self.assertIsNone(utils.find_gameday(path))
+
+        self._write("game.xml.gz", "gzip")
+        self.assertEqual(utils.find_gameday(path), path + ".gz")
+
+        self._write("game.xml", None)
+        self.assertEqual(utils.find_gameday(path), path)
+
+
+class Test_write_file(unittest.TestCase):
+    """Test gd.utils.write_file"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+
+    def test_write(self):
+        path = os.path.join(self.root, "game.xml")
+        sha1 = utils.write_file(path, [b"<game", b"/>"])
+
+        self.assertEqual(utils.read_gameday(path), b"<game/>")
+        self.assertEqual(sha1, hashlib.sha1(b"<game/>").hexdigest())
+        self.assertEqual(os.listdir(self.root), ["game.xml"])
+
+    def test_mode(self):
+        path = os.path.join(self.root, "game.xml")
+        utils.write_file(path, [b"<game/>"])
+        with open(os.path.join(self.root, "other.xml"), "w"):
+            pass
+
+        self.assertEqual(
+            os.stat(path).st_mode & 0o777,
+            os.stat(os.path.join(self.root, "other.xml")).st_mode & 0o777)
@@ -1,9 +1,22 @@
 from collections import namedtuple
+from concurrent.futures import (FIRST_COMPLETED, ThreadPoolExecutor,
+                                as_completed, wait)
 from datetime import date, datetime, time, timedelta
+from functools import lru_cache
 from logging.handlers import RotatingFileHandler
 from urllib.parse import urljoin
+import calendar
+import gzip
+import hashlib
 import logging
 import os
+import re
+import tempfile
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 
 Boundary = namedtuple("Boundary", "date num_parts")
 
@@ -13,6 +26,19 @@ MONTHS = {"January": 1, "February": 2, "March": 3, "April": 4,
 
 WEB_ROOT = "http://gd2.mlb.com/components/game/mlb/"
 
+# File name suffixes for the supported on-disk compression formats.
+COMPRESSION = {"gzip": ".gz", "zstd": ".zst"}
+
+# The files we want from each game directory, relative to that directory,
+# in the order the parser takes them.
+GAME_FILES = ("game.xml", "inning/inning_all.xml", "players.xml")
+# Each game also has a file per player in these directories, named after
+# the player's numeric ID, such as batters/112526.xml.
+PLAYER_DIRS = ("batters", "pitchers")
+# A player file's name relative to its game directory, possibly compressed.
+PLAYER_FILE = re.compile(r"(?:%s)/[^/.]+\.xml(?:\.[^/]*)?$" %
+                         "|".join(PLAYER_DIRS))
+
 
 def get_boundary(date):
     """Format a boundary date string and return the datetime and the number
@@ -31,38 +57,33 @@ def get_boundary(date):
         return Boundary(None, 0)
 
 
-def get_request_range(begin, end):
-    if begin.date is None:
-        start = WEB_ROOT
-    else:
-        start = urljoin(WEB_ROOT,
-                        datetime_to_url(begin.date, begin.num_parts))
+def get_date_range(begin, end):
+    """Return the first and last dates covered by the `begin` and `end`
+    Boundary objects.
+
+    A partial `end` covers the rest of its year or month, and with no end
+    the range stops at yesterday's date. The first date is None when there
+    is no beginning, as it depends on which years are available."""
+    first = None if begin.date is None else begin.date.date()
 
     if end.date is None:
-        stop = urljoin(WEB_ROOT, datetime_to_url(
-                       datetime.today() - timedelta(days=1)))
-    else:
-        stop = urljoin(WEB_ROOT,
-                       datetime_to_url(end.date, end.num_parts))
+        return first, date.today() - timedelta(days=1)
 
-    return start, stop
+    last = end.date.date()
+    if end.num_parts == 1:
+        last = last.replace(month=12, day=31)
+    elif end.num_parts == 2:
+        last = last.replace(day=calendar.monthrange(last.year,
+                                                    last.month)[1])
+    return first, last
 
 
-def get_inclusive_urls(urls, start, stop):
-    """Yield URLs which are of the range [start, stop]"""
-    in_range = False
-    out_range = False
-    for url in urls:
-        # Check both that a URL contains or is contained within one of
-        # the boundaries. This is necessary as deeper links come.
-        if url in start or start in url:
-            in_range = True
-        if url in stop or stop in url:
-            out_range = True
-        if in_range:
-            yield url
-        if out_range:
-            break
+def get_day_urls(first, last, root=WEB_ROOT):
+    """Yield the URL of every day directory in [first, last]."""
+    day = first
+    while day <= last:
+        yield urljoin(root, datetime_to_url(day))
+        day += timedelta(days=1)
 
 
 def datetime_to_url(dt, parts=3):
@@ -71,6 +92,9 @@ def datetime_to_url(dt, parts=3):
     return "/".join(fragments[:parts]).format(dt) + "/"
 
 
+# Values repeat a lot within a game, such as an at-bat's start time being
+# tied to each of its pitches, so the parsed results are cached.
+@lru_cache(maxsize=1024)
 def create_date(string):
     """Given a string like 'July 2, 1984', turn it into a datetime.date."""
     if not string:
@@ -82,15 +106,27 @@ def create_date(string):
     return date(year, month, day)
 
 
+ISO_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+
+@lru_cache(maxsize=1024)
 def create_datetime(string):
     """Given a string like 2014-07-19T23:12:35Z, return a datetime.datetime."""
     if not string:
         # There are times where pitches have had an empty string for
         # a timestamp, so return the minimum value.
         return datetime.min
-    return datetime.strptime(string, "%Y-%m-%dT%H:%M:%SZ")
+    if (len(string) == 20 and string[4] == string[7] == "-" and
+            string[10] == "T" and string[13] == string[16] == ":" and
+            string[19] == "Z"):
+        # Slicing out the fields is many times faster than strptime.
+        return datetime(int(string[:4]), int(string[5:7]),
+                        int(string[8:10]), int(string[11:13]),
+                        int(string[14:16]), int(string[17:19]))
+    return datetime.strptime(string, ISO_FORMAT)
 
 
+@lru_cache(maxsize=1024)
 def create_time(string):
     """Given a string like 12:00 or 1200, return a datetime.time."""
     if not string:
@@ -101,6 +137,150 @@ def create_time(string):
     return time(hour, minute)
 
 
+def map_concurrently(fn, items, workers=1, executor=ThreadPoolExecutor):
+    """Yield `fn(item)` for every item in `items`, running up to `workers`
+    calls at once. Results are yielded in the order they complete.
+
+    `items` is consumed lazily and only a couple of calls per worker are
+    kept in flight, so it may be an unbounded generator. With one worker
+    everything runs serially in the calling thread."""
+    if workers <= 1:
+        yield from map(fn, items)
+        return
+
+    with executor(max_workers=workers) as pool:
+        pending = set()
+        for item in items:
+            pending.add(pool.submit(fn, item))
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+
+        for future in as_completed(pending):
+            yield future.result()
+
+
+def _require_zstandard():
+    if zstandard is None:
+        raise Exception("zstd compression requires the zstandard package")
+
+
+def compressed_writer(fh, compression=None):
+    """Wrap the binary file `fh` so that data written to the result is
+    compressed with `compression`, one of the COMPRESSION keys, or None.
+    Closing the result flushes it but leaves `fh` open."""
+    if compression is None:
+        return _Unclosed(fh)
+    if compression == "gzip":
+        return gzip.GzipFile(fileobj=fh, mode="wb")
+    if compression == "zstd":
+        _require_zstandard()
+        return zstandard.ZstdCompressor().stream_writer(fh, closefd=False)
+    raise ValueError("Unknown compression: %s" % compression)
+
+
+def _get_umask():
+    # The umask can only be read by setting it, so it's read once, before
+    # any threads could be creating files.
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+# The mode open() would give a new file, since mkstemp's are owner-only.
+_FILE_MODE = 0o666 & ~_get_umask()
+
+
+def write_file(path, chunks, compression=None):
+    """Write the byte strings in `chunks` into `path`, compressed with
+    `compression` if given. They're written to a temporary file beside
+    `path` which is renamed over it once complete, so `path` never holds a
+    partial file, and which gets the permissions `open` would give it.
+    Return the SHA-1 of the uncompressed content."""
+    digest = hashlib.sha1()
+    directory, filename = os.path.split(path)
+    fd, temp = tempfile.mkstemp(prefix=".%s." % filename, dir=directory)
+    try:
+        os.fchmod(fd, _FILE_MODE)
+        with os.fdopen(fd, "wb") as fh:
+            writer = compressed_writer(fh, compression)
+            for chunk in chunks:
+                digest.update(chunk)
+                writer.write(chunk)
+            writer.close()
+        os.replace(temp, path)
+    except BaseException:
+        os.remove(temp)
+        raise
+    return digest.hexdigest()
+
+
+class _Unclosed:
+    """A writer which passes writes through to `fh` but doesn't close it."""
+
+    def __init__(self, fh):
+        self.write = fh.write
+
+    def close(self):
+        pass
+
+
+def find_gameday(path):
+    """Return the path to the Gameday file `path` as stored on disk, which
+    may have a compression suffix, or None if it doesn't exist."""
+    for suffix in ("",) + tuple(COMPRESSION.values()):
+        if os.path.exists(path + suffix):
+            return path + suffix
+    return None
+
+
+def find_games(root):
+    """Walk `root` and yield the paths to the GAME_FILES of every game
+    directory found, in that order."""
+    for directory, dirs, files in os.walk(root):
+        paths = tuple(find_gameday(os.path.join(directory, name))
+                      for name in GAME_FILES)
+        if all(paths):
+            yield paths
+
+
+def find_player_files(game_dir):
+    """Return the sorted paths to the per-player files, in the batters and
+    pitchers directories, of the game at `game_dir`."""
+    paths = []
+    for name in PLAYER_DIRS:
+        directory = os.path.join(game_dir, name)
+        if os.path.isdir(directory):
+            paths.extend(os.path.join(directory, filename)
+                         for filename in os.listdir(directory)
+                         if PLAYER_FILE.match("%s/%s" % (name, filename)))
+    return sorted(paths)
+
+
+def player_id(path):
+    """Return the ID of the player whose file is at `path`."""
+    return int(os.path.basename(path).split(".")[0])
+
+
+def read_gameday(path):
+    """Return the decompressed contents of the Gameday file at `path`."""
+    with open_gameday(path) as fh:
+        return fh.read()
+
+
+def open_gameday(path):
+    """Open a Gameday file for binary reading, decompressing it according
+    to its suffix."""
+    if path.endswith(COMPRESSION["gzip"]):
+        return gzip.open(path, "rb")
+    if path.endswith(COMPRESSION["zstd"]):
+        _require_zstandard()
+        return zstandard.ZstdDecompressor().stream_reader(open(path, "rb"),
+                                                          closefd=True)
+    return open(path, "rb")
+
+
 def get_logger(name):
     logger = logging.getLogger(name)
     logger.addHandler(logging.NullHandler())
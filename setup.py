@@ -14,7 +14,7 @@ setup(name="gameday",
                                          "config/storage.conf.example"])],
       install_requires=["requests",
                         "sqlalchemy",
-                        "apache-libcloud"],
+                        "apache-libcloud>=3.0"],
       test_suite="gd.tests",
       classifiers=[
         "Development Status :: 1 - Planning",